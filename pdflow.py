@@ -5,7 +5,7 @@ import stat
 import re
 import argparse
 import logging
-from typing import Tuple, Union, List
+from typing import Tuple, Union, List, Dict, Any, Callable
 
 '''
 ###################################
@@ -46,6 +46,7 @@ parser = argparse.ArgumentParser(description='DAL physical design flow. you need
 parser.add_argument('-ovdir', action='store', type=str, metavar='<directory>', help='override directory. path to the directory which patch scripts exist')
 parser.add_argument('-setvar', action='append', type=str, metavar='"FLOW_VAR=VALUE"', help='set a flow variable. this has the highest priority, and will override flow vars settings in vars_setup.py. need to enclosed in double quotes. you can use this option multiple times.')
 parser.add_argument('-debug', action='store_true', help='run this flow in debug mode')
+parser.add_argument('-no_config_cache', action='store_true', help='read configs and vars files again instead of using the results cached in the workarea')
 subparsers = parser.add_subparsers(help='available sub-commands', dest='command')
 
 add_block_parser_epilog = '''
@@ -90,9 +91,18 @@ clone_wa_parser.add_argument('-dest', action='store', type=str, metavar='<wa_nam
 clone_wa_parser.add_argument('-flow', action='store', type=str, nargs='+', help='specify the flow to be cloned. you can specify multiple flows. if not specified, it will clone every flows. e.g., -flow pnr sta')
 clone_wa_parser.add_argument('-stage', action='store', type=str, nargs='+', help='specify the stage to be cloned. you can specify multiple stages. if not specified, it will clone every stages. e.g., -stage cts finish')
 clone_wa_parser.add_argument('-aslink', action='store_true', help='all the cloned files are created as symbolic links')
+clone_wa_parser.add_argument('-link', action='store_true', help='the cloned files share their data with the source workarea by reflinks (copy-on-write) if the filesystem supports them. otherwise, they are copied. scripts and configs are always copied')
+clone_wa_parser.add_argument('-num_workers', action='store', type=int, default=8, metavar='<num>', help='number of directories cloned in parallel')
 
 handoff_parser = subparsers.add_parser('handoff', help='handoff the current workarea. this command should be performed in a workarea')
 handoff_parser.add_argument('-handoff_id', action='store', type=str, help='handoff the block of the current workarea in the handoff directory of the project with the specified handoff id', required=True)
+handoff_parser.add_argument('-stage', action='store', type=str, help='stage whose results are handed off. if not specified, the last stage done in pnr')
+handoff_parser.add_argument('-num_workers', action='store', type=int, default=8, metavar='<num>', help='number of files hashed in parallel')
+
+restore_handoff_parser = subparsers.add_parser('restore_handoff', help='rebuild handoff releases from their manifests in the handoff store of the project')
+restore_handoff_parser.add_argument('-handoff_id', action='store', type=str, help='handoff id to restore', required=True)
+restore_handoff_parser.add_argument('-design', action='store', type=str, help='restore only the design')
+restore_handoff_parser.add_argument('-block', action='store', metavar='<block_name>', type=str, help='restore only the block')
 
 update_interface_parser = subparsers.add_parser('update_interface', help='update interface design. this command should be performed in a workarea')
 update_interface_parser.add_argument('-handoff_id', action='store', type=str, help='update the handoff id of the sub-hierarchy designs', required=True)
@@ -101,12 +111,23 @@ update_interface_parser.add_argument('-block', action='store', metavar='<block_n
 history_parser = subparsers.add_parser('history', help='show command history of the current workarea. by default, show only the last 10 history. this command should be performed in a workarea')
 history_parser.add_argument('-all', action='store_true', help='show all history')
 history_parser.add_argument('-num', action='store', type=int, metavar='<num>', help='show only the last <num> history')
+history_parser.add_argument('-flow', action='store', type=str, metavar='<command>', help='show only the history of the command (e.g., pnr)')
+history_parser.add_argument('-stage', action='store', type=str, metavar='<stage>', help='show only the history of the stage (e.g., route)')
+history_parser.add_argument('-tool', action='store', type=str, metavar='<tool>', help='show only the history of the tool (e.g., innovus)')
+history_parser.add_argument('-status', action='store', type=str, choices=['running', 'passed', 'failed', 'aborted', 'unknown'], help='show only the history with the status')
+history_parser.add_argument('-since', action='store', type=str, metavar='<YYYY-MM-DD>', help='show only the history created on or after the date')
 
 list_tech_parser = subparsers.add_parser('list_tech', help='show available process nodes')
 list_design_parser = subparsers.add_parser('list_design', help='show available designs')
 
 supported_flows = ['syn', 'pnr', 'ext', 'sta', 'emir', 'sim']
 
+metrics_parser = subparsers.add_parser('metrics', help='compare QoR metrics (e.g., wns, tns, wirelength, runtime) of runs and stages stored by post-processing. by default, show the last run of each stage. this command should be performed in a workarea')
+metrics_parser.add_argument('-flow', action='store', type=str, choices=supported_flows, default='pnr', help='flow to show')
+metrics_parser.add_argument('-stage', action='store', type=str, nargs='+', help='stages to show. if not given, show all the stages. -stage route finish')
+metrics_parser.add_argument('-metric', action='store', type=str, nargs='+', help='metrics to show. if not given, show all the metrics. -metric setup_wns setup_tns')
+metrics_parser.add_argument('-num', action='store', type=int, default=1, metavar='<num>', help='show the last <num> runs of each stage')
+
 syn_parser = subparsers.add_parser('syn', help='perform logic synthesis of the current design')
 supported_syn_tools = ['dc']
 syn_parser.add_argument('-tool', action='store', type=str, choices=supported_syn_tools, default=supported_syn_tools[0], help='tool to use for synthesis')
@@ -185,15 +206,107 @@ sim_parser.add_argument('-run', action='store', type=str, choices=supported_sim_
 ############################################################
 # PRIMITIVE FUNCTIONS
 ############################################################
-def create_history(command: str, time: str, log_file: str):
+history_db_version = 1
+'''
+version of the schema of the history database. the database is recreated (from the history files) if its version is different
+'''
+
+
+def get_history_fields(command: str) -> Tuple[str, str, str]:
     '''
-    create a history file in history directory in the current workarea
+    get the command, stage and tool of a pdflow command line (e.g., "pdflow.py pnr -stage route -tool innovus" -> pnr, route, innovus)
+
+    :param command: pdflow command line
+    :return: command, stage and tool. None if not given
+    '''
+    tokens = command.split()
+    flow = tokens[1] if len(tokens) > 1 and not tokens[1].startswith('-') else None
+    stage = None
+    tool = None
+    for i, token in enumerate(tokens[:-1]):
+        if token == '-stage':
+            stage = tokens[i + 1]
+        elif token == '-tool':
+            tool = tokens[i + 1]
+    return flow, stage, tool
+
+
+def open_history_db(wa_dir: str) -> 'sqlite3.Connection':
+    '''
+    open the history database of a workarea (<workarea>/history/history.db). it is created from the history files if it does not exist.
+    - history: a row for each command (id, time, created, command, flow, stage, tool, status, log_file, cmd_file)
+
+    :param wa_dir: workarea directory
+    :return: connection to the database
+    '''
+    import sqlite3
+
+    history_dir = os.path.join(wa_dir, 'history')
+    db_file = os.path.join(history_dir, 'history.db')
+    conn = sqlite3.connect(db_file, timeout=60)
+    if conn.execute('PRAGMA user_version').fetchone()[0] != history_db_version:
+        conn.executescript('''
+            DROP TABLE IF EXISTS history;
+            CREATE TABLE history (id INTEGER PRIMARY KEY AUTOINCREMENT, time TEXT NOT NULL, created REAL NOT NULL, command TEXT NOT NULL, flow TEXT, stage TEXT, tool TEXT, status TEXT NOT NULL, log_file TEXT, cmd_file TEXT);
+            CREATE INDEX history_flow_stage ON history (flow, stage);
+            CREATE INDEX history_created ON history (created);
+            PRAGMA user_version = %d;
+        ''' % history_db_version)
+
+        # import the history files created before the database
+        rows = []
+        for cmd_file in sorted(os.listdir(history_dir)):
+            cmd_file_path = os.path.join(history_dir, cmd_file)
+            if not cmd_file.endswith('.cmd') or os.path.islink(cmd_file_path):
+                continue
+            date_time = None
+            log_file = None
+            command = None
+            with open(cmd_file_path, 'r') as ifp:
+                for line in ifp:
+                    match = re.search(r'# Created = (?P<date_time>\S+)', line)
+                    if match:
+                        date_time = match.group('date_time')
+                    match = re.search(r'# LOGFILE = (?P<log_file>\S+)', line)
+                    if match:
+                        log_file = match.group('log_file')
+                    match = re.match(r'^[^#]', line)
+                    if match:
+                        command = line.strip()
+            if date_time is None or command is None:
+                continue
+            rows.append((date_time, os.stat(cmd_file_path).st_mtime, command) + get_history_fields(command) + ('unknown', log_file, cmd_file_path))
+        with conn:
+            conn.executemany('INSERT INTO history (time, created, command, flow, stage, tool, status, log_file, cmd_file) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    return conn
+
+
+def update_history(wa_dir: str, history_id: int, status: str):
+    '''
+    update the status of a command in the history database. only the command still running is updated,
+    so that it can be registered with atexit to mark the commands exiting in the middle as aborted
+
+    :param wa_dir: workarea directory
+    :param history_id: id of the command returned by create_history
+    :param status: status of the command (passed, failed or aborted)
+    '''
+    conn = open_history_db(wa_dir)
+    with conn:
+        conn.execute('UPDATE history SET status = ? WHERE id = ? AND status = ?', (status, history_id, 'running'))
+    conn.close()
+
+
+def create_history(command: str, time: str, log_file: str) -> int:
+    '''
+    create a history file in history directory in the current workarea, and add the command to the history database
 
     :param command: current pdflow command
     :param time: current time
     :param log_file: log file in log directory in the current workarea
-    :return: None
+    :return: id of the command in the history database
     '''
+    import time as time_module
+
     import flow_config_utils
     from flow_config_utils import flow_cfgs as FLOW_CFGS
     import flow_file_utils
@@ -203,6 +316,9 @@ def create_history(command: str, time: str, log_file: str):
     wa_cfg_file = os.path.join(cur_dir, 'configs', 'wa.config')
     flow_config_utils.read_config(wa_cfg_file)
 
+    # open (or create from the history files) the database before writing a new history file
+    conn = open_history_db(cur_dir)
+
     history_file = os.path.join(cur_dir, 'history', flow_file_utils.join_filename('pdflow', time, 'cmd'))
     ofp = flow_file_utils.open_wfile(history_file)
     ofp.write('#!/bin/tcsh\n')
@@ -222,6 +338,178 @@ def create_history(command: str, time: str, log_file: str):
     latest_history_file = os.path.join(cur_dir, 'history', 'pdflow.latest.cmd')
     flow_file_utils.make_symlink(history_file, latest_history_file)
 
+    with conn:
+        history_id = conn.execute('INSERT INTO history (time, created, command, flow, stage, tool, status, log_file, cmd_file) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                  (time, time_module.time(), command) + get_history_fields(command) + ('running', log_file, history_file)).lastrowid
+    conn.close()
+
+    return history_id
+
+
+config_cache_version = 1
+'''
+version of the config cache. increase it when the way to read configs and vars is changed
+'''
+config_cache_max_entries = 32
+'''
+number of the most recently used entries kept in the config cache of a workarea. older entries are removed
+'''
+
+
+def get_module_state(module) -> Dict[str, Any]:
+    '''
+    get the data (dict, list, set and scalar globals) of a module, e.g., flow_cfgs of flow_config_utils
+
+    :param module: module
+    :return: name: value of the data
+    '''
+    return {name: value for name, value in vars(module).items() if not name.startswith('_') and isinstance(value, (dict, list, set, str, int, float, bool, type(None)))}
+
+
+def set_module_state(module, state: Dict[str, Any]):
+    '''
+    restore the data of a module from get_module_state. containers are updated in place, since other modules refer to them (e.g., FLOW_CFGS)
+
+    :param module: module
+    :param state: name: value of the data
+    '''
+    for name, value in state.items():
+        cur_value = getattr(module, name, None)
+        if isinstance(cur_value, dict) and isinstance(value, dict):
+            cur_value.clear()
+            cur_value.update(value)
+        elif isinstance(cur_value, list) and isinstance(value, list):
+            cur_value[:] = value
+        elif isinstance(cur_value, set) and isinstance(value, set):
+            cur_value.clear()
+            cur_value.update(value)
+        else:
+            setattr(module, name, value)
+
+
+def get_canonical_value(value) -> Any:
+    '''
+    convert a value to a JSON-serializable value which does not depend on the process (e.g., to be hashed as a key of the config cache).
+    dict items and set elements are sorted, since the order of sets follows the string hashes randomized for each process (PYTHONHASHSEED)
+
+    :param value: dict, list, tuple, set, frozenset or scalar (str, int, float, bool, None). containers can be nested
+    :return: canonical value
+    '''
+    import json
+
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [get_canonical_value(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return {'set': sorted((get_canonical_value(item) for item in value), key=json.dumps)}
+    if isinstance(value, dict):
+        return {'dict': sorted(([get_canonical_value(key), get_canonical_value(item)] for key, item in value.items()), key=json.dumps)}
+    raise TypeError('%s cannot be a part of a cache key' % type(value).__name__)
+
+
+def read_with_config_cache(kind: str, files: List[str], module, read_func):
+    '''
+    read configs or vars specs with read_func, or restore the result of the same read from the config cache of the workarea (<workarea>/.pdflow_cache/config).
+    the cache is keyed by the paths, mtimes and contents of the files, and FLOW_ENVS, FLOW_CFGS and the data of the module before reading.
+    it is not used if $PDFLOW_NO_CONFIG_CACHE is set (-no_config_cache) or the result cannot be pickled.
+    use it only for the files whose result depends on their contents only (configs and vars_spec.py), not for vars_setup.py which can read other inputs
+
+    :param kind: kind of the read (e.g., configs)
+    :param files: files read by read_func (including the files which do not exist)
+    :param module: module which stores the result of read_func (e.g., flow_config_utils)
+    :param read_func: function to read the files
+    '''
+    import hashlib
+    import json
+    import pickle
+    import tempfile
+
+    from flow_env_utils import flow_envs as FLOW_ENVS
+    from flow_config_utils import flow_cfgs as FLOW_CFGS
+
+    if os.getenv('PDFLOW_NO_CONFIG_CACHE') is not None or 'WORK_AREA' not in FLOW_ENVS:
+        read_func()
+        return
+
+    try:
+        sha = hashlib.sha256()
+        sha.update(('%d %s %s' % (config_cache_version, kind, sys.version)).encode())
+        sha.update(json.dumps(get_canonical_value([FLOW_ENVS, FLOW_CFGS, get_module_state(module)])).encode())
+        for file in files:
+            if os.path.exists(file):
+                with open(file, 'rb') as ifp:
+                    sha.update(('%s %d\n' % (file, os.stat(file).st_mtime_ns)).encode())
+                    sha.update(hashlib.sha256(ifp.read()).digest())
+            else:
+                sha.update(('%s missing\n' % file).encode())
+    except (TypeError, ValueError):
+        read_func()
+        return
+    cache_dir = os.path.join(FLOW_ENVS['WORK_AREA'], '.pdflow_cache', 'config')
+    cache_file = os.path.join(cache_dir, '%s.%s.pkl' % (kind, sha.hexdigest()))
+
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'rb') as ifp:
+                set_module_state(module, pickle.load(ifp))
+            # mtime of an entry is the last time it is used (see prune_config_cache)
+            os.utime(cache_file)
+            return
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            pass
+
+    read_func()
+    try:
+        state = pickle.dumps(get_module_state(module))
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, temp_file = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as ofp:
+            ofp.write(state)
+        os.replace(temp_file, cache_file)
+        prune_config_cache(cache_dir)
+    except (TypeError, pickle.PicklingError, AttributeError, OSError):
+        pass
+
+
+def prune_config_cache(cache_dir: str):
+    '''
+    remove the entries of the config cache other than the config_cache_max_entries most recently used ones
+
+    :param cache_dir: config cache directory of a workarea
+    '''
+    entries = []
+    for entry in os.scandir(cache_dir):
+        try:
+            entries.append((entry.stat().st_mtime, entry.path))
+        except OSError:
+            continue
+    entries.sort(reverse=True)
+    for mtime, path in entries[config_cache_max_entries:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def get_pdflow_config_files(flow: str, tool: str) -> List[str]:
+    '''
+    get the list of config files read by read_pdflow_configs (in the order of priority, including the files which do not exist)
+
+    :param flow: flow to read config
+    :param tool: tool to read config
+    :return: list of config files
+    '''
+    from flow_env_utils import flow_envs as FLOW_ENVS
+
+    return [
+        os.path.join(FLOW_ENVS['CE_DIR'], 'configs', flow + '.config'),
+        os.path.join(FLOW_ENVS['CE_DIR'], 'configs', tool + '.config'),
+        os.path.join(os.getenv('TECH_DIR'), FLOW_ENVS['TECH'], 'configs', 'tech.config'),
+        os.path.join(os.getenv('DESIGN_DIR'), FLOW_ENVS['DESIGN'], 'configs', 'design.config'),
+        os.path.join(os.getenv('DESIGN_DIR'), FLOW_ENVS['DESIGN'], 'configs', 'block.config'),
+    ]
+
 
 def read_pdflow_configs(flow: str, tool: str):
     '''
@@ -237,33 +525,25 @@ def read_pdflow_configs(flow: str, tool: str):
     :param tool: tool to read config
     :return: None
     '''
-    from flow_env_utils import flow_envs as FLOW_ENVS
     import flow_config_utils
 
-    cfg_files = [
-        os.path.join(FLOW_ENVS['CE_DIR'], 'configs', flow + '.config'),
-        os.path.join(FLOW_ENVS['CE_DIR'], 'configs', tool + '.config'),
-        os.path.join(os.getenv('TECH_DIR'), FLOW_ENVS['TECH'], 'configs', 'tech.config'),
-        os.path.join(os.getenv('DESIGN_DIR'), FLOW_ENVS['DESIGN'], 'configs', 'design.config'),
-        os.path.join(os.getenv('DESIGN_DIR'), FLOW_ENVS['DESIGN'], 'configs', 'block.config'),
-    ]
-    for cfg_file in cfg_files:
-        if os.path.exists(cfg_file):
-            flow_config_utils.read_config(cfg_file)
+    def read_configs():
+        for cfg_file in cfg_files:
+            if os.path.exists(cfg_file):
+                flow_config_utils.read_config(cfg_file)
 
+    cfg_files = get_pdflow_config_files(flow, tool)
+    read_with_config_cache('configs', cfg_files, flow_config_utils, read_configs)
 
-def read_pdflow_vars_specs(flow: str):
+
+def get_pdflow_vars_spec_files(flow: str) -> List[str]:
     '''
-    read all vars_spec.py files related to the specified flow in pdflow. the following vars_spec.py files are read. read vars_spec are stored in FLOW_VARS
-    - $CE_DIR/pdflow/common/vars_spec.py (lowest priority)
-    - $CE_DIR/pdflow/<flow>/vars_spec.py
-    - $CE_OVDIR/vars_spec.py if ovdir is given (highest priority)
+    get the list of vars_spec.py files read by read_pdflow_vars_specs (in the order of priority, including the files which do not exist)
 
     :param flow: flow to read vars_spec.py
-    :return: None
+    :return: list of vars_spec.py files
     '''
     from flow_env_utils import flow_envs as FLOW_ENVS
-    import flow_var_utils
 
     ce_dir = os.path.join(FLOW_ENVS['CE_DIR'])
     vars_spec_files = [
@@ -272,27 +552,16 @@ def read_pdflow_vars_specs(flow: str):
     ]
     if 'CE_OVDIR' in FLOW_ENVS:
         if os.path.exists(os.path.join(FLOW_ENVS['CE_OVDIR'], 'vars_spec.py')):
-            import flow_log_utils
-            logger = flow_log_utils.start_logging()
-            logger.warning('vars_spec.py in ovdir %s detected. reading...' % (os.path.abspath(FLOW_ENVS['CE_OVDIR'])))
             vars_spec_files.append(os.path.join(FLOW_ENVS['CE_OVDIR'], 'vars_spec.py'))
-
-    for vars_spec_file in vars_spec_files:
-        if os.path.exists(vars_spec_file):
-            flow_var_utils.read_vars_spec(vars_spec_file)
+    return vars_spec_files
 
 
-def read_pdflow_vars_setups(flow: str):
+def read_pdflow_vars_specs(flow: str):
     '''
-    read all vars_setup.py files related to the specified flow in pdflow. the following vars_setup.py files are read. read vars_setup are stored in FLOW_VARS
-    - $WA_DIR/scripts/pdflow/<design_name>/common/vars_setup.py (lowest priority)
-    - $WA_DIR/scripts/pdflow/<design_name>/common/<flow>/vars_setup.py
-    - $WA_DIR/scripts/pdflow/<design_name>/<process>/<version>/vars_setup.py
-    - $WA_DIR/scripts/pdflow/<design_name>/<process>/<version>/<flow>/vars_setup.py
-    - $WA_DIR/scripts/pdflow/<design_name>/<block_name>/common/vars_setup.py
-    - $WA_DIR/scripts/pdflow/<design_name>/<block_name>/common/<flow>/vars_setup.py
-    - $WA_DIR/scripts/pdflow/<design_name>/<block_name>/<process>/<version>/vars_setup.py
-    - $WA_DIR/scripts/pdflow/<design_name>/<block_name>/<process>/<version>/<flow>/vars_setup.py (highest priority)
+    read all vars_spec.py files related to the specified flow in pdflow. the following vars_spec.py files are read. read vars_spec are stored in FLOW_VARS
+    - $CE_DIR/pdflow/common/vars_spec.py (lowest priority)
+    - $CE_DIR/pdflow/<flow>/vars_spec.py
+    - $CE_OVDIR/vars_spec.py if ovdir is given (highest priority)
 
     :param flow: flow to read vars_spec.py
     :return: None
@@ -300,8 +569,31 @@ def read_pdflow_vars_setups(flow: str):
     from flow_env_utils import flow_envs as FLOW_ENVS
     import flow_var_utils
 
+    vars_spec_files = get_pdflow_vars_spec_files(flow)
+    if 'CE_OVDIR' in FLOW_ENVS and os.path.join(FLOW_ENVS['CE_OVDIR'], 'vars_spec.py') in vars_spec_files:
+        import flow_log_utils
+        logger = flow_log_utils.start_logging()
+        logger.warning('vars_spec.py in ovdir %s detected. reading...' % (os.path.abspath(FLOW_ENVS['CE_OVDIR'])))
+
+    def read_vars_specs():
+        for vars_spec_file in vars_spec_files:
+            if os.path.exists(vars_spec_file):
+                flow_var_utils.read_vars_spec(vars_spec_file)
+
+    read_with_config_cache('vars_specs', vars_spec_files, flow_var_utils, read_vars_specs)
+
+
+def get_pdflow_vars_setup_files(flow: str) -> List[str]:
+    '''
+    get the list of vars_setup.py files read by read_pdflow_vars_setups (in the order of priority, including the files which do not exist)
+
+    :param flow: flow to read vars_setup.py
+    :return: list of vars_setup.py files
+    '''
+    from flow_env_utils import flow_envs as FLOW_ENVS
+
     proj_script_dir = os.path.join(FLOW_ENVS['WORK_AREA'], 'scripts', FLOW_ENVS['PROJECT'])
-    vars_setup_files = [
+    return [
         os.path.join(proj_script_dir, 'pdflow', FLOW_ENVS['DESIGN'], 'common', 'vars_setup.py'),
         os.path.join(proj_script_dir, 'pdflow', FLOW_ENVS['DESIGN'], 'common', flow, 'vars_setup.py'),
         os.path.join(proj_script_dir, 'pdflow', FLOW_ENVS['DESIGN'], FLOW_ENVS['TECH'], 'vars_setup.py'),
@@ -312,9 +604,32 @@ def read_pdflow_vars_setups(flow: str):
         os.path.join(proj_script_dir, 'pdflow', FLOW_ENVS['DESIGN'], FLOW_ENVS['BLOCK'], FLOW_ENVS['TECH'], flow, 'vars_setup.py'),
     ]
 
-    for vars_setup_file in vars_setup_files:
-        if os.path.exists(vars_setup_file):
-            flow_var_utils.read_vars_setup(vars_setup_file)
+
+def read_pdflow_vars_setups(flow: str):
+    '''
+    read all vars_setup.py files related to the specified flow in pdflow. the following vars_setup.py files are read. read vars_setup are stored in FLOW_VARS
+    - $WA_DIR/scripts/pdflow/<design_name>/common/vars_setup.py (lowest priority)
+    - $WA_DIR/scripts/pdflow/<design_name>/common/<flow>/vars_setup.py
+    - $WA_DIR/scripts/pdflow/<design_name>/<process>/<version>/vars_setup.py
+    - $WA_DIR/scripts/pdflow/<design_name>/<process>/<version>/<flow>/vars_setup.py
+    - $WA_DIR/scripts/pdflow/<design_name>/<block_name>/common/vars_setup.py
+    - $WA_DIR/scripts/pdflow/<design_name>/<block_name>/common/<flow>/vars_setup.py
+    - $WA_DIR/scripts/pdflow/<design_name>/<block_name>/<process>/<version>/vars_setup.py
+    - $WA_DIR/scripts/pdflow/<design_name>/<block_name>/<process>/<version>/<flow>/vars_setup.py (highest priority)
+
+    :param flow: flow to read vars_spec.py
+    :return: None
+    '''
+    import flow_var_utils
+
+    def read_vars_setups():
+        for vars_setup_file in vars_setup_files:
+            if os.path.exists(vars_setup_file):
+                flow_var_utils.read_vars_setup(vars_setup_file)
+
+    # vars_setup.py files are not cached (see read_with_config_cache), since they can read anything (e.g., environment variables, other files)
+    vars_setup_files = get_pdflow_vars_setup_files(flow)
+    read_vars_setups()
 
     for set_var_str in flow_var_utils.set_vars_from_cli:
         flow_var_utils.set_var_from_str(set_var_str)
@@ -375,48 +690,132 @@ def get_3d_layer_conf_name() -> str:
     return 'm' + str(FLOW_VARS['PNR_3D_NUM_ROUTE_LAYERS'][0]) + 'b' + 'm' + str(FLOW_VARS['PNR_3D_NUM_ROUTE_LAYERS'][1]) + 't'
 
 
+scan_cache_dir = os.path.join(os.getenv('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')), 'pdflow')
+'''
+directory of the scan caches of list_tech and list_design (tech and design directories can be read-only)
+'''
+
+
+def scan_tech_versions(tech_version_dir: str) -> Tuple[List[List[Union[str, None]]], List[str]]:
+    '''
+    get available versions of a tech (the versions having configs directory)
+
+    :param tech_version_dir: directory of a tech (e.g., $TECH_DIR/NANGATE45)
+    :return: [version, '*' if it is the latest version else None] of each version, and the directories read
+    '''
+    tech_version_list = []
+    already_write = []
+    read_dirs = [tech_version_dir]
+    for each_version in os.listdir(tech_version_dir):
+        read_dirs.append(os.path.join(tech_version_dir, each_version))
+        if os.path.exists(os.path.join(tech_version_dir, each_version, 'configs')):
+            temp = []
+            if each_version == 'latest':
+                real_path = os.path.realpath(os.path.join(tech_version_dir, each_version))
+                real_version = re.match(r'.*/([a-zA-Z_0-9]+)$', real_path)
+                if real_version.group(1) in already_write:
+                    tech_version_list.remove([real_version.group(1), None])
+                temp.append(real_version.group(1))
+                temp.append('*')
+                tech_version_list.append(temp)
+                already_write.append(real_version.group(1))
+
+            elif each_version not in already_write:
+                temp.append(each_version)
+                temp.append(None)
+                tech_version_list.append(temp)
+                already_write.append(each_version)
+    return tech_version_list, read_dirs
+
+
+def scan_design_configs(design_available_dir: str) -> Tuple[List[str], List[str]]:
+    '''
+    get the configs directory of a design
+
+    :param design_available_dir: directory of a design (e.g., $DESIGN_DIR/aes_128)
+    :return: configs directory (empty if it does not exist), and the directories read
+    '''
+    design_available_list = []
+    if os.path.exists(os.path.join(design_available_dir, 'configs')):
+        design_available_list.append(os.path.join(design_available_dir, 'configs'))
+    return design_available_list, [design_available_dir]
+
+
+def scan_dir_with_cache(kind: str, root_dir: str, scan_func: Callable[[str], Tuple[Any, List[str]]], max_workers: int = 16, use_cache: bool = True) -> Dict[str, Any]:
+    '''
+    scan the sub-directories (other than hidden ones) of root_dir with scan_func in parallel.
+    the results are cached in scan_cache_dir with the mtimes of the directories read by scan_func,
+    and only the sub-directories whose directories are changed are scanned again
+
+    :param kind: kind of the scan (e.g., tech)
+    :param root_dir: directory to scan (e.g., $TECH_DIR)
+    :param scan_func: function to scan a sub-directory. returns its result and the directories it read
+    :param max_workers: number of sub-directories scanned in parallel
+    :param use_cache: read and write the scan cache
+    :return: sub-directory: result of scan_func
+    '''
+    import concurrent.futures
+    import hashlib
+    import json
+    import tempfile
+
+    def get_mtime(path: str) -> Union[int, None]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def scan_entry(entry: str) -> Dict[str, Any]:
+        cached = cache['entries'].get(entry)
+        if cached is not None and all(get_mtime(path) == mtime for path, mtime in cached['mtimes'].items()):
+            return cached
+        result, read_dirs = scan_func(os.path.join(root_dir, entry))
+        return {'result': result, 'mtimes': {path: get_mtime(path) for path in read_dirs}}
+
+    root_dir = os.path.abspath(root_dir)
+    cache_file = os.path.join(scan_cache_dir, 'scan.%s.%s.json' % (kind, hashlib.sha1(root_dir.encode()).hexdigest()))
+    cache = {'root_mtime': None, 'names': [], 'entries': {}}
+    if use_cache and os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r') as ifp:
+                cache = json.load(ifp)
+        except (OSError, ValueError):
+            pass
+
+    root_mtime = get_mtime(root_dir)
+    if root_mtime is not None and root_mtime == cache['root_mtime']:
+        names = cache['names']
+    else:
+        names = [entry.name for entry in os.scandir(root_dir) if not entry.is_file() and not entry.name.startswith('.')]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        entries = dict(zip(names, executor.map(scan_entry, names)))
+
+    if use_cache and (root_mtime != cache['root_mtime'] or any(entries[name] is not cache['entries'].get(name) for name in names)):
+        try:
+            os.makedirs(scan_cache_dir, exist_ok=True)
+            fd, temp_file = tempfile.mkstemp(dir=scan_cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as ofp:
+                json.dump({'root_mtime': root_mtime, 'names': names, 'entries': entries}, ofp)
+            os.replace(temp_file, cache_file)
+        except OSError:
+            pass
+
+    return {name: entry['result'] for name, entry in entries.items()}
+
+
 def list_available_tech():
     '''
     print available technology nodes in pdflow
     '''
     option_header = ['TECH', 'VERSION', 'LATEST']
-    import re
     import flow_log_utils
     import flow_args_utils
 
     logger = flow_log_utils.start_logging()
 
     tech_dir = os.environ['TECH_DIR']
-    tech_list = []
-    hidden_dir = re.compile('^\\.')
-    for entry in os.listdir(tech_dir):
-        if os.path.isfile(os.path.join(tech_dir, entry)) or re.match(hidden_dir, entry) is not None:  # if it is file or dir which is started with '.', ignore it
-            continue
-        else:
-            tech_list.append(entry)
     tech_version_dict = {}
-    for each_tech in tech_list:
-        tech_version_dir = os.path.join(tech_dir, each_tech)
-        tech_version_list = []
-        already_write = []
-        for each_version in os.listdir(tech_version_dir):
-            if os.path.exists(os.path.join(tech_version_dir, each_version, 'configs')):
-                temp = []
-                if each_version == 'latest':
-                    real_path = os.path.realpath(os.path.join(tech_version_dir, each_version))
-                    real_version = re.match(r'.*/([a-zA-Z_0-9]+)$', real_path)
-                    if real_version.group(1) in already_write:
-                        tech_version_list.remove([real_version.group(1), None])
-                    temp.append(real_version.group(1))
-                    temp.append('*')
-                    tech_version_list.append(temp)
-                    already_write.append(real_version.group(1))
-
-                elif each_version not in already_write:
-                    temp.append(each_version)
-                    temp.append(None)
-                    tech_version_list.append(temp)
-                    already_write.append(each_version)
+    for each_tech, tech_version_list in scan_dir_with_cache('tech', tech_dir, scan_tech_versions).items():
         if len(tech_version_list) > 0:
             tech_version_dict[each_tech] = tech_version_list
 
@@ -427,7 +826,6 @@ def list_available_design():
     '''
     print available designs in pdflow
     '''
-    import re
     import flow_log_utils
     import flow_args_utils
 
@@ -435,20 +833,8 @@ def list_available_design():
 
     design_dir = os.environ['DESIGN_DIR']
     option_header = ['DESIGN', 'PATH']
-    designlist = []
-    designs = os.listdir(design_dir)
-    erase = re.compile('^\\.')
-    for design in designs:
-        if os.path.isfile(os.path.join(design_dir, design)) or re.match(erase, design) is not None:
-            continue
-        else:
-            designlist.append(design)
     design_dict = {}
-    for avail_design in designlist:
-        design_available_dir = os.path.join(design_dir, avail_design)
-        design_available_list = []
-        if os.path.exists(os.path.join(design_available_dir, 'configs')):
-            design_available_list.append(os.path.join(design_available_dir, 'configs'))
+    for avail_design, design_available_list in scan_dir_with_cache('design', design_dir, scan_design_configs).items():
         if len(design_available_list) > 0:
             design_dict[avail_design] = design_available_list
 
@@ -738,25 +1124,297 @@ def read_file_list(file_list_file: str) -> List[str]:
     return file_list
 
 
-def check_file_list(file_list: List[str], logger: logging.Logger) -> int:
+clone_wa_copy_patterns = ['scripts/*', '*/scripts/*', '*.tcl', '*.config', '*.sdc', '*.py', '*.sh', '*.csh', '*.cmd', '*.db']
+'''
+files (fnmatch patterns of relative paths in a workarea) which users are likely to edit or tools write in place. clone_wa -link always deep-copies them
+'''
+
+
+def link_file(src: str, dest: str, allow_hardlink: bool = True) -> str:
+    '''
+    place src at dest without copying its data if possible.
+    a reflink (copy-on-write clone) is used if the filesystem supports it. otherwise, a hard link is used (if allow_hardlink) or the file is copied
+
+    :param src: source file
+    :param dest: destination file (replaced if it exists)
+    :param allow_hardlink: whether dest can share its data with src
+    :return: method used to place the file ('reflink', 'hardlink', or 'copy')
+    '''
+    import shutil
+
+    if os.path.lexists(dest):
+        os.remove(dest)
+    try:
+        import fcntl
+
+        # FICLONE ioctl in linux/fs.h
+        with open(src, 'rb') as src_fp, open(dest, 'wb') as dest_fp:
+            fcntl.ioctl(dest_fp.fileno(), 0x40049409, src_fp.fileno())
+        shutil.copystat(src, dest)
+        return 'reflink'
+    except (ImportError, OSError):
+        if os.path.lexists(dest):
+            os.remove(dest)
+    if allow_hardlink:
+        try:
+            os.link(src, dest)
+            return 'hardlink'
+        except OSError:
+            pass
+    shutil.copy2(src, dest)
+    return 'copy'
+
+
+def clone_dir(src_dir: str, dest_dir: str, src_wa_dir: str, link: bool, stats: Dict[str, int], lock: 'threading.Lock'):
     '''
-    check whether all the files in the list of filenames exist or not
+    clone a directory of a workarea file by file (used by clone_wa). symbolic links are kept as symbolic links.
+    files are never hard-linked, as tools write some files in place (e.g., logs appended by a rerun) and the source workarea would be modified
+
+    :param src_dir: directory to clone
+    :param dest_dir: cloned directory
+    :param src_wa_dir: workarea of src_dir (to match clone_wa_copy_patterns)
+    :param link: reflink the files not matching clone_wa_copy_patterns if the filesystem supports reflinks (otherwise, they are copied)
+    :param stats: files, bytes, and bytes of each method (copy, reflink). updated as files are cloned
+    :param lock: lock for stats
+    '''
+    import fnmatch
+    import shutil
+
+    for root, dirs, files in os.walk(src_dir):
+        dest_root = os.path.join(dest_dir, os.path.relpath(root, src_dir))
+        os.makedirs(dest_root, exist_ok=True)
+        for name in dirs[:]:
+            if os.path.islink(os.path.join(root, name)):
+                dirs.remove(name)
+                files.append(name)
+        for name in files:
+            src = os.path.join(root, name)
+            dest = os.path.join(dest_root, name)
+            if os.path.islink(src):
+                os.symlink(os.readlink(src), dest)
+                continue
+            rel_path = os.path.relpath(src, src_wa_dir)
+            if link and not any(fnmatch.fnmatch(rel_path, pattern) for pattern in clone_wa_copy_patterns):
+                method = link_file(src, dest, allow_hardlink=False)
+            else:
+                shutil.copy2(src, dest)
+                method = 'copy'
+            size = os.path.getsize(src)
+            with lock:
+                stats['files'] += 1
+                stats['bytes'] += size
+                stats[method] += size
+
+
+handoff_store_name = '.store'
+'''
+name of the content-addressed store in the handoff directory of the project.
+- objects/<sha256[:2]>/<sha256>: read-only file contents shared by all the releases
+- manifests/<handoff_id>/<design>.<block>.json: files (relative path: sha256, size, mode) and symbolic links of a release
+'''
+
+
+def hash_file(path: str) -> str:
+    '''
+    get sha256 of a file
+
+    :param path: file
+    :return: sha256 in hex
+    '''
+    import hashlib
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as ifp:
+        for chunk in iter(lambda: ifp.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def add_to_handoff_store(store_dir: str, src_dirs: Dict[str, str], hash_cache_file: str, logger: logging.Logger, max_workers: int = 8) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    '''
+    add the files of src_dirs to the handoff store. the files already in the store (same sha256) are not copied again.
+    sha256 of each file is cached in hash_cache_file with its size and mtime, so unchanged files are not hashed again.
+    symbolic links are kept as relative links if they point inside src_dirs, so that a release does not refer to the workarea.
+    symbolic links to files outside src_dirs are handed off as files, and the other ones (directories outside src_dirs, broken links) are not handed off
+
+    :param store_dir: handoff store (see handoff_store_name)
+    :param src_dirs: relative path in the release: directory to add
+    :param hash_cache_file: cache of sha256 of files
+    :param logger: logger used to log
+    :param max_workers: number of files hashed and added in parallel
+    :return: files and symlinks of the manifest, and statistics (files, bytes, new_files, new_bytes)
+    '''
+    import concurrent.futures
+    import json
+    import tempfile
+
+    hash_cache = {}
+    if os.path.exists(hash_cache_file):
+        try:
+            with open(hash_cache_file, 'r') as ifp:
+                hash_cache = json.load(ifp)
+        except (OSError, ValueError):
+            pass
+
+    def get_release_path(path: str) -> Union[str, None]:
+        real_path = os.path.realpath(path)
+        for rel_dir, real_src_dir in real_src_dirs.items():
+            if real_path == real_src_dir or real_path.startswith(real_src_dir + os.sep):
+                return os.path.normpath(os.path.join(rel_dir, os.path.relpath(real_path, real_src_dir)))
+        return None
+
+    real_src_dirs = {rel_dir: os.path.realpath(src_dir) for rel_dir, src_dir in src_dirs.items()}
+    files = {}
+    symlinks = {}
+    for rel_dir, src_dir in src_dirs.items():
+        for root, dirs, file_names in os.walk(src_dir):
+            for name in dirs[:]:
+                if os.path.islink(os.path.join(root, name)):
+                    dirs.remove(name)
+                    file_names.append(name)
+            for name in file_names:
+                path = os.path.join(root, name)
+                rel_path = os.path.normpath(os.path.join(rel_dir, os.path.relpath(path, src_dir)))
+                if not os.path.islink(path):
+                    files[rel_path] = path
+                    continue
+                target_rel_path = get_release_path(path)
+                if target_rel_path is not None and os.path.exists(path):
+                    symlinks[rel_path] = os.path.relpath(target_rel_path, os.path.dirname(rel_path))
+                elif os.path.isfile(path):
+                    logger.warning('symbolic link %s points outside the handoff (%s). the file is handed off instead of the link' % (path, os.readlink(path)))
+                    files[rel_path] = path
+                else:
+                    logger.warning('symbolic link %s points to a directory outside the handoff or does not exist (%s). it is not handed off' % (path, os.readlink(path)))
+
+    def add_file(rel_path: str) -> Tuple[str, Dict[str, Any], bool]:
+        path = files[rel_path]
+        st = os.stat(path)
+        cached = hash_cache.get(path)
+        if cached is not None and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            sha = cached[2]
+        else:
+            sha = hash_file(path)
+        object_file = os.path.join(store_dir, 'objects', sha[:2], sha)
+        is_new = not os.path.exists(object_file)
+        if is_new:
+            # the object is created under a temporary name not to expose a partial file to the other handoffs
+            os.makedirs(os.path.dirname(object_file), exist_ok=True)
+            fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(object_file), suffix='.tmp')
+            os.close(fd)
+            link_file(path, temp_file, allow_hardlink=False)
+            os.chmod(temp_file, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(temp_file, object_file)
+        return rel_path, {'sha256': sha, 'size': st.st_size, 'mode': stat.S_IMODE(st.st_mode), 'mtime_ns': st.st_mtime_ns}, is_new
+
+    stats = {'files': 0, 'bytes': 0, 'new_files': 0, 'new_bytes': 0}
+    manifest_files = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        for rel_path, entry, is_new in executor.map(add_file, sorted(files)):
+            hash_cache[files[rel_path]] = [entry['size'], entry.pop('mtime_ns'), entry['sha256']]
+            manifest_files[rel_path] = entry
+            stats['files'] += 1
+            stats['bytes'] += entry['size']
+            if is_new:
+                stats['new_files'] += 1
+                stats['new_bytes'] += entry['size']
+
+    try:
+        os.makedirs(os.path.dirname(hash_cache_file), exist_ok=True)
+        fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(hash_cache_file), suffix='.tmp')
+        with os.fdopen(fd, 'w') as ofp:
+            json.dump(hash_cache, ofp)
+        os.replace(temp_file, hash_cache_file)
+    except OSError:
+        pass
+
+    return {'files': manifest_files, 'symlinks': symlinks}, stats
+
+
+def build_handoff_release(store_dir: str, manifest: Dict[str, Any], release_dir: str) -> int:
+    '''
+    build (or repair) a release directory from its manifest. files are linked to the read-only objects of the handoff store,
+    and the files already linked to their objects are skipped
+
+    :param store_dir: handoff store (see handoff_store_name)
+    :param manifest: manifest of the release
+    :param release_dir: release directory to build
+    :return: number of missing objects in the store
+    '''
+    num_missing = 0
+    for rel_path, entry in manifest['files'].items():
+        object_file = os.path.join(store_dir, 'objects', entry['sha256'][:2], entry['sha256'])
+        dest = os.path.join(release_dir, rel_path)
+        if not os.path.exists(object_file):
+            num_missing += 1
+            continue
+        if os.path.isfile(dest) and not os.path.islink(dest) and os.path.samefile(object_file, dest):
+            continue
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        link_file(object_file, dest)
+    for rel_path, target in manifest['symlinks'].items():
+        dest = os.path.join(release_dir, rel_path)
+        if os.path.islink(dest) and os.readlink(dest) == target:
+            continue
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        if os.path.lexists(dest):
+            os.remove(dest)
+        os.symlink(target, dest)
+    return num_missing
+
+
+file_stat_cache = {}
+'''
+path: (time when the path is checked, realpath of the path, whether the realpath exists). used by check_file_list
+'''
+file_stat_cache_ttl = 10.0
+'''
+seconds for which an entry of file_stat_cache is valid
+'''
+
+
+def check_file_list(file_list: List[str], logger: logging.Logger, max_workers: int = 16) -> int:
+    '''
+    check whether all the files in the list of filenames exist or not.
+    paths are resolved and checked in parallel (stats are slow on NFS), and the results are cached for file_stat_cache_ttl seconds.
+    missing files are always checked again as they can be created by the flow in the meantime
 
     :param file_list: list of filenames to check
     :param logger: logger used to log
+    :param max_workers: maximum number of threads to check files
     :return: 0 if all the files exist. Otherwise 1.
     '''
-    ret = 0
-    realpath_file_list = [os.path.realpath(os.path.expanduser(file)) for file in file_list]
-    realpath_file_list = list(set(realpath_file_list))
-    realpath_file_list.sort()
-    for file in realpath_file_list:
-        if not os.path.exists(file):
-            logger.error('file missing: %s' % (file))
-            ret = 1
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    def stat_file(file: str) -> Tuple[str, bool]:
+        entry = file_stat_cache.get(file)
+        if entry is not None and entry[2] and time.time() - entry[0] < file_stat_cache_ttl:
+            return entry[1], entry[2]
+        realpath = os.path.realpath(os.path.expanduser(file))
+        exists = os.path.exists(realpath)
+        file_stat_cache[file] = (time.time(), realpath, exists)
+        return realpath, exists
+
+    unique_file_list = list(dict.fromkeys(file_list))
+    if len(unique_file_list) > 1 and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_file_list))) as pool:
+            stats = list(pool.map(stat_file, unique_file_list))
+    else:
+        stats = [stat_file(file) for file in unique_file_list]
+
+    missing_file_list = []
+    for file, exists in sorted(set(stats)):
+        if not exists:
+            missing_file_list.append(file)
         else:
             logger.info('file exists : %s' % (file))
-    return ret
+    for file in missing_file_list:
+        logger.error('file missing: %s' % (file))
+    if len(missing_file_list) > 0:
+        logger.error('%d of %d files are missing' % (len(missing_file_list), len(set(stats))))
+        return 1
+    return 0
 
 
 def dump_flow_envs_cfgs_vars(dir: str):
@@ -786,6 +1444,192 @@ def dump_flow_envs_cfgs_vars(dir: str):
     ofp.close()
 
 
+telemetry_records = []
+'''
+resource usage of the steps performed by the current pdflow command (see start_telemetry). written by write_telemetry
+'''
+telemetry_summary_runs = 10
+'''
+number of runs of each step kept in the telemetry summary of a workarea
+'''
+
+
+def get_rusage_mb(maxrss: int) -> float:
+    '''
+    convert ru_maxrss into megabytes (kilobytes in linux, bytes in macos)
+
+    :param maxrss: ru_maxrss of resource.getrusage
+    :return: megabytes
+    '''
+    if sys.platform == 'darwin':
+        return maxrss / 1024 / 1024
+    return maxrss / 1024
+
+
+def start_telemetry(flow: str, stage: str, step: str) -> Dict[str, Any]:
+    '''
+    start measuring the resource usage of a step (e.g., setup, run, postproc of a stage).
+    the returned record is stopped by stop_telemetry, and all the records are written by write_telemetry at the end of the command
+
+    :param flow: flow (e.g., pnr)
+    :param stage: stage (e.g., place)
+    :param step: step in the stage
+    :return: telemetry record
+    '''
+    import resource
+    import time
+
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    record = {
+        'flow': flow,
+        'stage': stage,
+        'step': step,
+        'start_time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'wall_sec': None,
+        'cpu_sec': None,
+        'child_cpu_sec': None,
+        'peak_rss_mb': None,
+        'child_peak_rss_mb': None,
+        'tools': [],
+        '_start': (time.time(), self_usage.ru_utime + self_usage.ru_stime, child_usage.ru_utime + child_usage.ru_stime, child_usage.ru_maxrss),
+    }
+    telemetry_records.append(record)
+    return record
+
+
+def stop_telemetry(record: Dict[str, Any]):
+    '''
+    stop measuring the resource usage of a step.
+    peak_rss_mb is the peak RSS of the pdflow process so far, and child_peak_rss_mb is the peak RSS of the largest child process finished in the step (None if it is not larger than the ones finished before the step).
+    peak RSS of each tool run by pdflow_pnr.run_concurrent_jobs is recorded in 'tools'
+
+    :param record: telemetry record from start_telemetry
+    '''
+    import resource
+    import time
+
+    if '_start' not in record:
+        return
+    start_wall, start_cpu, start_child_cpu, start_child_maxrss = record.pop('_start')
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    record['wall_sec'] = round(time.time() - start_wall, 3)
+    record['cpu_sec'] = round(self_usage.ru_utime + self_usage.ru_stime - start_cpu, 3)
+    record['child_cpu_sec'] = round(child_usage.ru_utime + child_usage.ru_stime - start_child_cpu, 3)
+    record['peak_rss_mb'] = round(get_rusage_mb(self_usage.ru_maxrss), 1)
+    if child_usage.ru_maxrss > start_child_maxrss:
+        record['child_peak_rss_mb'] = round(get_rusage_mb(child_usage.ru_maxrss), 1)
+
+
+def write_telemetry(logger: logging.Logger):
+    '''
+    write the telemetry records of the current command into <workarea>/<flow>/telemetry/<stage>.json,
+    and add them to the summary of the workarea (<workarea>/telemetry.json) which keeps the last telemetry_summary_runs runs of each step.
+    steps slower than their previous runs are reported
+
+    :param logger: logger used to log
+    '''
+    import json
+    import tempfile
+
+    from flow_env_utils import flow_envs as FLOW_ENVS
+
+    def write_json(obj, json_file: str):
+        os.makedirs(os.path.dirname(json_file), exist_ok=True)
+        fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(json_file), suffix='.tmp')
+        with os.fdopen(fd, 'w') as ofp:
+            json.dump(obj, ofp, indent=2)
+        os.replace(temp_file, json_file)
+
+    if len(telemetry_records) == 0:
+        return
+    # steps interrupted by errors are stopped here
+    for record in telemetry_records:
+        stop_telemetry(record)
+
+    stage_records = {}
+    for record in telemetry_records:
+        stage_records.setdefault((record['flow'], record['stage']), []).append(record)
+    for (flow, stage), records in stage_records.items():
+        write_json(records, os.path.join(FLOW_ENVS['WORK_AREA'], flow, 'telemetry', '%s.json' % stage))
+
+    summary_file = os.path.join(FLOW_ENVS['WORK_AREA'], 'telemetry.json')
+    summary = {}
+    if os.path.exists(summary_file):
+        try:
+            with open(summary_file, 'r') as ifp:
+                summary = json.load(ifp)
+        except ValueError:
+            logger.warning('broken telemetry summary. start a new one: %s' % summary_file)
+    for record in telemetry_records:
+        key = '%s:%s:%s' % (record['flow'], record['stage'], record['step'])
+        runs = summary.setdefault(key, [])
+        run = {name: value for name, value in record.items() if name not in ['flow', 'stage', 'step', 'tools']}
+        run['tool_peak_rss_mb'] = max([tool['peak_rss_mb'] for tool in record['tools']], default=None)
+        if len(runs) > 0 and runs[-1]['wall_sec'] is not None and runs[-1]['wall_sec'] >= 1 and run['wall_sec'] > runs[-1]['wall_sec'] * 1.2:
+            logger.info('%s took %.1f sec (%.1f sec in the previous run)' % (key, run['wall_sec'], runs[-1]['wall_sec']))
+        runs.append(run)
+        del runs[:-telemetry_summary_runs]
+    write_json(summary, summary_file)
+    logger.info('telemetry is written in %s' % summary_file)
+
+
+metrics_db_version = 1
+'''
+version of the schema of the metrics database. the database is recreated if its version is different
+'''
+
+
+def open_metrics_db(wa_dir: str) -> 'sqlite3.Connection':
+    '''
+    open the metrics database of a workarea (<workarea>/metrics.db). it is created if it does not exist.
+    - runs: a row for each postproc of a stage (id, flow, stage, tool, time)
+    - metrics: a row for each metric of a run (run_id, name, value)
+
+    :param wa_dir: workarea directory
+    :return: connection to the database
+    '''
+    import sqlite3
+
+    db_file = os.path.join(wa_dir, 'metrics.db')
+    conn = sqlite3.connect(db_file, timeout=60)
+    if conn.execute('PRAGMA user_version').fetchone()[0] != metrics_db_version:
+        conn.executescript('''
+            DROP TABLE IF EXISTS metrics;
+            DROP TABLE IF EXISTS runs;
+            CREATE TABLE runs (id INTEGER PRIMARY KEY AUTOINCREMENT, flow TEXT NOT NULL, stage TEXT NOT NULL, tool TEXT, time TEXT NOT NULL);
+            CREATE INDEX runs_flow_stage ON runs (flow, stage, id);
+            CREATE TABLE metrics (run_id INTEGER NOT NULL REFERENCES runs (id), name TEXT NOT NULL, value REAL, PRIMARY KEY (run_id, name));
+            PRAGMA user_version = %d;
+        ''' % metrics_db_version)
+    return conn
+
+
+def write_metrics(flow: str, stage: str, tool: str, metrics: Dict[str, float], logger: logging.Logger):
+    '''
+    store the metrics of a stage (e.g., extracted from reports in postproc) as a new run in the metrics database of the current workarea
+
+    :param flow: flow (e.g., pnr)
+    :param stage: stage (e.g., route)
+    :param tool: tool used in the stage
+    :param metrics: name: value of metrics
+    :param logger: logger used to log
+    '''
+    import time
+
+    from flow_env_utils import flow_envs as FLOW_ENVS
+
+    conn = open_metrics_db(FLOW_ENVS['WORK_AREA'])
+    with conn:
+        run_id = conn.execute('INSERT INTO runs (flow, stage, tool, time) VALUES (?, ?, ?, ?)', (flow, stage, tool, time.strftime('%Y-%m-%d %H:%M:%S'))).lastrowid
+        conn.executemany('INSERT INTO metrics (run_id, name, value) VALUES (?, ?, ?)', [(run_id, name, value) for name, value in sorted(metrics.items())])
+    conn.close()
+    for name, value in sorted(metrics.items()):
+        logger.info('metric %-24s: %s' % (name, value))
+    logger.info('%d metrics of %s %s are stored (run %d)' % (len(metrics), flow, stage, run_id))
+
+
 ############################################################
 # PDFLOW COMMAND FUNCTIONS
 ############################################################
@@ -803,6 +1647,7 @@ def add_block(tech_name: str, design: str, block: str, flat: bool) -> int:
     from flow_config_utils import flow_cfgs as FLOW_CFGS
     import flow_log_utils
     import flow_file_utils
+    import project
 
     # check whether the command is submitted in the right directory
     cur_dir = os.getcwd()
@@ -949,7 +1794,7 @@ def create_wa(wa_name: str, handoff_id: str, impl_type: str, impl_method: str) -
     return 0
 
 
-def clone_wa(src: str, dest: str, stages: str, flows: List[str], aslink: bool) -> int:
+def clone_wa(src: str, dest: str, stages: str, flows: List[str], aslink: bool, link: bool = False, num_workers: int = 8) -> int:
     '''
     clone a workarea with the same project environment. this command should be performed in block directory (\'impl\' directory of a project environment)
 
@@ -958,8 +1803,15 @@ def clone_wa(src: str, dest: str, stages: str, flows: List[str], aslink: bool) -
     :param stages: specify the stages to be cloned. you can specify multiple stages. if not specified, it will clone every stages
     :param flows: specify the flows to be cloned. you can specify multiple flows. if not specified, it will clone every flows
     :param aslink: all the cloned files are created as symbolic links
+    :param link: the cloned files share their data with the source workarea by reflinks (copied if reflinks are not supported).
+                 the files matching clone_wa_copy_patterns are always copied. otherwise, all the files are copied
+    :param num_workers: number of directories cloned in parallel
     :return: 0 if this function ends successfully
     '''
+    import concurrent.futures
+    import threading
+    import time
+
     import flow_config_utils
     from flow_config_utils import flow_cfgs as FLOW_CFGS
     import flow_log_utils
@@ -1025,13 +1877,14 @@ def clone_wa(src: str, dest: str, stages: str, flows: List[str], aslink: bool) -
     wa_copy_default_dirs = ['library', 'scripts', 'fe', 'interface']
     wa_link_default_dirs = ['logs', 'history']
     wa_link_flow_dirs = flows
+    clone_dirs = []
     for wa_sub_dir in wa_copy_default_dirs:
-        flow_file_utils.copy_path(os.path.join(src, wa_sub_dir), os.path.join(wa_dir, wa_sub_dir))
+        clone_dirs.append(wa_sub_dir)
     for wa_sub_dir in wa_link_default_dirs:
         if aslink:
             flow_file_utils.make_symlink(os.path.join(src, wa_sub_dir), os.path.join(wa_dir, wa_sub_dir), preserve_dirs=True)
         else:
-            flow_file_utils.copy_path(os.path.join(src, wa_sub_dir), os.path.join(wa_dir, wa_sub_dir))
+            clone_dirs.append(wa_sub_dir)
     for wa_sub_dir in supported_flows:
         flow_file_utils.make_dir(os.path.join(wa_dir, wa_sub_dir))
         if wa_sub_dir in wa_link_flow_dirs:
@@ -1039,7 +1892,36 @@ def clone_wa(src: str, dest: str, stages: str, flows: List[str], aslink: bool) -
                 if aslink:
                     flow_file_utils.make_symlink(os.path.join(src, wa_sub_dir, stage), os.path.join(wa_dir, wa_sub_dir, stage), preserve_dirs=True)
                 else:
-                    flow_file_utils.copy_path(os.path.join(src, wa_sub_dir, stage), os.path.join(wa_dir, wa_sub_dir, stage))
+                    clone_dirs.append(os.path.join(wa_sub_dir, stage))
+
+    # stage directories are independent, so they are cloned in parallel
+    clone_dirs = [clone_dir_name for clone_dir_name in clone_dirs if os.path.isdir(os.path.join(src, clone_dir_name))]
+    stats = {'files': 0, 'bytes': 0, 'copy': 0, 'reflink': 0}
+    lock = threading.Lock()
+    start_time = time.time()
+    logger.info('cloning %d directories of %s (%s, %d workers)' % (len(clone_dirs), src, 'link' if link else 'copy', num_workers))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(num_workers, 1)) as executor:
+        futures = [executor.submit(clone_dir, os.path.join(src, clone_dir_name), os.path.join(wa_dir, clone_dir_name), src, link, stats, lock) for clone_dir_name in clone_dirs]
+        not_done = futures
+        while len(not_done) > 0:
+            done, not_done = concurrent.futures.wait(not_done, timeout=10)
+            elapsed_time = max(time.time() - start_time, 1e-6)
+            with lock:
+                logger.info('cloned %d/%d directories: %d files, %.1f MB (%.1f files/s, %.1f MB/s)'
+                            % (len(futures) - len(not_done), len(futures), stats['files'], stats['bytes'] / 1e6, stats['files'] / elapsed_time, stats['bytes'] / 1e6 / elapsed_time))
+        failed_dirs = []
+        for clone_dir_name, future in zip(clone_dirs, futures):
+            try:
+                future.result()
+            except OSError as e:
+                logger.error('cloning %s failed: %s' % (clone_dir_name, e))
+                failed_dirs.append(clone_dir_name)
+    logger.info('cloned %.1f MB in %.1f seconds (copied %.1f MB, reflinked %.1f MB)'
+                % (stats['bytes'] / 1e6, time.time() - start_time, stats['copy'] / 1e6, stats['reflink'] / 1e6))
+    # the workarea config is not written, so that the partially cloned workarea is not used as a workarea
+    if len(failed_dirs) > 0:
+        logger.error('%d of %d directories failed to clone. workarea %s is incomplete' % (len(failed_dirs), len(clone_dirs), wa_dir))
+        return 1
     wa_config_dir = os.path.join(wa_dir, 'configs')
     flow_file_utils.make_dir(wa_config_dir)
 
@@ -1063,17 +1945,27 @@ def clone_wa(src: str, dest: str, stages: str, flows: List[str], aslink: bool) -
     return 0
 
 
-def handoff(handoff_id: str) -> int:
+def handoff(handoff_id: str, stage: str = None, num_workers: int = 8) -> int:
     '''
-    TODO: NEED TO IMPLEMENT
     handoff the current workarea. this command should be performed in a workarea (wa)
+    the results of the stage (<flow>/<stage>/.../results of every flow) are added to the content-addressed handoff store of the project (see handoff_store_name),
+    and the release directory (<handoff dir>/<handoff_id>/<design>/<block>) is built from the store with its manifest.
+    the files handed off before are neither copied nor stored again
 
     :param handoff_id: handoff the design of the current workarea in the handoff directory of the project with the specified handoff id
+    :param stage: stage whose results are handed off. if None, the last stage done in pnr
+    :param num_workers: number of files hashed in parallel
     :return: 0 if this function ends successfully
     '''
+    import getpass
+    import json
+    import tempfile
+    import time
+
     import flow_config_utils
     from flow_config_utils import flow_cfgs as FLOW_CFGS
     import flow_log_utils
+    import flow_file_utils
 
     # check whether the command is submitted in the right directory
     cur_dir = os.getcwd()
@@ -1089,15 +1981,99 @@ def handoff(handoff_id: str) -> int:
     flow_config_utils.read_config(wa_cfg_file)
     design = FLOW_CFGS['WA_CFG']['DESIGN']
     block = FLOW_CFGS['WA_CFG']['BLOCK']
-    if os.path.exists(os.path.join(FLOW_CFGS['HANDOFF_DIR'], handoff_id, design, block)):
-        pass
-    # TODO: read handoff.config and copy selected file to handoff directory
+    release_dir = os.path.join(FLOW_CFGS['HANDOFF_DIR'], handoff_id, design, block)
+    if os.path.exists(release_dir):
+        logger.error('handoff %s of %s/%s already exists in %s' % (handoff_id, design, block, release_dir))
+        sys.exit()
 
-    # read block config
+    if FLOW_CFGS['WA_CFG']['IMPL_TYPE'] == 'f2b' or FLOW_CFGS['WA_CFG']['IMPL_TYPE'] == 'f2f':
+        stages = supported_pnr_3d_stages
+    else:
+        stages = supported_pnr_2d_stages
+    if stage is None:
+        for targ_stage in reversed(stages):
+            if os.path.exists(os.path.join(cur_dir, 'pnr', targ_stage, flow_file_utils.join_filename(targ_stage, 'done'))):
+                stage = targ_stage
+                break
+        if stage is None:
+            logger.error('no pnr stage is done in the workarea')
+            sys.exit()
+
+    # results of every flow of the stage (e.g., pnr/route/results, sta/route/<corner>/results)
+    src_dirs = {}
+    for flow in supported_flows:
+        for root, dirs, files in os.walk(os.path.join(cur_dir, flow, stage)):
+            if 'results' in dirs:
+                src_dirs[os.path.relpath(os.path.join(root, 'results'), cur_dir)] = os.path.join(root, 'results')
+            dirs[:] = [name for name in dirs if name not in ['results', 'work', 'sessions']]
+    if len(src_dirs) == 0:
+        logger.error('stage %s has no results to handoff' % stage)
+        sys.exit()
+    for rel_dir in sorted(src_dirs):
+        logger.info('handoff %s' % rel_dir)
+
+    # add the results to the store, and build the release from the manifest
+    start_time = time.time()
+    store_dir = os.path.join(FLOW_CFGS['HANDOFF_DIR'], handoff_store_name)
+    manifest, stats = add_to_handoff_store(store_dir, src_dirs, os.path.join(cur_dir, '.pdflow_cache', 'handoff_hashes.json'), logger, num_workers)
+    manifest.update({'handoff_id': handoff_id, 'design': design, 'block': block, 'stage': stage, 'work_area': cur_dir, 'user': getpass.getuser(), 'created': time.strftime('%Y-%m-%d %H:%M:%S')})
+    manifest_file = os.path.join(store_dir, 'manifests', handoff_id, '%s.%s.json' % (design, block))
+    os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+    fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(manifest_file), suffix='.tmp')
+    with os.fdopen(fd, 'w') as ofp:
+        json.dump(manifest, ofp, indent=1, sort_keys=True)
+    os.replace(temp_file, manifest_file)
+    build_handoff_release(store_dir, manifest, release_dir)
+
+    logger.info('handoff %s of %s/%s (stage %s): %d files, %.1f MB. %d files, %.1f MB are newly stored (%.1f sec)'
+                % (handoff_id, design, block, stage, stats['files'], stats['bytes'] / 1e6, stats['new_files'], stats['new_bytes'] / 1e6, time.time() - start_time))
+    logger.info('manifest is written in %s' % manifest_file)
 
     return 0
 
 
+def restore_handoff(handoff_id: str, design: str, block: str) -> int:
+    '''
+    rebuild the release directories of a handoff (<handoff dir>/<handoff_id>/<design>/<block>) from their manifests in the handoff store.
+    missing or modified files are linked to their objects again
+
+    :param handoff_id: handoff id to restore
+    :param design: restore only the design. if None, all the designs
+    :param block: restore only the block. if None, all the blocks
+    :return: 0 if this function ends successfully
+    '''
+    import glob
+    import json
+
+    from flow_config_utils import flow_cfgs as FLOW_CFGS
+    import flow_log_utils
+
+    # start logging once the command is valid
+    logger = flow_log_utils.start_logging()
+    flow_log_utils.write_section_comment(logger, 'restore_handoff command')
+
+    store_dir = os.path.join(FLOW_CFGS['HANDOFF_DIR'], handoff_store_name)
+    manifest_files = sorted(glob.glob(os.path.join(store_dir, 'manifests', handoff_id, '*.json')))
+    if len(manifest_files) == 0:
+        logger.error('handoff %s does not exist in the handoff store %s' % (handoff_id, store_dir))
+        sys.exit()
+
+    ret = 0
+    for manifest_file in manifest_files:
+        with open(manifest_file, 'r') as ifp:
+            manifest = json.load(ifp)
+        if (design is not None and manifest['design'] != design) or (block is not None and manifest['block'] != block):
+            continue
+        release_dir = os.path.join(FLOW_CFGS['HANDOFF_DIR'], handoff_id, manifest['design'], manifest['block'])
+        num_missing = build_handoff_release(store_dir, manifest, release_dir)
+        if num_missing > 0:
+            logger.error('%d files of %s/%s are missing in the handoff store' % (num_missing, manifest['design'], manifest['block']))
+            ret = 1
+        logger.info('restored %s (%d files)' % (release_dir, len(manifest['files']) - num_missing))
+
+    return ret
+
+
 def update_interface(handoff_id: str, block: str) -> int:
     '''
     TODO: NEED TO IMPLEMENT
@@ -1125,47 +2101,151 @@ def update_interface(handoff_id: str, block: str) -> int:
     return 0
 
 
-def history(all: bool, num: int) -> int:
+def history(all: bool, num: int, flow: str = None, stage: str = None, tool: str = None, status: str = None, since: str = None) -> int:
     '''
     show command history of the current workarea. by default, show only the last 10 history. this command should be performed in a workarea (wa)
+    history is read from the history database (see open_history_db), so only the selected history is read
 
     :param all: boolean to control to show all history
     :param num: show only the last <num> history
+    :param flow: show only the history of the command (e.g., pnr)
+    :param stage: show only the history of the stage (e.g., route)
+    :param tool: show only the history of the tool (e.g., innovus)
+    :param status: show only the history with the status (running, passed, failed, aborted or unknown)
+    :param since: show only the history created on or after the date (YYYY-MM-DD)
     :return: 0 if this function ends successfully
     '''
+    import datetime
+
     # check whether the command is submitted in the right directory
     cur_dir = os.getcwd()
     if not is_WA_dir(cur_dir):
         sys.exit()
 
     # don't do logging
-    all_cmd_files = sorted(os.listdir(os.path.join(cur_dir, 'history')))
-    num_history = len(all_cmd_files)
-    if all:
-        selected_cmd_files = all_cmd_files
-        start_num = 1
-    elif num is not None:
-        selected_cmd_files = all_cmd_files[-num:]
-        start_num = num_history - num
-    else:
-        selected_cmd_files = all_cmd_files[-10:]
-        start_num = max(num_history - 10, 1)
-
-    for i, cmd_file in enumerate(selected_cmd_files):
-        cmd_file_path = os.path.join(cur_dir, 'history', cmd_file)
-        with open(cmd_file_path, 'r') as ifp:
-            for line in ifp:
-                match = re.search('# Created = (?P<date_time>\S+)', line)
-                if match:
-                    date_time = match.group('date_time')
-                match = re.match(r'^[^#]', line)
-                if match:
-                    command = line.strip()
-        print('%d %s %s' % (start_num + i, date_time, command))
+    conditions = []
+    params = []
+    for column, value in [('flow', flow), ('stage', stage), ('tool', tool), ('status', status)]:
+        if value is not None:
+            conditions.append('%s = ?' % column)
+            params.append(value)
+    if since is not None:
+        try:
+            conditions.append('created >= ?')
+            params.append(datetime.datetime.strptime(since, '%Y-%m-%d').timestamp())
+        except ValueError:
+            print('-since %s is not in YYYY-MM-DD format' % since)
+            return 1
+    query = 'SELECT id, time, status, command FROM history'
+    if len(conditions) > 0:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += ' ORDER BY id DESC'
+    if not all:
+        query += ' LIMIT %d' % (num if num is not None else 10)
+
+    conn = open_history_db(cur_dir)
+    rows = conn.execute(query, params).fetchall()
+    conn.close()
+    for history_id, date_time, cmd_status, command in reversed(rows):
+        print('%d %s %-7s %s' % (history_id, date_time, cmd_status, command))
+
+    return 0
+
+
+def metrics(flow: str, stages: List[str], metric_names: List[str], num: int) -> int:
+    '''
+    compare the metrics of runs and stages stored in the metrics database of the current workarea. this command should be performed in a workarea (wa)
+
+    :param flow: flow to show (e.g., pnr)
+    :param stages: stages to show. if None, all the stages in the database
+    :param metric_names: metrics to show. if None, all the metrics in the database
+    :param num: number of the latest runs of each stage to show
+    :return: 0 if this function ends successfully
+    '''
+    # check whether the command is submitted in the right directory
+    cur_dir = os.getcwd()
+    if not is_WA_dir(cur_dir):
+        sys.exit()
+
+    # don't do logging
+    if not os.path.exists(os.path.join(cur_dir, 'metrics.db')):
+        print('no metrics in the workarea')
+        return 0
+    conn = open_metrics_db(cur_dir)
+    if stages is None:
+        stage_order = {stage: i for i, stage in enumerate(supported_pnr_stages)}
+        stages = sorted([row[0] for row in conn.execute('SELECT DISTINCT stage FROM runs WHERE flow = ?', (flow,))], key=lambda stage: (stage_order.get(stage, len(stage_order)), stage))
+
+    runs = []
+    for stage in stages:
+        runs += reversed(conn.execute('SELECT id, stage, time FROM runs WHERE flow = ? AND stage = ? ORDER BY id DESC LIMIT ?', (flow, stage, num)).fetchall())
+    values = {}
+    for run_id, stage, time in runs:
+        for name, value in conn.execute('SELECT name, value FROM metrics WHERE run_id = ?', (run_id,)):
+            values[(run_id, name)] = value
+    conn.close()
+    if metric_names is None:
+        metric_names = sorted(set(name for run_id, name in values))
+
+    # a row for each metric, a column for each run
+    headers = ['%s#%d' % (stage, run_id) for run_id, stage, time in runs]
+    name_width = max([len('metric')] + [len(name) for name in metric_names])
+    column_widths = [max(len(header), 12) for header in headers]
+    print('%-*s  %s' % (name_width, 'metric', '  '.join('%*s' % (width, header) for width, header in zip(column_widths, headers))))
+    for name in metric_names:
+        cells = []
+        for (run_id, stage, time), width in zip(runs, column_widths):
+            value = values.get((run_id, name))
+            cells.append('%*s' % (width, '-' if value is None else '%.10g' % value))
+        print('%-*s  %s' % (name_width, name, '  '.join(cells)))
 
     return 0
 
 
+def example_benchmark_scan_cache():
+    import shutil
+    import time
+
+    # synthetic tech tree: 2000 techs with 3 versions each (and latest link)
+    tech_dir = '/Users/kchang/Lab/pdflow/tmp/scan_bench/tech'
+    if not os.path.exists(tech_dir):
+        for tech_num in range(2000):
+            for version in ['2020_10', '2021_04', '2022_01']:
+                os.makedirs(os.path.join(tech_dir, 'TECH%d' % tech_num, version, 'configs'))
+            os.symlink('2022_01', os.path.join(tech_dir, 'TECH%d' % tech_num, 'latest'))
+    if os.path.exists(scan_cache_dir):
+        shutil.rmtree(scan_cache_dir)
+    for name, kwargs in [('no cache (1 worker)', {'use_cache': False, 'max_workers': 1}), ('no cache', {'use_cache': False}), ('cache miss', {}), ('cache hit', {})]:
+        start_time = time.time()
+        techs = scan_dir_with_cache('tech', tech_dir, scan_tech_versions, **kwargs)
+        print('%-20s %6.3f sec (%d techs)' % (name, time.time() - start_time, len(techs)))
+    os.utime(os.path.join(tech_dir, 'TECH0'))
+    start_time = time.time()
+    scan_dir_with_cache('tech', tech_dir, scan_tech_versions)
+    print('%-20s %6.3f sec' % ('1 tech changed', time.time() - start_time))
+
+
+def example_benchmark_startup():
+    import subprocess
+    import time
+
+    # import time of each command (python -X importtime). run in a workarea
+    os.chdir('/Users/kchang/Lab/pdflow/workarea/aes')
+    pdflow_file = os.path.abspath(__file__)
+    for args in [['history'], ['metrics'], ['list_tech'], ['list_design'], ['pnr', '-stage', 'init', '-run', 'setup']]:
+        start_time = time.time()
+        proc = subprocess.run([sys.executable, '-X', 'importtime', pdflow_file] + args, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+        elapsed_time = time.time() - start_time
+        # import time: self [us] | cumulative | imported package
+        imports = []
+        for line in proc.stderr.splitlines():
+            match = re.match(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)', line)
+            if match and len(match.group(3)) == 1:
+                imports.append((int(match.group(2)), match.group(4)))
+        imports.sort(reverse=True)
+        print('%-40s %6.2f sec (imports %6.2f sec): %s' % (' '.join(args), elapsed_time, sum(us for us, module in imports) / 1e6, ', '.join('%s %.2f' % (module, us / 1e6) for us, module in imports[:5])))
+
+
 if __name__ == '__main__':
     pdflow_args = parser.parse_args()
 
@@ -1191,6 +2271,9 @@ if __name__ == '__main__':
     if debug_mode:
         os.environ['DEBUG'] = '1'
 
+    if pdflow_args.no_config_cache:
+        os.environ['PDFLOW_NO_CONFIG_CACHE'] = '1'
+
     ###################################
     # NEED TO LOAD CUSTOM PACKAGES AFTER SETTING UP OVDIR
     ###################################
@@ -1211,16 +2294,19 @@ if __name__ == '__main__':
     import flow_log_utils
     import flow_args_utils
     import flow_file_utils
-    import flow_git_utils
-    import project
 
     # execute commands which does not require logging
+    # (flow modules such as pdflow_pnr are imported only by the commands using them to keep the startup fast. see example_benchmark_startup)
     if command == 'list_tech':
         list_available_tech()
         sys.exit()
     elif command == 'list_design':
         list_available_design()
         sys.exit()
+    elif command == 'history':
+        sys.exit(history(pdflow_args.all, pdflow_args.num, pdflow_args.flow, pdflow_args.stage, pdflow_args.tool, pdflow_args.status, pdflow_args.since))
+    elif command == 'metrics':
+        sys.exit(metrics(pdflow_args.flow, pdflow_args.stage, pdflow_args.metric, pdflow_args.num))
 
     # setup logs
     log_dir = os.path.join(cur_dir, 'logs')
@@ -1241,9 +2327,14 @@ if __name__ == '__main__':
     flow_args_utils.print_args(pdflow_args, logger=logger)
 
     # for all commands running in workarea, create history for commands
-    if command not in ['add_block', 'create_wa', 'clone_wa', 'history']:
+    # (commands exiting in the middle are marked as aborted in the history database)
+    history_id = None
+    if command not in ['add_block', 'create_wa', 'clone_wa', 'restore_handoff']:
+        import atexit
+
         input_command = ' '.join(sys.argv)
-        create_history(input_command, cur_time, log_file)
+        history_id = create_history(input_command, cur_time, log_file)
+        atexit.register(update_history, cur_dir, history_id, 'aborted')
 
     # read project config
     proj_cfg_file = os.path.join(os.getenv('ENV_DIR'), 'configs', 'project.' + FLOW_CFGS['PROJECT_BRANCH'] + '.config')
@@ -1275,13 +2366,13 @@ if __name__ == '__main__':
     elif command == 'create_wa':
         ret |= create_wa(pdflow_args.name, pdflow_args.handoff_id, pdflow_args.impl_type, pdflow_args.impl_method)
     elif command == 'clone_wa':
-        ret |= clone_wa(pdflow_args.src, pdflow_args.dest, pdflow_args.stage, pdflow_args.flow, pdflow_args.aslink)
+        ret |= clone_wa(pdflow_args.src, pdflow_args.dest, pdflow_args.stage, pdflow_args.flow, pdflow_args.aslink, pdflow_args.link, pdflow_args.num_workers)
     elif command == 'handoff':
-        ret |= handoff(pdflow_args.handoff_id)
+        ret |= handoff(pdflow_args.handoff_id, pdflow_args.stage, pdflow_args.num_workers)
+    elif command == 'restore_handoff':
+        ret |= restore_handoff(pdflow_args.handoff_id, pdflow_args.design, pdflow_args.block)
     elif command == 'update_interface':
         ret |= update_interface(pdflow_args.handoff_id, pdflow_args.block)
-    elif command == 'history':
-        ret |= history(pdflow_args.all, pdflow_args.num)
     else:
         FLOW_ENVS['TECH'] = FLOW_CFGS['WA_CFG']['TECH']
         FLOW_ENVS['DESIGN'] = FLOW_CFGS['WA_CFG']['DESIGN']
@@ -1292,6 +2383,8 @@ if __name__ == '__main__':
         if is_3D_design():
             FLOW_ENVS['IMPL_METHOD'] = FLOW_CFGS['WA_CFG']['IMPL_METHOD']
 
+        # the whole command is measured. flows record their own stages and steps (e.g., pdflow_pnr.run_pnr)
+        command_telemetry = start_telemetry(command, getattr(pdflow_args, 'stage', None) or 'all', 'command')
         if command == 'syn':
             import pdflow_syn
 
@@ -1327,13 +2420,19 @@ if __name__ == '__main__':
             import pdflow_sim
 
             ret |= pdflow_sim.run_sim(pdflow_args.target_flow, pdflow_args.stage, pdflow_args.tool, pdflow_args.tool_version, pdflow_args.clean_prevrun, pdflow_args.run, log_tracer)
+        stop_telemetry(command_telemetry)
+        write_telemetry(logger)
 
     # finalize pdflow
     # perform command run summary in each flow,
     # since some flows need to run several times and stop running depending on the summary result
     if has_errors(log_tracer, ret):
         logger.error('PDFLOW FAILED WITH ERRORS')
+        history_status = 'failed'
     else:
         logger.info('PDFLOW FINISHED SUCCESSFULLY')
+        history_status = 'passed'
+    if history_id is not None:
+        update_history(cur_dir, history_id, history_status)
 
     exit(ret)
@@ -3,15 +3,11 @@ import os
 import re
 from typing import *
 
-import hypergraph
-from shapely.geometry import Polygon
-
 from flow_utils import *
 import flow_file_utils
 import directedgraph
 import LEFDEF
 import flow_log_utils
-import verilog_parse
 # from flow_var_utils import flow_vars as FLOW_VARS
 import pdflow
 
@@ -460,6 +456,14 @@ class Shape:
 	'''
 	polygon shape
 	'''
+	polygon_cache: Union['Polygon', None]
+	'''
+	shapely polygon of this shape made by get_cached_polygon
+	'''
+	polygon_cache_key: Union[Tuple, None]
+	'''
+	coordinates of this shape when polygon_cache is made
+	'''
 	props: Dict[str, Any]
 	'''
 	user-defined properties
@@ -494,6 +498,8 @@ class Shape:
 				self.polygon = [Point(swig_ref=pt) for pt in list(swig_ref.iPolygon)]
 			else:
 				self.polygon = [Point(swig_ref=pt) for pt in list(swig_ref.dPolygon)]
+		self.polygon_cache = None
+		self.polygon_cache_key = None
 		self.props = {}
 
 	def __setitem__(self, key, value):
@@ -637,7 +643,9 @@ class Shape:
 		'''
 		self.layer = new_layers[layer_map[self.layer.name]] if self.layer is not None and self.layer.name in layer_map and layer_map[self.layer.name] in new_layers else None
 
-	def get_polygon(self) -> Union[Polygon, None]:
+	def get_polygon(self) -> Union['Polygon', None]:
+		from shapely.geometry import Polygon
+
 		if self.shape_type == 0 or self.shape_type == 1:
 			return Polygon([(self.rect.ll.x, self.rect.ll.y), (self.rect.ur.x, self.rect.ll.y), (self.rect.ur.x, self.rect.ur.y), (self.rect.ll.x, self.rect.ur.y)])
 		elif self.shape_type == 2 or self.shape_type == 3:
@@ -646,10 +654,42 @@ class Shape:
 			logger.error('unknown shape type %d' % (self.shape_type))
 			return None
 
+	def get_cached_polygon(self) -> Union['Polygon', None]:
+		"""
+		get the shapely polygon of this shape. the polygon is made again only when the coordinates of the shape are changed
+
+		:return: polygon of this shape
+		"""
+		if self.shape_type == 0 or self.shape_type == 1:
+			key = (self.rect.ll.x, self.rect.ll.y, self.rect.ur.x, self.rect.ur.y)
+		else:
+			key = tuple((pt.x, pt.y) for pt in self.polygon)
+		if self.polygon_cache is None or self.polygon_cache_key != key:
+			self.polygon_cache = self.get_polygon()
+			self.polygon_cache_key = key
+		return self.polygon_cache
+
 	def is_intersected(self, other: 'Shape') -> bool:
+		"""
+		check whether this shape and the other shape on the same layer intersect (touching shapes are also intersected, same as shapely)
+		two rectangles are compared with their coordinates directly, and shapely is used only for polygons
+
+		:param other: shape to check
+		:return: True if two shapes intersect
+		"""
 		if (self.layer is None and other.layer is None) or (self.layer.name == other.layer.name):
-			self_polygon = self.get_polygon()
-			targ_polygon = other.get_polygon()
+			if (self.shape_type == 0 or self.shape_type == 1) and (other.shape_type == 0 or other.shape_type == 1):
+				self_rect = self.rect
+				targ_rect = other.rect
+				if self_rect.ll.x <= self_rect.ur.x and self_rect.ll.y <= self_rect.ur.y and targ_rect.ll.x <= targ_rect.ur.x and targ_rect.ll.y <= targ_rect.ur.y:
+					return self_rect.ll.x <= targ_rect.ur.x and targ_rect.ll.x <= self_rect.ur.x and self_rect.ll.y <= targ_rect.ur.y and targ_rect.ll.y <= self_rect.ur.y
+			self_polygon = self.get_cached_polygon()
+			targ_polygon = other.get_cached_polygon()
+			# reject with bounding boxes before shapely
+			self_bounds = self_polygon.bounds
+			targ_bounds = targ_polygon.bounds
+			if self_bounds[2] < targ_bounds[0] or targ_bounds[2] < self_bounds[0] or self_bounds[3] < targ_bounds[1] or targ_bounds[3] < self_bounds[1]:
+				return False
 			if self_polygon.intersects(targ_polygon):
 				return True
 		return False
@@ -2254,6 +2294,12 @@ class LEF:
 		else:
 			return False
 
+	def __getstate__(self):
+		# LEF in LEFDEF C++ library cannot be pickled. it is exported again when it is needed (see DEF.export)
+		state = self.__dict__.copy()
+		state['swigLEF'] = None
+		return state
+
 	def read_lef(self, lef_files: List[str]):
 		"""
 		read LEF files
@@ -3754,6 +3800,287 @@ class DEFComponent:
 		return comp_shape
 
 
+class DEFComponentLoc(Point):
+	"""
+	location of a component whose location is stored in DEFComponentStore (always integer)
+	"""
+	store: 'DEFComponentStore'
+	'''
+	store which has the location
+	'''
+	idx: int
+	'''
+	index of the component in the store
+	'''
+
+	def __init__(self, store: 'DEFComponentStore', idx: int):
+		"""
+		create a location view of a component in the store
+
+		:param store: store which has the location
+		:param idx: index of the component in the store
+		"""
+		self.store = store
+		self.idx = idx
+		self.point_type = int
+		self.props = {}
+
+	@property
+	def x(self) -> int:
+		return int(self.store.loc_x[self.idx])
+
+	@x.setter
+	def x(self, x: Union[int, float]):
+		self.store.loc_x[self.idx] = round(x)
+
+	@property
+	def y(self) -> int:
+		return int(self.store.loc_y[self.idx])
+
+	@y.setter
+	def y(self, y: Union[int, float]):
+		self.store.loc_y[self.idx] = round(y)
+
+	def transform(self, method: Callable[['Point'], None]):
+		"""
+		apply a transformation of Point to this location. the transformation is done with a Point, so the intermediate values are not truncated by the store
+
+		:param method: transformation to apply (e.g., lambda pt: pt.scale(0.5))
+		"""
+		pt = Point(self.x, self.y, point_type=int)
+		method(pt)
+		self.x = pt.x
+		self.y = pt.y
+
+	def scale(self, scale_factor: float, snap_spacing: Union[int, float] = None):
+		self.transform(lambda pt: pt.scale(scale_factor, snap_spacing))
+
+	def MX(self):
+		self.transform(lambda pt: pt.MX())
+
+	def MY(self):
+		self.transform(lambda pt: pt.MY())
+
+	def R270(self):
+		self.transform(lambda pt: pt.R270())
+
+	def R180(self):
+		self.transform(lambda pt: pt.R180())
+
+	def R90(self):
+		self.transform(lambda pt: pt.R90())
+
+	def move(self, x: Union[int, float], y: Union[int, float]):
+		self.transform(lambda pt: pt.move(x, y))
+
+	def to_integer(self):
+		pass
+
+	def to_float(self):
+		logger.warning('location of component %s is in a component store, and it is always integer. to_float() is ignored' % self.store.names[self.idx])
+
+
+class DEFComponentView(DEFComponent):
+	"""
+	component whose location, orientation, placement status and macro are stored in DEFComponentStore.
+	it works the same as DEFComponent, and the other members (name, eeq, pin2net, props, ...) are still kept in the object
+	"""
+	store: 'DEFComponentStore'
+	'''
+	store which has location, orientation, placement status and macro of this component
+	'''
+	idx: int
+	'''
+	index of this component in the store
+	'''
+
+	@property
+	def loc(self) -> 'Point':
+		return DEFComponentLoc(self.store, self.idx)
+
+	@loc.setter
+	def loc(self, loc: 'Point'):
+		self.store.loc_x[self.idx] = round(loc.x)
+		self.store.loc_y[self.idx] = round(loc.y)
+
+	@property
+	def orientation(self) -> int:
+		return int(self.store.orientation[self.idx])
+
+	@orientation.setter
+	def orientation(self, orientation: int):
+		self.store.orientation[self.idx] = orientation
+
+	@property
+	def pStatus(self) -> int:
+		return int(self.store.pStatus[self.idx])
+
+	@pStatus.setter
+	def pStatus(self, pStatus: int):
+		self.store.pStatus[self.idx] = pStatus
+
+	@property
+	def macro(self) -> Union['LEFMacro', None]:
+		return self.store.macros[self.store.macro_idx[self.idx]]
+
+	@macro.setter
+	def macro(self, macro: Union['LEFMacro', None]):
+		self.store.macro_idx[self.idx] = self.store.add_macro(macro)
+
+
+class DEFComponentStore:
+	"""
+	columnar (NumPy) store of the components in a design.
+	location, orientation, placement status and macro of the components are kept in arrays, and the components become DEFComponentView,
+	so bulk operations (e.g., scaling locations, getting bounding boxes of all the components) can be vectorized.
+	components added to the design after the store is created are not in the store
+	"""
+	design: 'DEFDesign'
+	'''
+	design which the components belong to
+	'''
+	names: List[str]
+	'''
+	names of the components in the store (index of the arrays)
+	'''
+	index: Dict[str, int]
+	'''
+	component name to index of the arrays
+	'''
+	macros: List[Union['LEFMacro', None]]
+	'''
+	macros of the components. index 0 is None (component without macro)
+	'''
+	macro_index: Dict[int, int]
+	'''
+	id of macro to index in macros
+	'''
+	loc_x: 'numpy.ndarray'
+	'''
+	x of the component locations (int64)
+	'''
+	loc_y: 'numpy.ndarray'
+	'''
+	y of the component locations (int64)
+	'''
+	orientation: 'numpy.ndarray'
+	'''
+	orientation of the components (int8)
+	'''
+	pStatus: 'numpy.ndarray'
+	'''
+	placement status of the components (int8)
+	'''
+	macro_idx: 'numpy.ndarray'
+	'''
+	index of the component macros in macros (int32)
+	'''
+
+	def __init__(self, design: 'DEFDesign'):
+		"""
+		move location, orientation, placement status and macro of the components in the design to arrays
+
+		:param design: design which has the components
+		"""
+		import numpy
+		self.design = design
+		comps = list(design.components.values())
+		num_comps = len(comps)
+		self.names = [comp.name for comp in comps]
+		self.index = {comp_name: idx for idx, comp_name in enumerate(self.names)}
+		self.macros = [None]
+		self.macro_index = {id(None): 0}
+		self.loc_x = numpy.fromiter((comp.loc.x for comp in comps), dtype=numpy.int64, count=num_comps)
+		self.loc_y = numpy.fromiter((comp.loc.y for comp in comps), dtype=numpy.int64, count=num_comps)
+		self.orientation = numpy.fromiter((comp.orientation for comp in comps), dtype=numpy.int8, count=num_comps)
+		self.pStatus = numpy.fromiter((comp.pStatus for comp in comps), dtype=numpy.int8, count=num_comps)
+		self.macro_idx = numpy.fromiter((self.add_macro(comp.macro) for comp in comps), dtype=numpy.int32, count=num_comps)
+		for idx, comp in enumerate(comps):
+			if isinstance(comp, DEFComponentView):
+				comp.store.detach_component(comp)
+			for member in ['loc', 'orientation', 'pStatus', 'macro']:
+				comp.__dict__.pop(member, None)
+			comp.__class__ = DEFComponentView
+			comp.store = self
+			comp.idx = idx
+
+	def add_macro(self, macro: Union['LEFMacro', None]) -> int:
+		"""
+		add a macro to the store if it is not in the store
+
+		:param macro: macro to add
+		:return: index of the macro
+		"""
+		if id(macro) in self.macro_index:
+			return self.macro_index[id(macro)]
+		self.macro_index[id(macro)] = len(self.macros)
+		self.macros.append(macro)
+		return len(self.macros) - 1
+
+	def detach_component(self, comp: 'DEFComponentView'):
+		"""
+		move location, orientation, placement status and macro of the component back to the component object (it becomes DEFComponent)
+
+		:param comp: component to detach
+		"""
+		loc = Point(comp.loc.x, comp.loc.y, point_type=int)
+		orientation = comp.orientation
+		pStatus = comp.pStatus
+		macro = comp.macro
+		comp.__class__ = DEFComponent
+		del comp.store
+		del comp.idx
+		comp.loc = loc
+		comp.orientation = orientation
+		comp.pStatus = pStatus
+		comp.macro = macro
+
+	def detach(self):
+		"""
+		move all the values back to the components in the store
+		"""
+		for comp_name, idx in self.index.items():
+			comp = self.design.components[comp_name] if comp_name in self.design.components else None
+			if isinstance(comp, DEFComponentView) and comp.store is self and comp.idx == idx:
+				self.detach_component(comp)
+
+	def get_bboxes(self) -> 'numpy.ndarray':
+		"""
+		get bounding boxes of all the components in the store (same as get_shape() of each component)
+		macro sizes are read from the macros at this time, so changes of the macros (e.g., macro.width scaled by the flow) are reflected
+
+		:return: array of (llx, lly, urx, ury) in the order of names
+		"""
+		import numpy
+		macro_width = numpy.fromiter((int(macro.width * self.design.dbUnits) if isinstance(macro, LEFMacro) else 0 for macro in self.macros), dtype=numpy.int64, count=len(self.macros))
+		macro_height = numpy.fromiter((int(macro.height * self.design.dbUnits) if isinstance(macro, LEFMacro) else 0 for macro in self.macros), dtype=numpy.int64, count=len(self.macros))
+		return numpy.stack([self.loc_x, self.loc_y, self.loc_x + macro_width[self.macro_idx], self.loc_y + macro_height[self.macro_idx]], axis=1)
+
+	def get_names(self, mask: 'numpy.ndarray') -> List[str]:
+		"""
+		get names of the components selected by a mask (e.g., store.get_names(store.pStatus == 0) for all the fixed components)
+
+		:param mask: boolean array in the order of names
+		:return: list of component names
+		"""
+		import numpy
+		return [self.names[idx] for idx in numpy.flatnonzero(mask)]
+
+	def scale(self, scale_factor: float, snap_spacing: Union[int, float] = None):
+		"""
+		scale all the component locations (same as Point.scale of each location)
+
+		:param scale_factor: scale factor (ratio, not percentage) (e.g., if you want to shrink locations by 50%, this value should be 0.5)
+		:param snap_spacing: after scaling, snap the locations to grids with spacing of this value
+		"""
+		import numpy
+		for loc in [self.loc_x, self.loc_y]:
+			scaled = loc * scale_factor
+			if snap_spacing is not None:
+				scaled = numpy.round(scaled / snap_spacing) * snap_spacing
+			loc[:] = numpy.round(scaled)
+
+
 class DEFPin:
 	"""
 	represents a pin (port) of the specified design
@@ -4374,12 +4701,11 @@ class DEFPath:
 		"""
 		self.layer = new_lef.layers[layer_map[self.layer.name]] if self.layer is not None and self.layer.name in layer_map and layer_map[self.layer.name] in new_lef.layers else None
 
-	def is_connected(self, other: Union['DEFPath', List['Shape']]) -> Tuple[bool, List['DEFVia'], Union['LEFLayer', None]]:
+	def get_connection_shapes(self) -> List['Shape']:
 		"""
-		check whether this path is connected to a path or shapes or not
+		get routing and via shapes of this path to check connections. they are stored in self['shapes'] once they are generated
 
-		:param other: a path or shapes to check connection
-		:return: (True if this path and 'other' is connected. if not, False), (via which connects two paths), (layer on which two paths are connected)
+		:return: routing and via shapes of this path
 		"""
 		if 'shapes' not in self:
 			self['shapes'] = []
@@ -4390,22 +4716,22 @@ class DEFPath:
 					self['shapes'] += self.get_routing_shape()
 			if len(self.vias) != 0:
 				self['shapes'] += self.get_via_shapes()
+		return self['shapes']
 
+	def is_connected(self, other: Union['DEFPath', List['Shape']]) -> Tuple[bool, List['DEFVia'], Union['LEFLayer', None]]:
+		"""
+		check whether this path is connected to a path or shapes or not
+
+		:param other: a path or shapes to check connection
+		:return: (True if this path and 'other' is connected. if not, False), (via which connects two paths), (layer on which two paths are connected)
+		"""
+		self_shapes = self.get_connection_shapes()
 		if isinstance(other, DEFPath):
-			if 'shapes' not in other:
-				other['shapes'] = []
-				if len(other.pts) != 0:
-					if len(other.pts) > 2:
-						logger.warning('there is a path has %d points. currently path with more than 2 points are not supported' % (len(other.pts)))
-					elif len(other.pts) == 2 or other.isRect:
-						other['shapes'] += other.get_routing_shape()
-				if len(other.vias) != 0:
-					other['shapes'] += other.get_via_shapes()
-			targ_shapes = other['shapes']
+			targ_shapes = other.get_connection_shapes()
 		else:
 			targ_shapes = other
 
-		for self_shape in self['shapes']:
+		for self_shape in self_shapes:
 			for targ_shape in targ_shapes:
 				if self_shape.is_intersected(targ_shape):
 					connection_vias = []
@@ -4514,7 +4840,7 @@ class DEFWire:
 
 
 class DEFNetDirectedGraph(directedgraph.DirectedGraph):
-	def __init__(self, data: Dict[Union[str, int, float], Set[Union[str, int, float]]] = None, hypergraph: hypergraph.HyperGraph = None):
+	def __init__(self, data: Dict[Union[str, int, float], Set[Union[str, int, float]]] = None, hypergraph: 'hypergraph.HyperGraph' = None):
 		if hypergraph is None:
 			super().__init__(data)
 		else:
@@ -4583,6 +4909,113 @@ class DEFNetDirectedGraph(directedgraph.DirectedGraph):
 		nx.nx_agraph.write_dot(G, dot_filename)
 
 
+class DEFNetConnectionIndex:
+	"""
+	spatial hash of the shapes of nodes (paths, pins, component pins) in a net directed graph.
+	shapes on different layers or in different bins never intersect, so only the nodes sharing a bin on the same layer are checked for connection
+	"""
+	node_order: Dict[str, int]
+	'''
+	node name to its order in the directed graph
+	'''
+	node_names: List[str]
+	'''
+	node names in the order of the directed graph
+	'''
+	node_bins: Dict[str, List[Tuple[Union[str, None], int, int]]]
+	'''
+	node name to the bins (layer name, bin x, bin y) its shapes overlap
+	'''
+	bins: Dict[Tuple[Union[str, None], int, int], List[int]]
+	'''
+	bin (layer name, bin x, bin y) to the orders of the nodes whose shapes overlap the bin
+	'''
+	bin_size: int
+	'''
+	width and height of a bin
+	'''
+	layer_idx: Dict[int, int]
+	'''
+	id of LEF layer to its index in the layer order of LEF
+	'''
+	layer_order: List['LEFLayer']
+	'''
+	layer order of LEF
+	'''
+	checked: Set[Tuple[str, str]]
+	'''
+	pairs of node names whose connection is already checked
+	'''
+	queued: Set[str]
+	'''
+	node names in the BFS queue
+	'''
+
+	def __init__(self, DG: 'DEFNetDirectedGraph', layer_order: List['LEFLayer']):
+		"""
+		build a spatial hash of the shapes of nodes in DG
+
+		:param DG: directed graph of a net
+		:param layer_order: layer order of LEF
+		"""
+		self.node_order = {}
+		self.node_bins = {}
+		self.bins = {}
+		self.layer_order = layer_order
+		self.layer_idx = {id(layer): idx for idx, layer in reversed(list(enumerate(layer_order)))}
+		self.checked = set()
+		self.queued = set()
+
+		node_shapes = []
+		for node_num, (node_name, node_info) in enumerate(DG.nodes.items()):
+			self.node_order[node_name] = node_num
+			shapes = node_info['path'].get_connection_shapes() if node_info['type'] == 'path' else node_info['shapes']
+			node_shapes.append((node_name, [(shape.layer.name if shape.layer is not None else None, DEFSpatialIndex.get_bbox([shape])) for shape in shapes if shape.rect is not None or len(shape.polygon) > 0]))
+
+		bboxes = [bbox for node_name, shapes in node_shapes for layer_name, bbox in shapes]
+		self.bin_size = 1
+		if len(bboxes) > 0:
+			# a bin about as large as an average shape
+			self.bin_size = max(1, int(sum(max(bbox[2] - bbox[0], bbox[3] - bbox[1]) for bbox in bboxes) / len(bboxes)))
+
+		for node_name, shapes in node_shapes:
+			node_num = self.node_order[node_name]
+			node_bins = set()
+			for layer_name, bbox in shapes:
+				for bin_x in range(int(bbox[0] // self.bin_size), int(bbox[2] // self.bin_size) + 1):
+					for bin_y in range(int(bbox[1] // self.bin_size), int(bbox[3] // self.bin_size) + 1):
+						node_bins.add((layer_name, bin_x, bin_y))
+			for node_bin in node_bins:
+				if node_bin in self.bins:
+					self.bins[node_bin].append(node_num)
+				else:
+					self.bins[node_bin] = [node_num]
+			self.node_bins[node_name] = list(node_bins)
+		self.node_names = list(self.node_order.keys())
+
+	def get_candidates(self, node_name: str) -> List[str]:
+		"""
+		get nodes whose shapes are on the same layer and in the same bin as the shapes of a node
+
+		:param node_name: node name
+		:return: candidate node names in the order of the directed graph
+		"""
+		node_nums = set()
+		for node_bin in self.node_bins[node_name]:
+			node_nums.update(self.bins[node_bin])
+		node_nums.discard(self.node_order[node_name])
+		return [self.node_names[node_num] for node_num in sorted(node_nums)]
+
+	def get_layer_idx(self, layer: 'LEFLayer') -> int:
+		"""
+		:param layer: LEF layer
+		:return: index of the layer in the layer order of LEF (same as layer_order.index(layer))
+		"""
+		if id(layer) in self.layer_idx:
+			return self.layer_idx[id(layer)]
+		return self.layer_order.index(layer)
+
+
 class DEFNet:
 	"""
 	represents a net in the specified design
@@ -4856,29 +5289,34 @@ class DEFNet:
 				break
 		return existing_cutLayer_names
 
-	def build_edges_directedgraph(self, DG: DEFNetDirectedGraph, cur_node_name: str, bfs_queue: List[str]):
+	def build_edges_directedgraph(self, DG: DEFNetDirectedGraph, cur_node_name: str, bfs_queue: Deque[str], connection_index: DEFNetConnectionIndex = None):
 		"""
 		build edges between nodes which connected with current node
 
 		:param DG: directed graph to traverse
 		:param cur_node_name: current node name
-		:param bfs_queue: nodes to perform tracing
+		:param bfs_queue: nodes to perform tracing (nodes are added to the left, and popped from the right)
+		:param connection_index: spatial hash of the shapes of nodes in DG. if None, it is built from DG
 		"""
+		if connection_index is None:
+			connection_index = DEFNetConnectionIndex(DG, self.design.DEF.LEF.layer_order)
+			connection_index.queued.update(bfs_queue)
 		DG.nodes[cur_node_name]['visited'] = True
 		cur_node_info = DG.nodes[cur_node_name]
 
-		for targ_node_name, targ_node_info in DG.nodes.items():
-			if cur_node_name != targ_node_name and cur_node_name not in targ_node_info['nodes_already_checked_connection']:
+		# nodes out of the bins of the current node are never connected to it, so they are not checked
+		for targ_node_name in connection_index.get_candidates(cur_node_name):
+			targ_node_info = DG.nodes[targ_node_name]
+			if (cur_node_name, targ_node_name) not in connection_index.checked:
 
 				if cur_node_info['type'] == 'path':
 					cur_node_path = cur_node_info['path']
-					layer_order = cur_node_path.design.DEF.LEF.layer_order
 					if targ_node_info['type'] == 'path':
 						targ_node_path = targ_node_info['path']
 						connected, connection_vias, connected_layer = cur_node_path.is_connected(targ_node_path)
 						if connected:
-							cur_node_path_layer_idx = layer_order.index(cur_node_path.layer)
-							targ_node_path_layer_idx = layer_order.index(targ_node_path.layer)
+							cur_node_path_layer_idx = connection_index.get_layer_idx(cur_node_path.layer)
+							targ_node_path_layer_idx = connection_index.get_layer_idx(targ_node_path.layer)
 						else:
 							cur_node_path_layer_idx = None
 							targ_node_path_layer_idx = None
@@ -4886,8 +5324,8 @@ class DEFNet:
 						targ_node_shapes = targ_node_info['shapes']
 						connected, connection_vias, connected_layer = cur_node_path.is_connected(targ_node_shapes)
 						if connected:
-							cur_node_path_layer_idx = layer_order.index(cur_node_path.layer)
-							targ_node_path_layer_idx = layer_order.index(connected_layer)
+							cur_node_path_layer_idx = connection_index.get_layer_idx(cur_node_path.layer)
+							targ_node_path_layer_idx = connection_index.get_layer_idx(connected_layer)
 						else:
 							cur_node_path_layer_idx = None
 							targ_node_path_layer_idx = None
@@ -4895,11 +5333,10 @@ class DEFNet:
 					cur_node_shapes = cur_node_info['shapes']
 					if targ_node_info['type'] == 'path':
 						targ_node_path = targ_node_info['path']
-						layer_order = targ_node_path.design.DEF.LEF.layer_order
 						connected, connection_vias, connected_layer = targ_node_path.is_connected(cur_node_shapes)
 						if connected:
-							cur_node_path_layer_idx = layer_order.index(connected_layer)
-							targ_node_path_layer_idx = layer_order.index(targ_node_path.layer)
+							cur_node_path_layer_idx = connection_index.get_layer_idx(connected_layer)
+							targ_node_path_layer_idx = connection_index.get_layer_idx(targ_node_path.layer)
 						else:
 							cur_node_path_layer_idx = None
 							targ_node_path_layer_idx = None
@@ -4907,7 +5344,6 @@ class DEFNet:
 						# we know one of cur_node or targ_node should be path (not pin nor comp_pin)
 						# because a pin cannot be directly connected to comp_pin or other pin
 						# (pin and comp_pin should be connected to a path)
-						layer_order = []
 						connected = False
 						connection_vias = []
 						connected_layer = None
@@ -4918,8 +5354,8 @@ class DEFNet:
 				for connection_via in connection_vias[:]:
 					topRoutingLayer_idx = max(cur_node_path_layer_idx, targ_node_path_layer_idx)
 					botRoutingLayer_idx = min(cur_node_path_layer_idx, targ_node_path_layer_idx)
-					connection_via_topRoutingLayer_idx = layer_order.index(connection_via.via.topRoutingLayer)
-					connection_via_botRoutingLayer_idx = layer_order.index(connection_via.via.botRoutingLayer)
+					connection_via_topRoutingLayer_idx = connection_index.get_layer_idx(connection_via.via.topRoutingLayer)
+					connection_via_botRoutingLayer_idx = connection_index.get_layer_idx(connection_via.via.botRoutingLayer)
 					if not (topRoutingLayer_idx >= connection_via_topRoutingLayer_idx  and connection_via_botRoutingLayer_idx >= botRoutingLayer_idx):
 						connection_vias.remove(connection_via)
 
@@ -5020,9 +5456,12 @@ class DEFNet:
 						else:
 							DG.add_edge('%s_%s' % (cur_node_name, targ_node_name), [cur_node_name, targ_node_name], connection_vias=connection_vias, connected_layer=connected_layer)
 
-					if not targ_node_info['visited'] and targ_node_name not in bfs_queue:
-						bfs_queue.insert(0, targ_node_name)
+					if not targ_node_info['visited'] and targ_node_name not in connection_index.queued:
+						bfs_queue.appendleft(targ_node_name)
+						connection_index.queued.add(targ_node_name)
 
+				connection_index.checked.add((cur_node_name, targ_node_name))
+				connection_index.checked.add((targ_node_name, cur_node_name))
 				DG.nodes[cur_node_name]['nodes_already_checked_connection'].append(targ_node_name)
 				DG.nodes[targ_node_name]['nodes_already_checked_connection'].append(cur_node_name)
 
@@ -5067,10 +5506,14 @@ class DEFNet:
 		if driver_node is not None:
 			# need to perform BFS instead of DFS since a signal is propagated from the root.
 			# if we perform DFS, it can be end up with a loop
-			bfs_queue = [driver_node.name]
+			from collections import deque
+			connection_index = DEFNetConnectionIndex(DG, self.design.DEF.LEF.layer_order)
+			bfs_queue = deque([driver_node.name])
+			connection_index.queued.add(driver_node.name)
 			while len(bfs_queue) > 0:
 				cur_node_name = bfs_queue.pop()
-				self.build_edges_directedgraph(DG, cur_node_name, bfs_queue)
+				connection_index.queued.discard(cur_node_name)
+				self.build_edges_directedgraph(DG, cur_node_name, bfs_queue, connection_index)
 		else:
 			logger.error('cannot identify the driver for net %s. ignored' % self.name)
 
@@ -5202,6 +5645,482 @@ class DEFNet:
 			subnet_names.append(subnet.name)
 		return subnet_names
 
+	def split_by_cutLayers(self, cutLayer_names: List[str], row_splitting: bool = False, macro_map_3d_to_2d: Dict[str, Tuple[int, str]] = None) -> bool:
+		"""
+		split a net into multiple nets by cutting nets on cut layers. split nets are split further by the other cut layers
+
+		:param cutLayer_names: cut layers which will split nets on
+		:param row_splitting: when 3D DEF, whether the design is using half height macros (used in compact2D)
+		:param macro_map_3d_to_2d: when 3D DEF and row_splitting enabled, 3D macro name:(tier_num, 2D macro name)
+		:return: True if the net is split (the net should be removed from the design). False if the net does not have vias on the cut layers
+		"""
+		targ_cutLayer_names = self.get_existing_cutLayers(cutLayer_names)
+
+		# if there are multiple cutLayers to split, it is possible that split net can be split further by other cutLayers
+		targ_nets = []
+		targ_nets.append(self)
+		for cutlayer in targ_cutLayer_names:
+			subnet_names = []
+			for net in targ_nets:
+				subnet_names += net.split_by_cutLayer(cutlayer, row_splitting, macro_map_3d_to_2d)
+
+			targ_nets = []
+			for subnet_name in subnet_names:
+				subnet_info = self.design.nets[subnet_name]
+				if len(subnet_info.get_existing_cutLayers(targ_cutLayer_names)) > 0:
+					targ_nets.append(subnet_info)
+
+		return len(targ_cutLayer_names) > 0
+
+	def get_split_record(self, cutLayer_names: List[str], row_splitting: bool = False, macro_map_3d_to_2d: Dict[str, Tuple[int, str]] = None) -> Dict[str, Any]:
+		"""
+		split a net by cut layers (same as split_by_cutLayers), and record the result with indices of pins, component pins, paths and vias of this net.
+		used in worker processes of DEFDesign.split_by_cutLayer. the result is applied to the net in the main process by apply_split_record
+
+		:param cutLayer_names: cut layers which will split nets on
+		:param row_splitting: when 3D DEF, whether the design is using half height macros (used in compact2D)
+		:param macro_map_3d_to_2d: when 3D DEF and row_splitting enabled, 3D macro name:(tier_num, 2D macro name)
+		:return: split result (picklable). ILV pins in the order they are created, subnets in the order they are created, and remaining vias of the paths
+		"""
+		pins = list(self.pins)
+		comp_pin_idx = {id(comp_pin): idx for idx, comp_pin in enumerate(self.compPins)}
+		path_idx = {}
+		vias = {}
+		for wire_num, wire_info in enumerate(self.wires):
+			for path_num, path_info in enumerate(wire_info.paths):
+				path_idx[id(path_info)] = (wire_num, path_num)
+				vias[(wire_num, path_num)] = list(path_info.vias)
+
+		# created ILV pins and subnets are collected in empty sections instead of the sections of the design
+		design_pins = self.design.pins
+		design_nets = self.design.nets
+		self.design.pins = {}
+		self.design.nets = {}
+		try:
+			split = self.split_by_cutLayers(cutLayer_names, row_splitting, macro_map_3d_to_2d)
+			ilv_pins = list(self.design.pins.values())
+			subnets = list(self.design.nets.values())
+		finally:
+			self.design.pins = design_pins
+			self.design.nets = design_nets
+
+		record = {'split': split, 'pins': [], 'nets': [], 'vias': {}}
+		for ilv_pin in ilv_pins:
+			shapes = [(shape.layer.name if shape.layer is not None else None, shape.copy({})) for shape in ilv_pin.shapes]
+			# 'shapes' is the cache of get_net_directedgraph. it is made again when it is needed
+			props = {key: value for key, value in ilv_pin.props.items() if key != 'shapes'}
+			record['pins'].append((ilv_pin.name, ilv_pin.direction, ilv_pin.pStatus, ilv_pin.loc.copy(), ilv_pin.orientation, props, shapes))
+		pins += ilv_pins
+		pin_idx = {id(pin): idx for idx, pin in enumerate(pins)}
+		for subnet in subnets:
+			record['nets'].append((subnet.name, [pin_idx[id(pin)] for pin in subnet.pins], [comp_pin_idx[id(comp_pin)] for comp_pin in subnet.compPins],
+								   [[path_idx[id(path)] for path in wire.paths] for wire in subnet.wires]))
+		for wire_num, wire_info in enumerate(self.wires):
+			for path_num, path_info in enumerate(wire_info.paths):
+				if len(path_info.vias) != len(vias[(wire_num, path_num)]):
+					via_idx = {id(via): idx for idx, via in enumerate(vias[(wire_num, path_num)])}
+					record['vias'][(wire_num, path_num)] = [via_idx[id(via)] for via in path_info.vias]
+		return record
+
+	def apply_split_record(self, record: Dict[str, Any]) -> bool:
+		"""
+		apply the result of get_split_record to this net. the design becomes the same as the one split by split_by_cutLayers
+
+		:param record: split result from get_split_record
+		:return: True if the net is split (the net should be removed from the design)
+		"""
+		pins = list(self.pins)
+		for pin_name, direction, pStatus, loc, orientation, props, shapes in record['pins']:
+			ilv_pin = DEFPin()
+			ilv_pin.name = pin_name
+			ilv_pin.direction = direction
+			ilv_pin.props = props
+			ilv_pin.design = self.design
+			ilv_pin.net = self
+			for layer_name, shape in shapes:
+				shape.layer = self.design.DEF.LEF.layers[layer_name] if layer_name in self.design.DEF.LEF.layers else None
+				ilv_pin.shapes.append(shape)
+			ilv_pin.pStatus = pStatus
+			ilv_pin.loc = loc
+			ilv_pin.orientation = orientation
+			self.design.pins[ilv_pin.name] = ilv_pin
+			pins.append(ilv_pin)
+
+		for (wire_num, path_num), via_idxs in record['vias'].items():
+			path_info = self.wires[wire_num].paths[path_num]
+			path_info.vias = [path_info.vias[via_idx] for via_idx in via_idxs]
+
+		for subnet_name, pin_idxs, comp_pin_idxs, wire_paths in record['nets']:
+			subnet = DEFNet()
+			subnet.name = subnet_name
+			subnet.design = self.design
+			subnet.pins = [pins[pin_idx] for pin_idx in pin_idxs]
+			subnet.compPins = [self.compPins[comp_pin_idx] for comp_pin_idx in comp_pin_idxs]
+			for paths in wire_paths:
+				subnet_wire = DEFWire()
+				subnet_wire.type = 2
+				subnet_wire.paths = [self.wires[wire_num].paths[path_num] for wire_num, path_num in paths]
+				subnet.wires.append(subnet_wire)
+			for pin in subnet.pins:
+				pin.net = subnet
+			for comp_pin in subnet.compPins:
+				comp_pin.comp.pin2net[comp_pin.pin.name] = subnet
+			self.design.nets[subnet.name] = subnet
+		return record['split']
+
+
+class DEFSection(dict):
+	"""
+	name-keyed section of a design (components, pins, nets, special nets) which converts its entries on demand.
+	names are known from the beginning, so keys(), len() and 'in' do not convert anything.
+	an entry is converted from its source (LEFDEF SWIG object or DEF statement) when it is indexed,
+	and the whole section is converted when its values are iterated (values(), items(), copy(), ...)
+	"""
+	sources: Dict[str, Any]
+	'''
+	sources of the entries not converted yet
+	'''
+	convert: Callable[[str, Any], Any]
+	'''
+	function to convert an entry from its source. called with the name and the source of the entry
+	'''
+	link: Union[Callable[[Any], None], None]
+	'''
+	function called with an entry right after it is converted (e.g., connecting the entry with the other sections)
+	'''
+	prerequisites: List[Dict[str, Any]]
+	'''
+	sections to convert before this section is fully converted (e.g., nets fill pin2net of components)
+	'''
+	converting: Set[str]
+	'''
+	names of the entries in the middle of conversion
+	'''
+
+	def __init__(self, sources: Dict[str, Any], convert: Callable[[str, Any], Any], link: Callable[[Any], None] = None, prerequisites: List[Dict[str, Any]] = None):
+		"""
+		create a section whose entries are converted on demand
+
+		:param sources: sources of the entries with their names (the order of the section follows this)
+		:param convert: function to convert an entry from its source. called with the name and the source of the entry
+		:param link: function called with an entry right after it is converted
+		:param prerequisites: sections to convert before this section is fully converted
+		"""
+		super().__init__(sources)
+		self.sources = dict(sources)
+		self.convert = convert
+		self.link = link
+		self.prerequisites = prerequisites if prerequisites is not None else []
+		self.converting = set()
+
+	def __getitem__(self, key):
+		if key not in self.sources:
+			return super().__getitem__(key)
+		if key in self.converting:
+			raise KeyError('%s is in the middle of conversion' % key)
+		self.converting.add(key)
+		try:
+			value = self.convert(key, self.sources[key])
+		finally:
+			self.converting.discard(key)
+		super().__setitem__(key, value)
+		del self.sources[key]
+		if self.link is not None:
+			self.link(value)
+		return value
+
+	def __setitem__(self, key, value):
+		self.sources.pop(key, None)
+		super().__setitem__(key, value)
+
+	def __delitem__(self, key):
+		self.sources.pop(key, None)
+		super().__delitem__(key)
+
+	def __iter__(self):
+		# defining __iter__ prevents dict(section) from copying sources without conversion
+		return super().__iter__()
+
+	def __eq__(self, other):
+		self.materialize()
+		return super().__eq__(other)
+
+	def __reduce__(self):
+		return dict, (dict(self.items()),)
+
+	def is_converting(self, key) -> bool:
+		"""
+		check whether the entry is in the middle of conversion
+
+		:param key: name of the entry
+		:return: True if the entry is being converted
+		"""
+		return key in self.converting
+
+	def num_converted(self) -> int:
+		"""
+		:return: number of entries already converted
+		"""
+		return len(self) - len(self.sources)
+
+	def materialize(self):
+		"""
+		convert all the entries not converted yet
+		"""
+		if len(self.sources) == 0:
+			return
+		for section in self.prerequisites:
+			if isinstance(section, DEFSection):
+				section.materialize()
+		for key in list(self.sources.keys()):
+			if key in self.sources and key not in self.converting:
+				self[key]
+
+	def get(self, key, default=None):
+		if key in self:
+			return self[key]
+		return default
+
+	def values(self):
+		self.materialize()
+		return super().values()
+
+	def items(self):
+		self.materialize()
+		return super().items()
+
+	def copy(self) -> Dict[str, Any]:
+		self.materialize()
+		return dict(super().items())
+
+	def pop(self, key, *default):
+		if key in self:
+			value = self[key]
+			del self[key]
+			return value
+		return super().pop(key, *default)
+
+	def popitem(self):
+		self.materialize()
+		return super().popitem()
+
+	def setdefault(self, key, default=None):
+		if key in self:
+			return self[key]
+		self[key] = default
+		return default
+
+	def update(self, *args, **kwargs):
+		for key, value in dict(*args, **kwargs).items():
+			self[key] = value
+
+
+class DEFSpatialIndex:
+	"""
+	uniform-grid spatial index of components, blockages, rows and pins in a design.
+	each kind of objects has its own grid whose bin size follows the size and the number of the objects,
+	and a grid is rebuilt when the corresponding section of the design is replaced, or objects are added to or removed from it.
+	moving objects is not detected, so call DEFDesign.invalidate_spatial_index() after moving them
+	"""
+	kinds = ['components', 'blockages', 'rows', 'pins']
+	design: 'DEFDesign'
+	'''
+	design which this index belongs to
+	'''
+	grids: Dict[str, Dict[str, Any]]
+	'''
+	kind to its grid (signature, bin size, entries, bins)
+	'''
+
+	def __init__(self, design: 'DEFDesign'):
+		"""
+		create a spatial index of the design. grids are built when they are queried for the first time
+
+		:param design: design to index
+		"""
+		self.design = design
+		self.grids = {}
+
+	def get_signature(self, kind: str) -> Tuple[int, int]:
+		"""
+		:param kind: components, blockages, rows or pins
+		:return: signature of the section of the design to detect changes
+		"""
+		section = getattr(self.design, kind)
+		return id(section), len(section)
+
+	def get_entries(self, kind: str) -> List[Tuple[Any, Tuple[int, int, int, int], Union[List['Shape'], None]]]:
+		"""
+		get objects of a kind with their bounding boxes and shapes
+
+		:param kind: components, blockages, rows or pins
+		:return: list of (object, (llx, lly, urx, ury), shapes). shapes is None if the bounding box is the exact shape of the object
+		"""
+		design = self.design
+		entries = []
+		if kind == 'components':
+			if design.component_store is not None and len(design.components) == len(design.component_store.names):
+				bboxes = design.component_store.get_bboxes().tolist()
+				for comp_name, bbox in zip(design.component_store.names, bboxes):
+					comp_info = design.components[comp_name]
+					if isinstance(comp_info.macro, LEFMacro):
+						entries.append((comp_info, tuple(bbox), None))
+			else:
+				for comp_name, comp_info in design.components.items():
+					if isinstance(comp_info.macro, LEFMacro):
+						entries.append((comp_info, (comp_info.loc.x, comp_info.loc.y, comp_info.loc.x + int(comp_info.macro.width * design.dbUnits), comp_info.loc.y + int(comp_info.macro.height * design.dbUnits)), None))
+		elif kind == 'rows':
+			for row_name, row_info in design.rows.items():
+				if row_info.site is not None:
+					entries.append((row_info, (row_info.origin.x, row_info.origin.y, row_info.origin.x + row_info.num.x * row_info.step.x, round(row_info.origin.y + row_info.site.height * design.dbUnits)), None))
+		elif kind == 'blockages':
+			for blkg in design.blockages:
+				shapes = [shape for shape in blkg.shapes if shape.rect is not None or len(shape.polygon) > 0]
+				if len(shapes) > 0:
+					entries.append((blkg, self.get_bbox(shapes), shapes))
+		elif kind == 'pins':
+			for pin_name, pin_info in design.pins.items():
+				if pin_info.loc.x is not None and pin_info.loc.y is not None:
+					shapes = [shape for shape in pin_info.get_pin_shapes_in_design() if shape.rect is not None or len(shape.polygon) > 0]
+					if len(shapes) > 0:
+						entries.append((pin_info, self.get_bbox(shapes), shapes))
+		else:
+			logger.error('unknown kind %s for spatial index. it should be one of %s' % (kind, ', '.join(self.kinds)))
+		return entries
+
+	@staticmethod
+	def get_bbox(shapes: List['Shape']) -> Tuple[Union[int, float], Union[int, float], Union[int, float], Union[int, float]]:
+		"""
+		:param shapes: shapes (rectangles or polygons)
+		:return: bounding box (llx, lly, urx, ury) of the shapes
+		"""
+		xs = []
+		ys = []
+		for shape in shapes:
+			if shape.rect is not None:
+				xs += [shape.rect.ll.x, shape.rect.ur.x]
+				ys += [shape.rect.ll.y, shape.rect.ur.y]
+			else:
+				xs += [pt.x for pt in shape.polygon]
+				ys += [pt.y for pt in shape.polygon]
+		return min(xs), min(ys), max(xs), max(ys)
+
+	def get_grid(self, kind: str) -> Dict[str, Any]:
+		"""
+		get the grid of a kind. build it if it is not built yet or the section is changed
+
+		:param kind: components, blockages, rows or pins
+		:return: grid
+		"""
+		signature = self.get_signature(kind)
+		if kind in self.grids and self.grids[kind]['signature'] == signature:
+			return self.grids[kind]
+		entries = self.get_entries(kind)
+		bin_size = 1
+		if len(entries) > 0:
+			llx = min(entry[1][0] for entry in entries)
+			lly = min(entry[1][1] for entry in entries)
+			urx = max(entry[1][2] for entry in entries)
+			ury = max(entry[1][3] for entry in entries)
+			avg_size = sum(max(entry[1][2] - entry[1][0], entry[1][3] - entry[1][1]) for entry in entries) / len(entries)
+			# about one object per bin, but a bin should not be smaller than an average object
+			bin_size = max(1, int(max(avg_size, ((urx - llx) * (ury - lly) / len(entries)) ** 0.5)))
+		bins = {}
+		for entry_idx, (obj, bbox, shapes) in enumerate(entries):
+			for bin_x in range(int(bbox[0] // bin_size), int(bbox[2] // bin_size) + 1):
+				for bin_y in range(int(bbox[1] // bin_size), int(bbox[3] // bin_size) + 1):
+					if (bin_x, bin_y) in bins:
+						bins[(bin_x, bin_y)].append(entry_idx)
+					else:
+						bins[(bin_x, bin_y)] = [entry_idx]
+		self.grids[kind] = {'signature': signature, 'bin_size': bin_size, 'entries': entries, 'bins': bins}
+		logger.info('spatial index of %d %s is built with bin size %d' % (len(entries), kind, bin_size))
+		return self.grids[kind]
+
+	def invalidate(self, kind: str = None):
+		"""
+		discard the grid of a kind (or all the grids), so it is rebuilt in the next query
+
+		:param kind: components, blockages, rows or pins. if None, all the grids are discarded
+		"""
+		if kind is None:
+			self.grids.clear()
+		else:
+			self.grids.pop(kind, None)
+
+	def query_entries(self, bbox: Tuple[Union[int, float], Union[int, float], Union[int, float], Union[int, float]], kind: str) -> List[Tuple[Any, Tuple[int, int, int, int], Union[List['Shape'], None]]]:
+		"""
+		:param bbox: (llx, lly, urx, ury) to query
+		:param kind: components, blockages, rows or pins
+		:return: entries whose bounding box overlaps or touches bbox, in the order of the section in the design
+		"""
+		grid = self.get_grid(kind)
+		bin_size = grid['bin_size']
+		bins = grid['bins']
+		entries = grid['entries']
+		num_bins = (int(bbox[2] // bin_size) - int(bbox[0] // bin_size) + 1) * (int(bbox[3] // bin_size) - int(bbox[1] // bin_size) + 1)
+		if num_bins > len(bins):
+			bins_to_visit = [bin_entries for (bin_x, bin_y), bin_entries in bins.items() if bbox[0] // bin_size <= bin_x <= bbox[2] // bin_size and bbox[1] // bin_size <= bin_y <= bbox[3] // bin_size]
+		else:
+			bins_to_visit = []
+			for bin_x in range(int(bbox[0] // bin_size), int(bbox[2] // bin_size) + 1):
+				for bin_y in range(int(bbox[1] // bin_size), int(bbox[3] // bin_size) + 1):
+					if (bin_x, bin_y) in bins:
+						bins_to_visit.append(bins[(bin_x, bin_y)])
+		entry_idxs = set()
+		for bin_entries in bins_to_visit:
+			entry_idxs.update(bin_entries)
+		found = []
+		for entry_idx in sorted(entry_idxs):
+			entry_bbox = entries[entry_idx][1]
+			if entry_bbox[0] <= bbox[2] and bbox[0] <= entry_bbox[2] and entry_bbox[1] <= bbox[3] and bbox[1] <= entry_bbox[3]:
+				found.append(entries[entry_idx])
+		return found
+
+	def query(self, rect: 'Rect', kind: str = 'components') -> List[Any]:
+		"""
+		find objects whose bounding box overlaps or touches the rectangle
+
+		:param rect: rectangle to query
+		:param kind: components, blockages, rows or pins
+		:return: list of objects (DEFComponent, DEFBlkg, DEFRow or DEFPin) in the order of the section in the design
+		"""
+		return [entry[0] for entry in self.query_entries((rect.ll.x, rect.ll.y, rect.ur.x, rect.ur.y), kind)]
+
+	def query_intersecting(self, shape: 'Shape', kind: str = 'components') -> List[Any]:
+		"""
+		find objects intersecting (or touching) the shape, same as Shape.intersects of shapely. layers of the shapes are not considered
+
+		:param shape: shape (rectangle or polygon) to query
+		:param kind: components, blockages, rows or pins
+		:return: list of objects (DEFComponent, DEFBlkg, DEFRow or DEFPin) in the order of the section in the design
+		"""
+		from shapely.geometry import Polygon
+
+		if shape.rect is None and len(shape.polygon) == 0:
+			return []
+		bbox = self.get_bbox([shape])
+		found = []
+		shape_polygon = None
+		for obj, entry_bbox, entry_shapes in self.query_entries(bbox, kind):
+			if shape.rect is not None and entry_shapes is None:
+				# rectangles whose bounding boxes overlap or touch
+				found.append(obj)
+				continue
+			if shape.rect is not None and all(entry_shape.rect is not None for entry_shape in entry_shapes):
+				if any(entry_shape.rect.ll.x <= bbox[2] and bbox[0] <= entry_shape.rect.ur.x and entry_shape.rect.ll.y <= bbox[3] and bbox[1] <= entry_shape.rect.ur.y for entry_shape in entry_shapes):
+					found.append(obj)
+				continue
+			if shape_polygon is None:
+				shape_polygon = shape.get_cached_polygon()
+			if entry_shapes is None:
+				entry_polygons = [Polygon([(entry_bbox[0], entry_bbox[1]), (entry_bbox[2], entry_bbox[1]), (entry_bbox[2], entry_bbox[3]), (entry_bbox[0], entry_bbox[3])])]
+			else:
+				entry_polygons = [entry_shape.get_cached_polygon() for entry_shape in entry_shapes]
+			if any(shape_polygon.intersects(entry_polygon) for entry_polygon in entry_polygons):
+				found.append(obj)
+		return found
+
 
 class DEFDesign:
 	"""
@@ -5249,11 +6168,11 @@ class DEFDesign:
 	'''
 	components: Dict[str, 'DEFComponent']
 	'''
-	components in the design
+	components in the design (DEFSection if the design is read lazily)
 	'''
 	pins: Dict[str, 'DEFPin']
 	'''
-	pins(ports) of the design
+	pins(ports) of the design (DEFSection if the design is read lazily)
 	'''
 	blockages: List['DEFBlkg']
 	'''
@@ -5261,11 +6180,11 @@ class DEFDesign:
 	'''
 	sNets: Dict[str, 'DEFNet']
 	'''
-	special nets in the design
+	special nets in the design (DEFSection if the design is read lazily)
 	'''
 	nets: Dict[str, 'DEFNet']
 	'''
-	nets in the design
+	nets in the design (DEFSection if the design is read lazily)
 	'''
 	histories: List[str]
 	'''
@@ -5275,18 +6194,28 @@ class DEFDesign:
 	'''
 	technology used in the design
 	'''
+	component_store: Union['DEFComponentStore', None]
+	'''
+	columnar store of the components (see attach_component_store). None if components are plain python objects
+	'''
+	spatial_index: Union['DEFSpatialIndex', None]
+	'''
+	spatial index of the objects in the design (see get_spatial_index). None if it is not used yet
+	'''
 	props: Dict[str, Any]
 	'''
 	user-defined properties
 	'''
 
-	def __init__(self, swig_ref: LEFDEF.DEFDesign = None, DEF: 'DEF' = None, exclude_wires: bool = False, verilog_ref = None):
+	def __init__(self, swig_ref: LEFDEF.DEFDesign = None, DEF: 'DEF' = None, exclude_wires: bool = False, verilog_ref = None, lazy: bool = False):
 		"""
 		create a design in DEF
 
 		:param swig_ref: imported DEFDesign from LEFDEF C++ library, if not specified, create empty object
 		:param DEF: DEF which this design belongs to
 		:param exclude_wires: exclude wire shapes from DEF file. connection information will still remain
+		:param lazy: convert components, pins, special nets and nets from swig_ref only when they are accessed (see DEFSection).
+			pin2net of a component indexed alone is filled only when the nets connected to it are converted. call materialize() to convert everything
 		"""
 		if swig_ref is None and verilog_ref is None:
 			self.DEF = None
@@ -5352,15 +6281,25 @@ class DEFDesign:
 			else:
 				self.vias = {via_name: LEFVia(swig_ref=via) for via_name, via in dict(swig_ref.vias).items()}
 			self.viarules = {viarule_name: DEFViaRule(swig_ref=viarule_info, design=self) for viarule_name, viarule_info in dict(swig_ref.viarules).items()}
-			self.components = {comp_name: DEFComponent(swig_ref=comp_info, design=self) for comp_name, comp_info in dict(swig_ref.components).items()}
-			self.pins = {pin_name: DEFPin(swig_ref=pin_info, design=self) for pin_name, pin_info in dict(swig_ref.pins).items()}
-			self.blockages = [DEFBlkg(swig_ref=blkg, design=self) for blkg in list(swig_ref.blockages)]
-			self.sNets = {snet_name: DEFNet(swig_ref=snet_info, design=self, exclude_wires=exclude_wires) for snet_name, snet_info in dict(swig_ref.sNets).items()}
-			self.nets = {net_name: DEFNet(swig_ref=net_info, design=self, exclude_wires=exclude_wires) for net_name, net_info in dict(swig_ref.nets).items()}
-			# normally most of connection between pin and net can be covered by net init function only, but for special nets, they do not explicitly covers connection between pins and special nets, and their connections are covered in pins section only
-			self.connect_pin_net()
+			if lazy:
+				self.sNets = DEFSection(dict(swig_ref.sNets), lambda snet_name, snet_info: DEFNet(swig_ref=snet_info, design=self, exclude_wires=exclude_wires))
+				self.nets = DEFSection(dict(swig_ref.nets), lambda net_name, net_info: DEFNet(swig_ref=net_info, design=self, exclude_wires=exclude_wires))
+				# iterating all the components converts all the nets first to fill pin2net, and pins are connected to their nets when they are converted (see connect_pin)
+				self.components = DEFSection(dict(swig_ref.components), lambda comp_name, comp_info: DEFComponent(swig_ref=comp_info, design=self), prerequisites=[self.sNets, self.nets])
+				self.pins = DEFSection(dict(swig_ref.pins), lambda pin_name, pin_info: DEFPin(swig_ref=pin_info, design=self), self.connect_pin)
+				self.blockages = [DEFBlkg(swig_ref=blkg, design=self) for blkg in list(swig_ref.blockages)]
+			else:
+				self.components = {comp_name: DEFComponent(swig_ref=comp_info, design=self) for comp_name, comp_info in dict(swig_ref.components).items()}
+				self.pins = {pin_name: DEFPin(swig_ref=pin_info, design=self) for pin_name, pin_info in dict(swig_ref.pins).items()}
+				self.blockages = [DEFBlkg(swig_ref=blkg, design=self) for blkg in list(swig_ref.blockages)]
+				self.sNets = {snet_name: DEFNet(swig_ref=snet_info, design=self, exclude_wires=exclude_wires) for snet_name, snet_info in dict(swig_ref.sNets).items()}
+				self.nets = {net_name: DEFNet(swig_ref=net_info, design=self, exclude_wires=exclude_wires) for net_name, net_info in dict(swig_ref.nets).items()}
+				# normally most of connection between pin and net can be covered by net init function only, but for special nets, they do not explicitly covers connection between pins and special nets, and their connections are covered in pins section only
+				self.connect_pin_net()
 			self.histories = list(swig_ref.histories)
 			self.technology = swig_ref.technology
+		self.component_store = None
+		self.spatial_index = None
 		self.props = {}
 
 	def __setitem__(self, key, value):
@@ -5384,6 +6323,8 @@ class DEFDesign:
 		:return: DEFDesign in LEFDEF C++ library
 		"""
 		logger.info('convert DEF to C structure for SWIG DEF')
+		# pin2net of components should be complete before they are exported
+		self.materialize()
 		targ = LEFDEF.DEFDesign()
 		targ.pDEF = DEF
 		targ.name = self.name
@@ -5405,12 +6346,15 @@ class DEFDesign:
 		targ.technology = self.technology
 		return targ
 
-	def copy(self, DEF: 'DEF', exclude_wires: bool = False) -> 'DEFDesign':
+	def copy(self, DEF: 'DEF', exclude_wires: bool = False, lazy: bool = False, exclude_sNets: bool = False) -> 'DEFDesign':
 		"""
 		copy the object
 
 		:param DEF: DEF object that this design belongs to
 		:param exclude_wires: exclude wire shapes from copying. connection information will still remain
+		:param lazy: copy components, pins, special nets and nets only when they are accessed in the copied design (see DEFSection).
+			entries which are never accessed are never copied. this design should not be modified until the copied design is materialized
+		:param exclude_sNets: exclude special nets from copying. pin2net of components will not have the pins connected to special nets
 		:return: copied object
 		"""
 		logger.info('copying DEF design %s' % self.name)
@@ -5425,12 +6369,27 @@ class DEFDesign:
 		cp.gCellGrids = [gcellgrid.copy() for gcellgrid in self.gCellGrids]
 		cp.vias = {via_name: via_info.copy(DEF.LEF) for via_name, via_info in self.vias.items()}
 		cp.viarules = {viarule_name: viarule_info.copy(cp) for viarule_name, viarule_info in self.viarules.items()}
-		cp.components = {comp_name: comp_info.copy(cp) for comp_name, comp_info in self.components.items()}
-		cp.pins = {pin_name: pin_info.copy(cp) for pin_name, pin_info in self.pins.items()}
-		cp.blockages = [blockage.copy(cp) for blockage in self.blockages]
-		cp.sNets = {snet_name: snet_info.copy(cp) for snet_name, snet_info in self.sNets.items()}
-		cp.nets = {net_name: net_info.copy(cp, exclude_wires) for net_name, net_info in self.nets.items()}
-		cp.connect_pin_net()
+
+		def connect_pin(pin_info: 'DEFPin'):
+			# pins of the excluded special nets stay unconnected
+			if not exclude_sNets or pin_info.net_name not in self.sNets:
+				cp.connect_pin(pin_info)
+
+		if lazy:
+			# the same dependencies as the lazy conversion from LEFDEF SWIG (nets fill pin2net of components, pins are connected to nets)
+			cp.sNets = DEFSection(dict.fromkeys(self.sNets if not exclude_sNets else {}), lambda snet_name, snet_info: self.sNets[snet_name].copy(cp))
+			cp.nets = DEFSection(dict.fromkeys(self.nets), lambda net_name, net_info: self.nets[net_name].copy(cp, exclude_wires))
+			cp.components = DEFSection(dict.fromkeys(self.components), lambda comp_name, comp_info: self.components[comp_name].copy(cp), prerequisites=[cp.sNets, cp.nets])
+			cp.pins = DEFSection(dict.fromkeys(self.pins), lambda pin_name, pin_info: self.pins[pin_name].copy(cp), connect_pin)
+			cp.blockages = [blockage.copy(cp) for blockage in self.blockages]
+		else:
+			cp.components = {comp_name: comp_info.copy(cp) for comp_name, comp_info in self.components.items()}
+			cp.pins = {pin_name: pin_info.copy(cp) for pin_name, pin_info in self.pins.items()}
+			cp.blockages = [blockage.copy(cp) for blockage in self.blockages]
+			cp.sNets = {snet_name: snet_info.copy(cp) for snet_name, snet_info in self.sNets.items()} if not exclude_sNets else {}
+			cp.nets = {net_name: net_info.copy(cp, exclude_wires) for net_name, net_info in self.nets.items()}
+			for pin_name, pin_info in cp.pins.items():
+				connect_pin(pin_info)
 		cp.histories = self.histories[:]
 		cp.technology = self.technology
 		cp.props = self.props.copy()
@@ -5466,17 +6425,76 @@ class DEFDesign:
 		and their connections are covered in pins section only
 		"""
 		for pin_name, pin_info in self.pins.items():
-			if pin_info.net is None:
-				if pin_info.net_name in self.sNets:
-					pin_info.net = self.sNets[pin_info.net_name]
-					if pin_info not in pin_info.net.pins:
-						pin_info.net.pins.append(pin_info)
-				elif pin_info.net_name in self.nets:
-					pin_info.net = self.nets[pin_info.net_name]
-					if pin_info not in pin_info.net.pins:
-						pin_info.net.pins.append(pin_info)
-				else:
-					logger.warning('design pin %s is not connnected any of the regular/special nets. cannot find net \'%s\' in this design' % (pin_name, pin_info.net_name))
+			self.connect_pin(pin_info)
+
+	def connect_pin(self, pin_info: 'DEFPin'):
+		"""
+		connect a pin to the regular/special net specified by its net_name if it is not connected yet.
+		when nets are lazily converted (DEFSection), the net is converted here, and a net in the middle of conversion is skipped since it connects its pins by itself
+
+		:param pin_info: pin to connect
+		"""
+		if pin_info.net is not None:
+			return
+		for nets in [self.sNets, self.nets]:
+			if pin_info.net_name in nets:
+				if isinstance(nets, DEFSection) and nets.is_converting(pin_info.net_name):
+					return
+				net = nets[pin_info.net_name]
+				if pin_info.net is None:
+					pin_info.net = net
+				if pin_info not in pin_info.net.pins:
+					pin_info.net.pins.append(pin_info)
+				return
+		logger.warning('design pin %s is not connnected any of the regular/special nets. cannot find net \'%s\' in this design' % (pin_info.name, pin_info.net_name))
+
+	def attach_component_store(self) -> 'DEFComponentStore':
+		"""
+		move location, orientation, placement status and macro of all the components to a columnar store (requires NumPy).
+		components keep working as before, and bulk operations (e.g., scale, get_bboxes of the store) are vectorized
+
+		:return: component store
+		"""
+		if self.component_store is not None:
+			self.component_store.detach()
+		self.component_store = DEFComponentStore(self)
+		return self.component_store
+
+	def detach_component_store(self):
+		"""
+		move the values in the columnar store back to the components
+		"""
+		if self.component_store is not None:
+			self.component_store.detach()
+			self.component_store = None
+
+	def get_spatial_index(self) -> 'DEFSpatialIndex':
+		"""
+		get the spatial index of components, blockages, rows and pins in the design (e.g., design.get_spatial_index().query_intersecting(shape, 'components')).
+		the index is built lazily, and rebuilt when objects are added to or removed from the design
+
+		:return: spatial index
+		"""
+		if self.spatial_index is None:
+			self.spatial_index = DEFSpatialIndex(self)
+		return self.spatial_index
+
+	def invalidate_spatial_index(self, kind: str = None):
+		"""
+		discard the spatial index after objects are moved or reshaped
+
+		:param kind: components, blockages, rows or pins. if None, the index of all the kinds are discarded
+		"""
+		if self.spatial_index is not None:
+			self.spatial_index.invalidate(kind)
+
+	def materialize(self):
+		"""
+		convert all the lazily converted sections (see DEFSection). nets are converted first so that pins and components get their connections
+		"""
+		for section in [self.sNets, self.nets, self.pins, self.components]:
+			if isinstance(section, DEFSection):
+				section.materialize()
 
 	def write_def(self, def_file: str, floorplan_only: bool = False):
 		"""
@@ -5495,150 +6513,111 @@ class DEFDesign:
 		"""
 		write verilog file of the specified design
 
-		:param verilog_file: filename to write
+		:param verilog_file: filename to write (gzipped if it ends with .gz)
 		"""
+		import gzip
+		self.materialize()
 
-		# group top-level IO port bits into bus port
-		grouped_pins = {}
-		pin_names_excl_pwr_gnd = list(filter(lambda pin_name: self.pins[pin_name].type != 2 and self.pins[pin_name].type != 3, self.pins.keys()))
-		for pin_num, pin_name in enumerate(pin_names_excl_pwr_gnd):
-			if self.pins[pin_name].type != 2 and self.pins[pin_name].type != 3:
-				match = re.match(r'(?P<bus_name>\S+)'+re.escape(self.DEF.busBitChars[0])+r'(?P<bus_bit>\d+)'+re.escape(self.DEF.busBitChars[1]), pin_name)
+		bus_pattern = re.compile(r'(?P<bus_name>\S+)' + re.escape(self.DEF.busBitChars[0]) + r'(?P<bus_bit>\d+)' + re.escape(self.DEF.busBitChars[1]))
+
+		def group_bus_bits(names: List[str], directions: List[int] = None) -> Tuple[Dict[str, Dict[str, Any]], List[Tuple[str, Union[int, None]]]]:
+			"""
+			group bits into buses
+
+			:param names: names of pins or nets
+			:param directions: directions of pins (if given, 'direction' of the group is the direction of its first bit)
+			:return: (grouped name:{'is_bus', 'max_bit', 'min_bit', 'direction'}, list of (grouped name, bit (None if not a bus)) for each name)
+			"""
+			grouped = {}
+			bits = []
+			for num, name in enumerate(names):
+				match = bus_pattern.match(name)
 				if match is not None:
 					bus_name = match['bus_name']
 					bus_bit = int(match['bus_bit'])
-					if bus_name in grouped_pins:
-						if grouped_pins[bus_name]['max_bit'] < bus_bit:
-							grouped_pins[bus_name]['max_bit'] = bus_bit
-						if grouped_pins[bus_name]['min_bit'] > bus_bit:
-							grouped_pins[bus_name]['min_bit'] = bus_bit
+					if bus_name in grouped:
+						if grouped[bus_name]['max_bit'] < bus_bit:
+							grouped[bus_name]['max_bit'] = bus_bit
+						if grouped[bus_name]['min_bit'] > bus_bit:
+							grouped[bus_name]['min_bit'] = bus_bit
 					else:
-						grouped_pins[bus_name] = {}
-						grouped_pins[bus_name]['is_bus'] = True
-						grouped_pins[bus_name]['direction'] = self.pins[pin_name].direction
-						grouped_pins[bus_name]['max_bit'] = bus_bit
-						grouped_pins[bus_name]['min_bit'] = bus_bit
+						grouped[bus_name] = {'is_bus': True, 'max_bit': bus_bit, 'min_bit': bus_bit}
+						if directions is not None:
+							grouped[bus_name]['direction'] = directions[num]
+					bits.append((bus_name, bus_bit))
 				else:
-					grouped_pins[pin_name] = {}
-					grouped_pins[pin_name]['is_bus'] = False
-					grouped_pins[pin_name]['direction'] = self.pins[pin_name].direction
+					grouped[name] = {'is_bus': False}
+					if directions is not None:
+						grouped[name]['direction'] = directions[num]
+					bits.append((name, None))
+			return grouped, bits
+
+		def get_bus_range(group_info: Dict[str, Any]) -> str:
+			return '%s%d:%d%s ' % (self.DEF.busBitChars[0], group_info['max_bit'], group_info['min_bit'], self.DEF.busBitChars[1])
+
+		# group top-level IO port bits into bus port
+		pin_names_excl_pwr_gnd = [pin_name for pin_name, pin_info in self.pins.items() if pin_info.type != 2 and pin_info.type != 3]
+		grouped_pins, _ = group_bus_bits(pin_names_excl_pwr_gnd, [self.pins[pin_name].direction for pin_name in pin_names_excl_pwr_gnd])
 
 		# group top-level wire bits into bus wire
-		grouped_nets = {}
-		for net_name, net_info in self.nets.items():
-			if net_info.type != 2 and net_info.type != 3:
-				match = re.match(r'(?P<bus_name>\S+)'+re.escape(self.DEF.busBitChars[0])+r'(?P<bus_bit>\d+)'+re.escape(self.DEF.busBitChars[1]), net_name)
-				if match is not None:
-					bus_name = match['bus_name']
-					bus_bit = int(match['bus_bit'])
-					if bus_name in grouped_nets:
-						if grouped_nets[bus_name]['max_bit'] < bus_bit:
-							grouped_nets[bus_name]['max_bit'] = bus_bit
-						if grouped_nets[bus_name]['min_bit'] > bus_bit:
-							grouped_nets[bus_name]['min_bit'] = bus_bit
-					else:
-						grouped_nets[bus_name] = {}
-						grouped_nets[bus_name]['is_bus'] = True
-						grouped_nets[bus_name]['max_bit'] = bus_bit
-						grouped_nets[bus_name]['min_bit'] = bus_bit
-				else:
-					grouped_nets[net_name] = {}
-					grouped_nets[net_name]['is_bus'] = False
+		grouped_nets, _ = group_bus_bits([net_name for net_name, net_info in self.nets.items() if net_info.type != 2 and net_info.type != 3])
 
 		logger.info('start writing verilog file %s' % verilog_file)
-		ofp = flow_file_utils.open_wfile(verilog_file, force=True)
-		ofp.write('module %s (\n' % self.name)
-		for pin_num, pin_name in enumerate(grouped_pins):
-			ofp.write('\t%s' % (pin_name))
-			if pin_num < len(list(grouped_pins)) - 1:
-				ofp.write(',')
-			ofp.write('\n')
-		ofp.write(');\n\n')
+		if verilog_file.endswith('.gz'):
+			os.makedirs(os.path.dirname(os.path.abspath(verilog_file)), exist_ok=True)
+			ofp = gzip.open(verilog_file, 'wt', compresslevel=6)
+		else:
+			ofp = flow_file_utils.open_wfile(verilog_file, force=True)
+		# lines are buffered and written in large chunks
+		lines = ['module %s (\n' % self.name]
+		if len(grouped_pins) > 0:
+			lines.append('\t%s\n' % ',\n\t'.join(grouped_pins))
+		lines.append(');\n\n')
 		for pin_name, pin_info in grouped_pins.items():
-			if pin_info['direction'] == 0:
-				ofp.write('input ')
-			else:
-				ofp.write('output ')
-			if pin_info['is_bus']:
-				ofp.write('%s%s:%s%s ' % (self.DEF.busBitChars[0], str(pin_info['max_bit']), str(pin_info['min_bit']), self.DEF.busBitChars[1]))
-			ofp.write('%s;\n' % (pin_name))
-		ofp.write('\n')
+			lines.append('%s %s%s;\n' % ('input' if pin_info['direction'] == 0 else 'output', get_bus_range(pin_info) if pin_info['is_bus'] else '', pin_name))
+		lines.append('\n')
 		for net_name, net_info in grouped_nets.items():
-			ofp.write('wire ')
-			if net_info['is_bus']:
-				ofp.write('%s%s:%s%s ' % (self.DEF.busBitChars[0], str(net_info['max_bit']), str(net_info['min_bit']), self.DEF.busBitChars[1]))
-			ofp.write('%s;\n' % (net_name))
-		ofp.write('\n')
+			lines.append('wire %s%s;\n' % (get_bus_range(net_info) if net_info['is_bus'] else '', net_name))
+		lines.append('\n')
 		for pin_name in pin_names_excl_pwr_gnd:
 			pin_info = self.pins[pin_name]
 			if pin_info.net is not None and pin_info.name != pin_info.net.name:
 				if pin_info.direction == 0:
-					ofp.write('assign %s = %s;\n' % (pin_info.net.name, pin_info.name))
+					lines.append('assign %s = %s;\n' % (pin_info.net.name, pin_info.name))
 				else:
-					ofp.write('assign %s = %s;\n' % (pin_info.name, pin_info.net.name))
-		ofp.write('\n')
+					lines.append('assign %s = %s;\n' % (pin_info.name, pin_info.net.name))
+		lines.append('\n')
+
+		# group component port bits into component bus port. every instance of a macro has the same grouping
+		macro_groups = {}
 		for comp_name, comp_info in self.components.items():
-			# group component port bits into component bus port
-			grouped_compPins = {}
-			pin_names_excl_pwr_gnd = list(filter(lambda pin_name: comp_info.macro.pins[pin_name].type != 2 and comp_info.macro.pins[pin_name].type != 3, comp_info.macro.pins.keys()))
-			for pin_num, pin_name in enumerate(pin_names_excl_pwr_gnd):
-				match = re.match(r'(?P<bus_name>\S+)' + re.escape(self.DEF.busBitChars[0]) + r'(?P<bus_bit>\d+)' + re.escape(self.DEF.busBitChars[1]), pin_name)
-				if match is not None:
-					bus_name = match['bus_name']
-					bus_bit = int(match['bus_bit'])
-					if bus_name in grouped_compPins:
-						if grouped_compPins[bus_name]['max_bit'] < bus_bit:
-							grouped_compPins[bus_name]['max_bit'] = bus_bit
-						if grouped_compPins[bus_name]['min_bit'] > bus_bit:
-							grouped_compPins[bus_name]['min_bit'] = bus_bit
-					else:
-						grouped_compPins[bus_name] = {}
-						grouped_compPins[bus_name]['is_bus'] = True
-						grouped_compPins[bus_name]['direction'] = comp_info.macro.pins[pin_name].direction
-						grouped_compPins[bus_name]['max_bit'] = bus_bit
-						grouped_compPins[bus_name]['min_bit'] = bus_bit
-						grouped_compPins[bus_name]['conn'] = []
-				else:
-					grouped_compPins[pin_name] = {}
-					grouped_compPins[pin_name]['is_bus'] = False
-					grouped_compPins[pin_name]['direction'] = comp_info.macro.pins[pin_name].direction
+			macro = comp_info.macro
+			if id(macro) not in macro_groups:
+				macro_pin_names = [pin_name for pin_name, pin_info in macro.pins.items() if pin_info.type != 2 and pin_info.type != 3]
+				grouped_compPins, bits = group_bus_bits(macro_pin_names)
+				# macro is kept in the value so that its id is not reused while writing
+				macro_groups[id(macro)] = (macro, macro_pin_names, grouped_compPins, bits)
+			_, macro_pin_names, grouped_compPins, bits = macro_groups[id(macro)]
 
 			# establish connections component pins -> nets
-			for pin_name, pin_info in grouped_compPins.items():
-				if pin_info['is_bus']:
-					pin_info['conn'] = ['']*(pin_info['max_bit']-pin_info['min_bit']+1)
+			conns = {group_name: [''] * (group_info['max_bit'] - group_info['min_bit'] + 1) if group_info['is_bus'] else '' for group_name, group_info in grouped_compPins.items()}
+			pin2net = comp_info.pin2net
+			for pin_name, (group_name, bit) in zip(macro_pin_names, bits):
+				net_name = pin2net[pin_name].name if pin_name in pin2net else ''
+				if bit is None:
+					conns[group_name] = net_name
 				else:
-					pin_info['conn'] = ['']
-			for pin_num, pin_name in enumerate(pin_names_excl_pwr_gnd):
-				match = re.match(r'(?P<bus_name>\S+)' + re.escape(self.DEF.busBitChars[0]) + r'(?P<bus_bit>\d+)' + re.escape(self.DEF.busBitChars[1]), pin_name)
-				if match is not None:
-					bus_name = match['bus_name']
-					bus_bit = int(match['bus_bit'])
-					if pin_name in comp_info.pin2net:
-						grouped_compPins[bus_name]['conn'][bus_bit-grouped_compPins[bus_name]['min_bit']] = comp_info.pin2net[pin_name].name
-					else:
-						grouped_compPins[bus_name]['conn'][bus_bit-grouped_compPins[bus_name]['min_bit']] = ''
-				else:
-					if pin_name in comp_info.pin2net:
-						grouped_compPins[pin_name]['conn'] = comp_info.pin2net[pin_name].name
-					else:
-						grouped_compPins[pin_name]['conn'] = ''
+					conns[group_name][bit - grouped_compPins[group_name]['min_bit']] = net_name
 
 			# write component instantiation statement
-			ofp.write('%s %s' % (comp_info.macro.name, comp_name))
-			ofp.write('( ')
-			for pin_num, pin_name in enumerate(grouped_compPins):
-				pin_info = grouped_compPins[pin_name]
-				if pin_info['is_bus']:
-					ofp.write('.%s(%s)' % (pin_name, '{'+', '.join(reversed(pin_info['conn']))+'}'))
-				else:
-					ofp.write('.%s(%s)' % (pin_name, pin_info['conn']))
-				if pin_num < len(grouped_compPins) - 1:
-					ofp.write(',')
-				ofp.write(' ')
-			ofp.write(');\n')
-		ofp.write('\n')
-		ofp.write('endmodule\n')
+			ports = ['.%s({%s})' % (group_name, ', '.join(reversed(conn))) if grouped_compPins[group_name]['is_bus'] else '.%s(%s)' % (group_name, conn) for group_name, conn in conns.items()]
+			lines.append('%s %s( %s%s);\n' % (macro.name, comp_name, ', '.join(ports), ' ' if len(ports) > 0 else ''))
+			if len(lines) >= 10000:
+				ofp.write(''.join(lines))
+				lines = []
+		lines.append('\n')
+		lines.append('endmodule\n')
+		ofp.write(''.join(lines))
 		ofp.close()
 		logger.info('writing %s done' % verilog_file)
 
@@ -5791,7 +6770,8 @@ class DEFDesign:
 			ifp.close()
 
 		num_partitions = len(partitions)
-		part_def = self.DEF.copy(self.name, exclude_wires=True)
+		# every pin, component and net is moved to the partitions, special nets are not
+		part_def = self.DEF.copy(self.name, exclude_wires=True, exclude_sNets=True)
 		cur_design = part_def.designs[self.name]
 		part_design_names = []
 		for part_num in range(num_partitions):
@@ -5922,9 +6902,15 @@ class DEFDesign:
 		self.gCellGrids.clear()
 
 		logger.info('changing the location of instances')
-		for comp_name, comp_info in self.components.items():
-			if comp_info.pStatus != -1 or comp_info.pStatus != 3:
-				comp_info.loc.scale(scale_factor, snap_spacing=int(self.dbUnits * self.DEF.LEF.manufacturingGrid))
+		if self.component_store is not None and int(self.dbUnits * self.DEF.LEF.manufacturingGrid) != 0:
+			self.component_store.scale(scale_factor, snap_spacing=int(self.dbUnits * self.DEF.LEF.manufacturingGrid))
+			# components added after the store is created
+			for comp_name in self.components.keys() - self.component_store.index.keys():
+				self.components[comp_name].loc.scale(scale_factor, snap_spacing=int(self.dbUnits * self.DEF.LEF.manufacturingGrid))
+		else:
+			for comp_name, comp_info in self.components.items():
+				if comp_info.pStatus != -1 or comp_info.pStatus != 3:
+					comp_info.loc.scale(scale_factor, snap_spacing=int(self.dbUnits * self.DEF.LEF.manufacturingGrid))
 
 		logger.info('changing the location of pins')
 		for pin_name, pin_info in self.pins.items():
@@ -5935,6 +6921,7 @@ class DEFDesign:
 		for blockage in self.blockages:
 			for shape in blockage.shapes:
 				shape.scale(scale_factor, snap_spacing=int(self.dbUnits * self.DEF.LEF.manufacturingGrid))
+		self.invalidate_spatial_index()
 
 		for snet_name, snet_info in self.sNets.items():
 			snet_info.wires.clear()
@@ -5946,7 +6933,50 @@ class DEFDesign:
 				if re.match('FE_CORE_BOX_(LL|UR)_[XY]', prop.name):
 					prop.doubleValue = prop.doubleValue * scale_factor
 
-	def split_by_cutLayer(self, split_cutLayer_names: List[str], maps_3d_to_2d: Dict[str, Dict[str, Tuple[int, str]]], split_lef: 'LEF', row_splitting: bool = False, split_names: List[str] = None, exclude_wires: bool = False) -> 'DEF':
+	def split_nets_by_cutLayer_in_workers(self, cur_design: 'DEFDesign', split_cutLayer_names: List[str], macro_map_3d_to_2d: Dict[str, Tuple[int, str]], row_splitting: bool, workers: int):
+		"""
+		split nets of cur_design by cut layers in worker processes. same as calling DEFNet.split_by_cutLayers for each net in order.
+		workers are forked, so they inherit cur_design and only net names and split results are transferred.
+		results are applied in the order of nets, so the design is the same as the one split in a single process
+
+		:param cur_design: design whose nets are split
+		:param split_cutLayer_names: list of cut layer names which the nets are split
+		:param macro_map_3d_to_2d: 3D macro name:(tier_num, 2D macro name)
+		:param row_splitting: when 3D DEF, whether the design is using half height macros (used in compact2D)
+		:param workers: number of worker processes
+		"""
+		import gc
+		import multiprocessing
+		global split_worker_context
+
+		if isinstance(cur_design.nets, DEFSection):
+			cur_design.nets.materialize()
+		targ_net_names = [net_name for net_name, net_info in cur_design.nets.items() if len(net_info.get_existing_cutLayers(split_cutLayer_names)) > 0]
+		logger.info('number of nets to split: %d (%d workers)' % (len(targ_net_names), workers))
+
+		split_worker_context = (cur_design, split_cutLayer_names, macro_map_3d_to_2d, row_splitting)
+		# objects inherited by the workers are moved out of the garbage collector,
+		# otherwise collections in the workers touch (and copy) every object of the design
+		gc.collect()
+		gc.freeze()
+		pool = multiprocessing.get_context('fork').Pool(workers)
+		gc.unfreeze()
+		try:
+			records = pool.imap(get_split_record_in_worker, targ_net_names, chunksize=max(1, len(targ_net_names) // (workers * 16)))
+			init_progress(len(targ_net_names))
+			for i, (net_name, record) in enumerate(zip(targ_net_names, records)):
+				progress_str = get_progress_str(i)
+				if progress_str is not None:
+					logger.info(progress_str)
+				if cur_design.nets[net_name].apply_split_record(record):
+					del cur_design.nets[net_name]
+			pool.close()
+		finally:
+			pool.terminate()
+			pool.join()
+			split_worker_context = None
+
+	def split_by_cutLayer(self, split_cutLayer_names: List[str], maps_3d_to_2d: Dict[str, Dict[str, Tuple[int, str]]], split_lef: 'LEF', row_splitting: bool = False, split_names: List[str] = None, exclude_wires: bool = False, workers: int = 1) -> 'DEF':
 		"""
 		split the design vertically into multiple design at the given 'split_layer_names'.
 
@@ -5956,11 +6986,16 @@ class DEFDesign:
 		:param row_splitting: when 3D DEF, whether the design is using half height macros (used in compact2D)
 		:param split_names: the name of resulting split designs
 		:param exclude_wires: exclude wire shapes from DEF file. connection information will still remain
+		:param workers: number of worker processes to split nets. if larger than 1, nets are split in parallel and the result is the same as a single process
 		:return: new DEF with split design in it
 		"""
+		import multiprocessing
+
 		logger.info('start splitting design by cut layers: %s' % list(split_cutLayer_names))
 		num_splits = len(split_cutLayer_names) + 1
-		temp_def = self.DEF.copy(self.name)
+		# every pin, component and net is moved to split_def with split_lef, special nets are not.
+		# temp_def is discarded after splitting, so it shares LEF which is only read (3D macros, layers and vias are mapped to split_lef)
+		temp_def = self.DEF.copy(self.name, exclude_sNets=True, share_LEF=True)
 		cur_design = temp_def.designs[self.name]
 		split_design_names = []
 		for split_num in range(num_splits):
@@ -5977,30 +7012,19 @@ class DEFDesign:
 		init_progress(num_nets)
 
 		logger.info('total number of nets in the design: %d' % num_nets)
-		for i, net_name in enumerate(list(cur_design.nets)):
-			progress_str = get_progress_str(i)
-			if progress_str is not None:
-				logger.info(progress_str)
-
-			net_info = cur_design.nets[net_name]
-			targ_cutLayer_names = net_info.get_existing_cutLayers(split_cutLayer_names)
+		if workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+			logger.warning('worker processes cannot be forked on this platform. nets are split in a single process')
+			workers = 1
+		if workers > 1:
+			self.split_nets_by_cutLayer_in_workers(cur_design, split_cutLayer_names, maps_3d_to_2d['macro'], row_splitting, workers)
+		else:
+			for i, net_name in enumerate(list(cur_design.nets)):
+				progress_str = get_progress_str(i)
+				if progress_str is not None:
+					logger.info(progress_str)
 
-			# if there are multiple cutLayers to split, it is possible that split net can be split further by other cutLayers
-			targ_nets = []
-			targ_nets.append(net_info)
-			for cutlayer in targ_cutLayer_names:
-				subnet_names = []
-				for net in targ_nets:
-					subnet_names += net.split_by_cutLayer(cutlayer, row_splitting, maps_3d_to_2d['macro'])
-
-				targ_nets = []
-				for subnet_name in subnet_names:
-					subnet_info = cur_design.nets[subnet_name]
-					if len(subnet_info.get_existing_cutLayers(targ_cutLayer_names)) > 0:
-						targ_nets.append(subnet_info)
-
-			if len(targ_cutLayer_names) > 0:
-				del cur_design.nets[net_name]
+				if cur_design.nets[net_name].split_by_cutLayers(split_cutLayer_names, row_splitting, maps_3d_to_2d['macro']):
+					del cur_design.nets[net_name]
 		logger.info('end splitting nets')
 
 		logger.info('create split designs')
@@ -6174,6 +7198,728 @@ class DEFDesign:
 
 
 
+class DEFStreamReader:
+	"""
+	reads a DEF file and fills DEFDesign directly in a single pass (without LEFDEF SWIG).
+	LEFDEF SWIG path exports the current DEF to C++ structure, reads the DEF file and converts everything back to python structure,
+	this reader tokenizes the DEF file as a stream and creates each python object only once.
+	supported statements/sections: VERSION, DIVIDERCHAR, BUSBITCHARS, DESIGN, TECHNOLOGY, UNITS, HISTORY, PROPERTYDEFINITIONS, DIEAREA, ROW, TRACKS, GCELLGRID, VIAS, COMPONENTS, PINS, BLOCKAGES, SPECIALNETS, NETS
+	other sections are skipped
+	"""
+	DEF: 'DEF'
+	'''
+	DEF which the design read belongs to
+	'''
+	exclude_wires: bool
+	'''
+	exclude wire shapes from DEF file. connection information will still remain
+	'''
+	lazy: bool
+	'''
+	keep the statements of components, pins, special nets and nets, and convert them only when they are accessed (see DEFSection)
+	'''
+
+	token_re = re.compile(r'"[^"]*"|\S+')
+	reserved_tokens = {'', ';', 'END', 'BEGINEXT', 'ENDEXT', '(', ')', '+', '-', '*'}
+	skipped_sections = {'REGIONS', 'GROUPS', 'FILLS', 'SLOTS', 'STYLES', 'NONDEFAULTRULES', 'SCANCHAINS', 'PINPROPERTIES', 'COMPONENTMASKSHIFT'}
+	orientations = {'N': 0, 'W': 1, 'S': 2, 'E': 3, 'FN': 4, 'FW': 5, 'FS': 6, 'FE': 7}
+	directions = {'X': 0, 'Y': 1}
+	comp_sources = {'NETLIST': 0, 'DIST': 1, 'TIMING': 2, 'USER': 3}
+	comp_pStatuses = {'FIXED': 0, 'COVER': 1, 'PLACED': 2, 'UNPLACED': 3}
+	pin_pStatuses = {'COVER': 0, 'FIXED': 1, 'PLACED': 2}
+	pin_directions = {'INPUT': 0, 'OUTPUT': 1, 'INOUT': 2, 'FEEDTHRU': 3}
+	uses = {'ANALOG': 0, 'CLOCK': 1, 'GROUND': 2, 'POWER': 3, 'RESET': 4, 'SCAN': 5, 'SIGNAL': 6, 'TIEOFF': 7}
+	net_sources = {'NETLIST': 0, 'DIST': 1, 'TIMING': 2, 'USER': 3, 'TEST': 4}
+	net_patterns = {'BALANCED': 0, 'STEINER': 1, 'TRUNK': 2, 'WIREDLOGIC': 3}
+	wire_types = {'COVER': 0, 'FIXED': 1, 'ROUTED': 2, 'NOSHIELD': 2, 'SHIELD': 2}
+	snet_shapes = {'RING': 0, 'PADRING': 1, 'BLOCKRING': 2, 'STRIPE': 3, 'FOLLOWPIN': 4, 'IOWIRE': 5, 'COREWIRE': 6, 'BLOCKWIRE': 7, 'FILLWIRE': 8, 'BLOCKAGEWIRE': 9, 'DRCFILL': 10}
+	prop_objTypes = {'COMPONENT': 0, 'COMPONENTPIN': 1, 'DESIGN': 2, 'GROUP': 3, 'NET': 4, 'NONDEFAULTRULE': 5, 'REGION': 6, 'ROW': 7, 'SPECIALNET': 8}
+	prop_dataTypes = {'INTEGER': 0, 'REAL': 1, 'STRING': 2}
+
+	def __init__(self, DEF: 'DEF', exclude_wires: bool = False, lazy: bool = False):
+		"""
+		create a DEF reader
+
+		:param DEF: DEF which the design read belongs to. DEF should have a valid LEF as member
+		:param exclude_wires: exclude wire shapes from DEF file. connection information will still remain
+		:param lazy: keep the statements of components, pins, special nets and nets, and convert them only when they are accessed
+		"""
+		self.DEF = DEF
+		self.exclude_wires = exclude_wires
+		self.lazy = lazy
+		self.design = None
+		self.ifp = None
+		self.tokens = []
+		self.pos = 0
+		self.scan_pos = 0
+		self.blkg_comp_names = []
+		self.statements = {}
+
+	def read(self, def_file: str) -> 'DEFDesign':
+		"""
+		read a DEF file
+
+		:param def_file: DEF file to read (can be gzipped)
+		:return: design in the DEF file
+		"""
+		import gzip
+		if def_file.endswith('.gz'):
+			self.ifp = gzip.open(def_file, 'rt')
+		else:
+			self.ifp = open(def_file, 'r')
+		self.tokens = []
+		self.pos = 0
+		self.scan_pos = 0
+		self.design = DEFDesign()
+		self.design.DEF = self.DEF
+		self.blkg_comp_names = []
+		self.statements = {'components': {}, 'pins': {}, 'sNets': {}, 'nets': {}}
+		try:
+			while True:
+				stmt = self.read_statement()
+				if stmt is None or stmt == ['END', 'DESIGN']:
+					break
+				self.read_top_statement(stmt)
+		finally:
+			self.ifp.close()
+
+		# follow the order of LEFDEF C++ library (std::map)
+		self.design.rows = dict(sorted(self.design.rows.items()))
+		self.design.vias = dict(sorted(self.design.vias.items()))
+		self.design.viarules = dict(sorted(self.design.viarules.items()))
+		if self.lazy:
+			statements = self.statements
+			self.design.sNets = DEFSection(dict(sorted(statements['sNets'].items())), lambda snet_name, stmt: self.read_net(stmt, True))
+			self.design.nets = DEFSection(dict(sorted(statements['nets'].items())), lambda net_name, stmt: self.read_net(stmt, False))
+			self.design.components = DEFSection(dict(sorted(statements['components'].items())), lambda comp_name, stmt: self.read_component(stmt), prerequisites=[self.design.sNets, self.design.nets])
+			self.design.pins = DEFSection(dict(sorted(statements['pins'].items())), lambda pin_name, stmt: self.read_pin(stmt), self.design.connect_pin)
+			self.statements = {}
+		else:
+			self.design.components = dict(sorted(self.design.components.items()))
+			self.design.pins = dict(sorted(self.design.pins.items()))
+			self.design.sNets = dict(sorted(self.design.sNets.items()))
+			self.design.nets = dict(sorted(self.design.nets.items()))
+			self.design.connect_pin_net()
+		# blockages can refer components defined after them
+		for blkg, comp_name in self.blkg_comp_names:
+			blkg.component = self.design.components[comp_name] if comp_name in self.design.components else None
+		return self.design
+
+	def read_design_name(self, def_file: str) -> Union[str, None]:
+		"""
+		read only the header of a DEF file to get the name of its design (DESIGN statement comes before the sections)
+
+		:param def_file: DEF file to read (can be gzipped)
+		:return: name of the design. None if the DEF has no DESIGN statement
+		"""
+		import gzip
+		if def_file.endswith('.gz'):
+			self.ifp = gzip.open(def_file, 'rt')
+		else:
+			self.ifp = open(def_file, 'r')
+		self.tokens = []
+		self.pos = 0
+		self.scan_pos = 0
+		try:
+			while True:
+				stmt = self.read_statement()
+				if stmt is None or stmt == ['END', 'DESIGN']:
+					return None
+				if len(stmt) > 1 and stmt[0] == 'DESIGN':
+					return stmt[1]
+		finally:
+			self.ifp.close()
+
+	def read_line_tokens(self) -> Union[List[str], None]:
+		"""
+		split the next line of DEF file into tokens (comments are removed, quoted strings are kept as a single token without the quotes)
+
+		:return: tokens in the line. None if it reaches the end of file
+		"""
+		line = self.ifp.readline()
+		if line == '':
+			return None
+		if '"' in line or '#' in line or ';' in line:
+			tokens = []
+			for token in self.token_re.findall(line):
+				if token[0] == '#':
+					break
+				if token[0] == '"':
+					# quotes are removed as LEFDEF C++ library does (except the strings which can be read as a keyword)
+					if token[1:-1] not in self.reserved_tokens:
+						token = token[1:-1]
+					tokens.append(token)
+				elif len(token) > 1 and token[-1] == ';':
+					tokens.append(token[:-1])
+					tokens.append(';')
+				else:
+					tokens.append(token)
+			return tokens
+		return line.split()
+
+	def read_statement(self) -> Union[List[str], None]:
+		"""
+		read tokens until the end of the statement (';' or 'END <name>')
+
+		:return: tokens in the statement without ';'. None if it reaches the end of file
+		"""
+		tokens = self.tokens
+		while True:
+			pos = self.pos
+			num_tokens = len(tokens)
+			if pos < num_tokens:
+				first = tokens[pos]
+				if first == 'END':
+					if pos + 1 < num_tokens:
+						self.pos = pos + 2
+						return tokens[pos:pos + 2]
+				elif first == 'BEGINEXT':
+					if 'ENDEXT' in tokens[self.scan_pos:]:
+						self.pos = tokens.index('ENDEXT', pos) + 1
+						return ['BEGINEXT']
+				else:
+					try:
+						end = tokens.index(';', self.scan_pos)
+						self.pos = end + 1
+						self.scan_pos = end + 1
+						return tokens[pos:end]
+					except ValueError:
+						pass
+			# the statement continues to the next line
+			line_tokens = self.read_line_tokens()
+			if line_tokens is None:
+				self.pos = num_tokens
+				return tokens[pos:] if pos < num_tokens else None
+			if pos >= num_tokens:
+				tokens = self.tokens = line_tokens
+				self.pos = 0
+				self.scan_pos = 0
+			else:
+				self.scan_pos = num_tokens
+				tokens.extend(line_tokens)
+
+	def read_section(self, read_entry: Callable[[List[str]], None]):
+		"""
+		read statements in a section until 'END <section>'
+
+		:param read_entry: function to process each statement in the section
+		"""
+		while True:
+			stmt = self.read_statement()
+			if stmt is None or stmt[0] == 'END':
+				break
+			read_entry(stmt)
+
+	def read_named_section(self, section_name: str, read_entry: Callable[[List[str]], Any]):
+		"""
+		read statements in a name-keyed section (COMPONENTS, PINS, SPECIALNETS, NETS) until 'END <section>'.
+		if the reader is lazy, the statements are kept with their names and read_entry is called when they are accessed
+
+		:param section_name: name of the section in the design (components, pins, sNets or nets)
+		:param read_entry: function to create an entry from a statement
+		"""
+		if self.lazy:
+			statements = self.statements[section_name]
+			def keep_statement(stmt: List[str]):
+				statements[stmt[1]] = stmt
+			self.read_section(keep_statement)
+		else:
+			entries = getattr(self.design, section_name)
+			def read_named_entry(stmt: List[str]):
+				entry = read_entry(stmt)
+				entries[entry.name] = entry
+			self.read_section(read_named_entry)
+
+	def read_top_statement(self, stmt: List[str]):
+		"""
+		process a top-level statement
+
+		:param stmt: tokens of the statement
+		"""
+		keyword = stmt[0]
+		design = self.design
+		if keyword == 'VERSION':
+			self.DEF.defVersion = stmt[1]
+		elif keyword == 'DIVIDERCHAR':
+			self.DEF.dividerChar = stmt[1].strip('"')
+		elif keyword == 'BUSBITCHARS':
+			self.DEF.busBitChars = stmt[1].strip('"')
+		elif keyword == 'DESIGN':
+			design.name = stmt[1]
+		elif keyword == 'TECHNOLOGY':
+			design.technology = stmt[1]
+		elif keyword == 'UNITS':
+			design.dbUnits = int(float(stmt[3]))
+		elif keyword == 'HISTORY':
+			design.histories.append(' '.join(stmt[1:]))
+		elif keyword == 'PROPERTYDEFINITIONS':
+			# PROPERTYDEFINITIONS does not end with ';', so the first definition is in the same statement.
+			# if the section is empty, the statement has 'END PROPERTYDEFINITIONS' and the next top-level statement
+			if stmt[1:3] == ['END', 'PROPERTYDEFINITIONS']:
+				if len(stmt) > 3:
+					self.read_top_statement(stmt[3:])
+				return
+			if len(stmt) > 1:
+				self.read_prop(stmt[1:])
+			self.read_section(self.read_prop)
+		elif keyword == 'DIEAREA':
+			pts, i = self.read_pts(stmt, 1)
+			design.dieArea = self.make_shape(pts)
+		elif keyword == 'ROW':
+			self.read_row(stmt)
+		elif keyword == 'TRACKS':
+			self.read_track(stmt)
+		elif keyword == 'GCELLGRID':
+			gcg = DEFGCellGrid()
+			gcg.direction = self.directions.get(stmt[1], -1)
+			gcg.start = int(stmt[2])
+			gcg.numColsRows = int(stmt[4])
+			gcg.space = int(stmt[6])
+			design.gCellGrids.append(gcg)
+		elif keyword == 'VIAS':
+			self.read_section(self.read_via)
+		elif keyword == 'COMPONENTS':
+			self.read_named_section('components', self.read_component)
+		elif keyword == 'PINS':
+			self.read_named_section('pins', self.read_pin)
+		elif keyword == 'BLOCKAGES':
+			self.read_section(self.read_blkg)
+		elif keyword == 'SPECIALNETS':
+			self.read_named_section('sNets', lambda net_stmt: self.read_net(net_stmt, True))
+		elif keyword == 'NETS':
+			self.read_named_section('nets', lambda net_stmt: self.read_net(net_stmt, False))
+		elif keyword in self.skipped_sections:
+			self.read_section(lambda skipped_stmt: None)
+
+	def read_pts(self, stmt: List[str], i: int) -> Tuple[List['Point'], int]:
+		"""
+		read consecutive points '( x y ) ( x y ) ...' ('*' means the same value with the previous point)
+
+		:param stmt: tokens of the statement
+		:param i: index of the first '('
+		:return: list of points, index of the token right after the last point
+		"""
+		pts = []
+		n = len(stmt)
+		while i < n and stmt[i] == '(':
+			x = pts[-1].x if stmt[i + 1] == '*' else int(stmt[i + 1])
+			y = pts[-1].y if stmt[i + 2] == '*' else int(stmt[i + 2])
+			pts.append(Point(x, y, point_type=int))
+			i += 4
+		return pts, i
+
+	def make_shape(self, pts: List['Point'], layer: 'LEFLayer' = None) -> 'Shape':
+		"""
+		make a shape from points. two points become a rectangle, otherwise it becomes a polygon
+
+		:param pts: points of the shape
+		:param layer: layer of the shape
+		:return: shape
+		"""
+		if len(pts) == 2:
+			shape = Shape(shape_type=0)
+			shape.rect = Rect(min(pts[0].x, pts[1].x), min(pts[0].y, pts[1].y), max(pts[0].x, pts[1].x), max(pts[0].y, pts[1].y), rect_type=int)
+		else:
+			shape = Shape(shape_type=2)
+			shape.polygon = pts
+		shape.layer = layer
+		return shape
+
+	def read_prop(self, stmt: List[str]):
+		"""
+		read a property definition in PROPERTYDEFINITIONS section
+
+		:param stmt: tokens of the statement
+		"""
+		prop = DEFProp()
+		prop.objType = self.prop_objTypes.get(stmt[0], -1)
+		prop.name = stmt[1]
+		prop.dataType = self.prop_dataTypes.get(stmt[2], -1)
+		i = 3
+		if i < len(stmt) and stmt[i] == 'RANGE':
+			if prop.dataType == 0:
+				prop.intRange = [int(stmt[i + 1]), int(stmt[i + 2])]
+			else:
+				prop.doubleRange = [float(stmt[i + 1]), float(stmt[i + 2])]
+			i += 3
+		if i < len(stmt):
+			if prop.dataType == 0:
+				prop.intValue = int(stmt[i])
+			elif prop.dataType == 1:
+				prop.doubleValue = float(stmt[i])
+			else:
+				prop.strValue = stmt[i].strip('"')
+		self.design.defProps.append(prop)
+
+	def read_row(self, stmt: List[str]):
+		"""
+		read a ROW statement (ROW name site x y orient [DO numX BY numY [STEP stepX stepY]])
+
+		:param stmt: tokens of the statement
+		"""
+		row = DEFRow()
+		row.name = stmt[1]
+		row.design = self.design
+		row.site = self.DEF.LEF.sites[stmt[2]] if stmt[2] in self.DEF.LEF.sites else None
+		row.origin = Point(int(stmt[3]), int(stmt[4]), point_type=int)
+		row.orientation = self.orientations.get(stmt[5], -1)
+		if len(stmt) > 9 and stmt[6] == 'DO':
+			row.num = Point(int(stmt[7]), int(stmt[9]), point_type=int)
+			if len(stmt) > 12 and stmt[10] == 'STEP':
+				row.step = Point(int(stmt[11]), int(stmt[12]), point_type=int)
+		self.design.rows[row.name] = row
+
+	def read_track(self, stmt: List[str]):
+		"""
+		read a TRACKS statement (TRACKS [MASK m [SAMEMASK]] X|Y start DO num STEP space [MASK m [SAMEMASK]] [LAYER layer ...])
+
+		:param stmt: tokens of the statement
+		"""
+		track = DEFTrack()
+		i = 1
+		while stmt[i] not in self.directions:
+			i += 1
+		track.direction = self.directions[stmt[i]]
+		track.start = int(stmt[i + 1])
+		track.numTracks = int(stmt[i + 3])
+		track.space = int(stmt[i + 5])
+		if 'LAYER' in stmt:
+			layers = self.DEF.LEF.layers
+			track.layers = [layers[layer_name] for layer_name in stmt[stmt.index('LAYER') + 1:] if layer_name in layers]
+		self.design.tracks.append(track)
+
+	def read_via(self, stmt: List[str]):
+		"""
+		read a via definition in VIAS section. a via with VIARULE becomes DEFViaRule, a via with RECT/POLYGON becomes LEFVia
+
+		:param stmt: tokens of the statement
+		"""
+		lef = self.DEF.LEF
+		design = self.design
+		if 'VIARULE' in stmt:
+			viarule = DEFViaRule()
+			viarule.name = stmt[1]
+			for i, token in enumerate(stmt):
+				if token == 'VIARULE':
+					viarule.viarule = lef.viarules[stmt[i + 1]] if stmt[i + 1] in lef.viarules else None
+				elif token == 'CUTSIZE':
+					viarule.cutSize = Point(int(stmt[i + 1]), int(stmt[i + 2]), point_type=int)
+				elif token == 'LAYERS':
+					viarule.botRoutingLayer = lef.layers[stmt[i + 1]] if stmt[i + 1] in lef.layers else None
+					viarule.cutLayer = lef.layers[stmt[i + 2]] if stmt[i + 2] in lef.layers else None
+					viarule.topRoutingLayer = lef.layers[stmt[i + 3]] if stmt[i + 3] in lef.layers else None
+				elif token == 'CUTSPACING':
+					viarule.cutSpacing = Point(int(stmt[i + 1]), int(stmt[i + 2]), point_type=int)
+				elif token == 'ENCLOSURE':
+					viarule.botEnc = Point(int(stmt[i + 1]), int(stmt[i + 2]), point_type=int)
+					viarule.topEnc = Point(int(stmt[i + 3]), int(stmt[i + 4]), point_type=int)
+				elif token == 'ROWCOL':
+					viarule.rowcol = Point(int(stmt[i + 1]), int(stmt[i + 2]), point_type=int)
+			design.viarules[viarule.name] = viarule
+		else:
+			via = LEFVia()
+			via.name = stmt[1]
+			via.lef = lef
+			routing_shapes = []
+			i = 2
+			n = len(stmt)
+			while i < n:
+				if stmt[i] == 'RECT' or stmt[i] == 'POLYGON':
+					layer = lef.layers[stmt[i + 1]] if stmt[i + 1] in lef.layers else None
+					i += 2
+					while i < n and stmt[i] != '(':
+						# + MASK maskNum
+						i += 1
+					pts, i = self.read_pts(stmt, i)
+					# LEF via shapes are in microns
+					shape = self.make_shape(pts, layer)
+					shape.to_float()
+					shape.scale(1 / design.dbUnits)
+					if layer is not None and layer.type == 3:
+						via.cutLayer = layer
+						via.cutShapes.append(shape)
+					else:
+						routing_shapes.append(shape)
+				else:
+					i += 1
+			layer_idx = {layer.name: idx for idx, layer in enumerate(lef.layer_order)}
+			routing_layers = sorted({shape.layer.name for shape in routing_shapes if shape.layer is not None}, key=lambda layer_name: layer_idx.get(layer_name, -1))
+			if len(routing_layers) > 0:
+				via.botRoutingLayer = lef.layers[routing_layers[0]]
+				via.topRoutingLayer = lef.layers[routing_layers[-1]]
+				via.botRoutingShapes = [shape for shape in routing_shapes if shape.layer is via.botRoutingLayer]
+				via.topRoutingShapes = [shape for shape in routing_shapes if shape.layer is via.topRoutingLayer]
+			design.vias[via.name] = via
+
+	def read_component(self, stmt: List[str]) -> 'DEFComponent':
+		"""
+		read a component in COMPONENTS section
+
+		:param stmt: tokens of the statement
+		:return: component
+		"""
+		macros = self.DEF.LEF.macros
+		comp = DEFComponent(design=self.design)
+		comp.name = stmt[1]
+		comp.macro = macros[stmt[2]] if stmt[2] in macros else None
+		i = 3
+		n = len(stmt)
+		while i < n:
+			if stmt[i] != '+':
+				i += 1
+				continue
+			keyword = stmt[i + 1]
+			if keyword in self.comp_pStatuses:
+				comp.pStatus = self.comp_pStatuses[keyword]
+				if i + 2 < n and stmt[i + 2] == '(':
+					comp.loc = Point(int(stmt[i + 3]), int(stmt[i + 4]), point_type=int)
+					comp.orientation = self.orientations.get(stmt[i + 6], -1)
+					i += 5
+			elif keyword == 'EEQ':
+				comp.eeq = stmt[i + 2]
+			elif keyword == 'SOURCE':
+				comp.source = self.comp_sources.get(stmt[i + 2], 0)
+			elif keyword == 'WEIGHT':
+				comp.weight = int(stmt[i + 2])
+			i += 2
+		return comp
+
+	def read_pin(self, stmt: List[str]) -> 'DEFPin':
+		"""
+		read a pin in PINS section
+
+		:param stmt: tokens of the statement
+		:return: pin
+		"""
+		layers = self.DEF.LEF.layers
+		pin = DEFPin()
+		pin.name = stmt[1]
+		pin.design = self.design
+		i = 2
+		n = len(stmt)
+		while i < n:
+			if stmt[i] != '+':
+				i += 1
+				continue
+			keyword = stmt[i + 1]
+			if keyword == 'NET':
+				pin.net_name = stmt[i + 2]
+			elif keyword == 'SPECIAL':
+				pin.isSpecial = True
+			elif keyword == 'DIRECTION':
+				pin.direction = self.pin_directions.get(stmt[i + 2], -1)
+			elif keyword == 'USE':
+				pin.type = self.uses.get(stmt[i + 2], 6)
+			elif keyword == 'SUPPLYSENSITIVITY':
+				pin.supplySensitivity = stmt[i + 2]
+			elif keyword == 'GROUNDSENSITIVITY':
+				pin.groundSensitivity = stmt[i + 2]
+			elif keyword == 'LAYER' or keyword == 'POLYGON':
+				layer = layers[stmt[i + 2]] if stmt[i + 2] in layers else None
+				i += 3
+				while i < n and stmt[i] != '(':
+					# MASK, SPACING, DESIGNRULEWIDTH
+					i += 1
+				pts, i = self.read_pts(stmt, i)
+				pin.shapes.append(self.make_shape(pts, layer))
+				continue
+			elif keyword in self.pin_pStatuses:
+				pin.pStatus = self.pin_pStatuses[keyword]
+				pin.loc = Point(int(stmt[i + 3]), int(stmt[i + 4]), point_type=int)
+				pin.orientation = self.orientations.get(stmt[i + 6], -1)
+				i += 5
+			i += 2
+		return pin
+
+	def read_blkg(self, stmt: List[str]):
+		"""
+		read a blockage in BLOCKAGES section
+
+		:param stmt: tokens of the statement
+		"""
+		layers = self.DEF.LEF.layers
+		blkg = DEFBlkg()
+		if stmt[1] == 'LAYER':
+			blkg.type = 1
+			blkg.layer = layers[stmt[2]] if stmt[2] in layers else None
+		elif stmt[1] == 'PLACEMENT':
+			blkg.type = 0
+		i = 2
+		n = len(stmt)
+		while i < n:
+			token = stmt[i]
+			if token == 'RECT' or token == 'POLYGON':
+				pts, i = self.read_pts(stmt, i + 1)
+				blkg.shapes.append(self.make_shape(pts, blkg.layer))
+				continue
+			elif token == 'COMPONENT':
+				self.blkg_comp_names.append((blkg, stmt[i + 1]))
+			elif token == 'PARTIAL':
+				blkg.partial = float(stmt[i + 1])
+			i += 1
+		self.design.blockages.append(blkg)
+
+	def read_net(self, stmt: List[str], special: bool) -> 'DEFNet':
+		"""
+		read a net in NETS or SPECIALNETS section
+
+		:param stmt: tokens of the statement
+		:param special: whether it is in SPECIALNETS section or not
+		:return: net
+		"""
+		design = self.design
+		net = DEFNet()
+		net.name = stmt[1]
+		net.design = design
+		i = 2
+		n = len(stmt)
+		# connections: ( comp_name pin_name [+ SYNTHESIZED] ) or ( PIN pin_name )
+		while i < n and stmt[i] == '(':
+			comp_name = stmt[i + 1]
+			pin_name = stmt[i + 2]
+			i += 3
+			while stmt[i] != ')':
+				i += 1
+			i += 1
+			if comp_name == 'PIN':
+				if pin_name in design.pins:
+					pin = design.pins[pin_name]
+					pin.net = net
+					net.pins.append(pin)
+				else:
+					logger.warning('pin %s connected to net %s does not exist. ignored' % (pin_name, net.name))
+				continue
+			comp_pin = DEFComponentPin()
+			comp_pin.design = design
+			# handling wildcards for component name in net connections
+			if comp_name == '*':
+				comp_pin.comp = DEFComponent()
+				comp_pin.comp.name = '*'
+				comp_pin.pin = LEFMacroPin()
+				comp_pin.pin.name = pin_name
+			elif comp_name in design.components and design.components[comp_name].macro is not None and pin_name in design.components[comp_name].macro.pins:
+				comp_pin.comp = design.components[comp_name]
+				comp_pin.pin = comp_pin.comp.macro.pins[pin_name]
+			else:
+				logger.warning('component pin %s/%s connected to net %s does not exist. ignored' % (comp_name, pin_name, net.name))
+				continue
+			comp_pin.comp.pin2net[pin_name] = net
+			net.compPins.append(comp_pin)
+
+		while i < n:
+			if stmt[i] != '+':
+				i += 1
+				continue
+			keyword = stmt[i + 1]
+			if keyword in self.wire_types:
+				i = self.read_wire(net, stmt, i + 2, keyword, special)
+				continue
+			elif keyword == 'USE':
+				net.type = self.uses.get(stmt[i + 2], 6)
+			elif keyword == 'SOURCE':
+				net.source = self.net_sources.get(stmt[i + 2], 0)
+			elif keyword == 'PATTERN':
+				net.routingPattern = self.net_patterns.get(stmt[i + 2], 1)
+			elif keyword == 'VOLTAGE':
+				net.voltage = int(float(stmt[i + 2]))
+			i += 2
+		return net
+
+	def read_wire(self, net: 'DEFNet', stmt: List[str], i: int, wire_keyword: str, special: bool) -> int:
+		"""
+		read a regular/special wiring statement (COVER|FIXED|ROUTED|NOSHIELD|SHIELD layer ... [NEW layer ...])
+
+		:param net: net which the wire belongs to
+		:param stmt: tokens of the statement
+		:param i: index of the first token after wire_keyword
+		:param wire_keyword: COVER, FIXED, ROUTED, NOSHIELD or SHIELD
+		:param special: whether it is special wiring or not
+		:return: index of the token right after the wiring statement
+		"""
+		n = len(stmt)
+		if wire_keyword == 'SHIELD':
+			# shield net name
+			i += 1
+		if self.exclude_wires:
+			while i < n and not (stmt[i] == '+' and stmt[i + 1] not in ('SHAPE', 'STYLE', 'MASK')):
+				i += 1
+			return i
+
+		design = self.design
+		lef = self.DEF.LEF
+		wire = DEFWire()
+		wire.type = self.wire_types[wire_keyword]
+		path = None
+		prev_pt = None
+		while i < n:
+			token = stmt[i]
+			if path is None or token == 'NEW':
+				if token == 'NEW':
+					i += 1
+				path = DEFPath()
+				path.design = design
+				path.layer = lef.layers[stmt[i]] if stmt[i] in lef.layers else None
+				i += 1
+				if special and i < n and stmt[i].isdigit():
+					# routed width of special wiring
+					i += 1
+				wire.paths.append(path)
+				prev_pt = None
+			elif token == '(' or token == 'VIRTUAL':
+				if token == 'VIRTUAL':
+					i += 1
+				x = prev_pt.x if stmt[i + 1] == '*' else int(stmt[i + 1])
+				y = prev_pt.y if stmt[i + 2] == '*' else int(stmt[i + 2])
+				if stmt[i + 3] == ')':
+					ext = 0
+					i += 4
+				else:
+					ext = int(stmt[i + 3])
+					i += 5
+				prev_pt = Point(x, y, point_type=int)
+				path.pts.append(prev_pt)
+				path.exts.append(ext)
+				path.isVirtual.append(token == 'VIRTUAL')
+				path.isRect.append(False)
+				path.rects.append(Rect(0, 0, 0, 0, rect_type=int))
+			elif token == 'RECT':
+				# RECT ( deltax1 deltay1 deltax2 deltay2 ) relative to the previous point
+				path.pts.append(prev_pt.copy() if prev_pt is not None else Point(0, 0, point_type=int))
+				path.exts.append(0)
+				path.isVirtual.append(False)
+				path.isRect.append(True)
+				path.rects.append(Rect(int(stmt[i + 2]), int(stmt[i + 3]), int(stmt[i + 4]), int(stmt[i + 5]), rect_type=int))
+				i += 7
+			elif token == '+':
+				if stmt[i + 1] == 'SHAPE':
+					path.shape = self.snet_shapes.get(stmt[i + 2], -1)
+				elif stmt[i + 1] != 'STYLE' and stmt[i + 1] != 'MASK':
+					break
+				i += 3
+			elif token == 'MASK' or token == 'STYLE' or token == 'TAPERRULE':
+				i += 2
+			elif token == 'TAPER':
+				i += 1
+			else:
+				# via instance at the previous point: viaName [orient] [DO numX BY numY STEP stepX stepY]
+				via = DEFVia()
+				if token in lef.vias:
+					via.via = lef.vias[token]
+				elif token in design.vias:
+					via.via = design.vias[token]
+				elif token in design.viarules:
+					via.via = design.viarules[token]
+				via.loc = prev_pt.copy() if prev_pt is not None else Point(0, 0, point_type=int)
+				path.vias.append(via)
+				i += 1
+				if i < n and stmt[i] in self.orientations:
+					i += 1
+				if i < n and stmt[i] == 'DO':
+					i += 6
+		net.wires.append(wire)
+		return i
+
+
 class DEF:
 	"""
 	represents DEF
@@ -6213,13 +7959,14 @@ class DEF:
 	user-defined properties
 	'''
 
-	def __init__(self, def_file: str = None, lef: 'LEF' = None, exclude_wires: bool = False, verilog_file:str = None):
+	def __init__(self, def_file: str = None, lef: 'LEF' = None, exclude_wires: bool = False, verilog_file:str = None, lazy: bool = False):
 		"""
 		create a DEF
 
 		:param def_file: DEF file to read to construct DEF
 		:param lef: LEF which this DEF is based on
 		:param exclude_wires: exclude wire shapes from DEF file. connection information will still remain
+		:param lazy: convert components, pins, special nets and nets only when they are accessed (see DEFSection)
 		"""
 		self.defVersion = '5.8'
 		self.dividerChar = '/'
@@ -6231,7 +7978,7 @@ class DEF:
 		if lef is not None:
 			self.set_lef(lef)
 			if def_file is not None and verilog_file is None:
-				self.read_def(def_file, exclude_wires)
+				self.read_def(def_file, exclude_wires, lazy=lazy)
 			elif def_file is None and verilog_file is not None:
 				self.read_verilog(verilog_file)
 				for me, ancester in self.hierarchy.items():
@@ -6264,19 +8011,35 @@ class DEF:
 		"""
 		self.LEF = lef
 
-	def read_def(self, def_file: str, exclude_wires: bool = False):
+	def read_def(self, def_file: str, exclude_wires: bool = False, use_swig: bool = False, lazy: bool = False):
 		"""
 		read a DEF file
 
 		:param def_file: DEF file to read
 		:param exclude_wires: exclude wire shapes from DEF file. connection information will still remain
+		:param use_swig: read the DEF file with LEFDEF SWIG (the whole DEF is exported to C++ structure, and converted back to python structure). if False, DEFStreamReader fills the design directly.
+		                 DEFStreamReader creates a new design, so LEFDEF SWIG is used if the design in the DEF is already read (e.g., part0 and part1 of the same block), to merge it into the existing design
+		:param lazy: convert components, pins, special nets and nets only when they are accessed (see DEFSection)
 		"""
 		if os.path.exists(def_file):
-			self.swigDEF = self.export()
-			logger.info('run LEFDEF SWIG to read %s' % (def_file))
-			self.swigDEF.read_def(def_file)
-			logger.info('convert DEF to python structure')
-			self.import_swigDEF(exclude_wires)
+			if not use_swig and len(self.designs) > 0:
+				# only the header is read to check the design name, so the DEF is parsed once by either of the readers
+				design_name = DEFStreamReader(self).read_design_name(def_file)
+				if design_name in self.designs:
+					logger.info('design %s is already read. use LEFDEF SWIG to merge %s into the existing design' % (design_name, def_file))
+					use_swig = True
+			if use_swig:
+				self.swigDEF = self.export()
+				logger.info('run LEFDEF SWIG to read %s' % (def_file))
+				self.swigDEF.read_def(def_file)
+				logger.info('convert DEF to python structure')
+				self.import_swigDEF(exclude_wires, lazy)
+			else:
+				logger.info('run native DEF reader to read %s' % (def_file))
+				design = DEFStreamReader(self, exclude_wires, lazy).read(def_file)
+				self.swigDEF = None
+				self.designs[design.name] = design
+				self.curDesign = design.name
 			logger.info('DEF for\n - %s \nis now ready' % (def_file))
 		else:
 			logger.error('input def file %s does not exists. ignored.' % def_file)
@@ -6288,6 +8051,8 @@ class DEF:
 
 		:param verilog_file: Verilog file to read
 		"""
+		import verilog_parse
+
 		if os.path.exists(verilog_file):
 			logger.info('read verilog %s' %(verilog_file))
 			netlist = verilog_parse.parse_verilog(os.path.join(verilog_file))
@@ -6299,17 +8064,18 @@ class DEF:
 		else:
 			logger.error('input verilog file %s does not exists. ignored.' %(verilog_file))
 
-	def import_swigDEF(self, exclude_wires: bool = False):
+	def import_swigDEF(self, exclude_wires: bool = False, lazy: bool = False):
 		"""
 		convert DEF from LEFDEF C++ library to python DEF structure
 
 		:param exclude_wires: exclude wire shapes from DEF file. connection information will still remain
+		:param lazy: convert components, pins, special nets and nets only when they are accessed (see DEFSection)
 		"""
 		self.defVersion = self.swigDEF.defVersion
 		self.dividerChar = self.swigDEF.dividerChar
 		self.busBitChars = self.swigDEF.busBitChars
 
-		self.designs = {design_name: DEFDesign(design, self, exclude_wires) for design_name, design in dict(self.swigDEF.designs).items()}
+		self.designs = {design_name: DEFDesign(design, self, exclude_wires, lazy=lazy) for design_name, design in dict(self.swigDEF.designs).items()}
 		self.curDesign = self.swigDEF.curDesign
 
 	def export(self, design_name: str = None, floorplan_only: bool = False) -> LEFDEF.DEF:
@@ -6321,6 +8087,8 @@ class DEF:
 		:return: DEF in LEFDEF C++ library
 		"""
 		targ = LEFDEF.DEF()
+		if self.LEF.swigLEF is None:
+			self.LEF.swigLEF = self.LEF.export()
 		targ.pLEF = self.LEF.swigLEF
 		targ.defVersion = self.defVersion
 		targ.dividerChar = self.dividerChar
@@ -6337,27 +8105,31 @@ class DEF:
 				logger.error('design %s does not exist' % (design_name))
 		return targ
 
-	def copy(self, design_name: str = None, exclude_wires: bool = False) -> 'DEF':
+	def copy(self, design_name: str = None, exclude_wires: bool = False, lazy: bool = False, exclude_sNets: bool = False, share_LEF: bool = False) -> 'DEF':
 		"""
 		copy the object
 
 		:param design_name: copy only the specified design. if None, copy all the designs
 		:param exclude_wires: exclude wire shapes from copying. connection information will still remain
+		:param lazy: copy components, pins, special nets and nets of the designs only when they are accessed (see DEFDesign.copy).
+			this DEF should not be modified until the copied designs are materialized
+		:param exclude_sNets: exclude special nets from copying
+		:param share_LEF: share LEF with this DEF instead of copying it. only for a temporary copy which does not modify LEF (e.g., objects are moved to a DEF with another LEF)
 		:return: copied object
 		"""
 		logger.info('start copying DEF')
 		cp = DEF()
-		cp.LEF = self.LEF.copy()
+		cp.LEF = self.LEF if share_LEF else self.LEF.copy()
 		cp.defVersion = self.defVersion
 		cp.dividerChar = self.dividerChar
 		cp.busBitChars = self.busBitChars
 
 		if design_name is None:
-			cp.designs = {design_name: design_info.copy(cp, exclude_wires) for design_name, design_info in self.designs.items()}
+			cp.designs = {design_name: design_info.copy(cp, exclude_wires, lazy, exclude_sNets) for design_name, design_info in self.designs.items()}
 			cp.curDesign = list(self.designs.keys())[0]
 		else:
 			if design_name in self.designs:
-				cp.designs[design_name] = self.designs[design_name].copy(cp, exclude_wires)
+				cp.designs[design_name] = self.designs[design_name].copy(cp, exclude_wires, lazy, exclude_sNets)
 				cp.curDesign = design_name
 			else:
 				logger.error('design %s does not exist' % (design_name))
@@ -6624,25 +8396,30 @@ class DEF:
 							design_3d.pins[pin_3d.name] = pin_3d
 
 			logger.info('processing blockages')
+			row_index = design_3d.get_spatial_index()
 			for blkg in cur_design.blockages:
 				if blkg.type == 0:
 					for shape in blkg.shapes:
-						for row_name, row_info in design_3d.rows.items():
+						# only the rows overlapping the blockage can make blockages
+						for row_info in row_index.query(shape.rect, 'rows'):
 							if row_info.site.height != row_height / 2:
 								continue
 							if row_info['tier'] == tier_num:
-								blkg_3d = DEFBlkg(design=design_3d)
-								blkg_3d.type = 0
-								blkg_3d.layer = None
 								row_rect = Rect(llx=row_info.origin.x,
 													lly=row_info.origin.y,
 													urx=row_info.origin.x + row_info.num.x * row_info.step.x,
 													ury=row_info.origin.y + row_info.site.height * design_3d.dbUnits,
 													rect_type=int)
+								blkg_rect = shape.rect.get_intersection(row_rect)
+								if blkg_rect is None:
+									continue
+								blkg_3d = DEFBlkg(design=design_3d)
+								blkg_3d.type = 0
+								blkg_3d.layer = None
 								blkg_shape = Shape()
 								blkg_shape.shape_type = 0
 								blkg_shape.layer = None
-								blkg_shape.rect = shape.rect.get_intersection(row_rect)
+								blkg_shape.rect = blkg_rect
 								blkg_3d.shapes.append(blkg_shape)
 								design_3d.blockages.append(blkg_3d)
 				else:
@@ -6704,6 +8481,112 @@ class DEF:
 
 		return def_3d
 
+lef_cache_version = 1
+'''
+version of the pickled LEF in the LEF cache. increase it when the pickled LEF is not compatible anymore (e.g., a member is added to LEF classes)
+'''
+lef_cache_max_entries = 8
+'''
+number of the most recently used LEF objects kept in the LEF cache. older ones are removed when a new one is cached
+'''
+
+def read_lef_with_cache(lef_files: List[str], cache_dir: str) -> 'LEF':
+	"""
+	read LEF files through a cache of pickled LEF objects. the cache is keyed by the contents of the LEF files (in order), lef_cache_version,
+	this module and LEFDEF C++ library, so it is invalidated when any of them changes.
+	only lef_cache_max_entries most recently used LEF objects are kept (see prune_lef_cache)
+
+	:param lef_files: LEF files to read
+	:param cache_dir: directory to keep the pickled LEF objects
+	:return: LEF read from the cache if it hits. otherwise, LEF read from the LEF files
+	"""
+	import hashlib
+	import pickle
+	import sys
+	import tempfile
+
+	if not all(os.path.isfile(lef_file) for lef_file in lef_files):
+		# LEF reports the missing files
+		return LEF(lef_files)
+
+	key = hashlib.sha256()
+	key.update(('%d %s' % (lef_cache_version, sys.version)).encode())
+	for file_name in [__file__, getattr(LEFDEF, '__file__', None)] + lef_files:
+		if file_name is None or not os.path.isfile(file_name):
+			continue
+		key.update(b'\0')
+		with open(file_name, 'rb') as ifp:
+			for chunk in iter(lambda: ifp.read(1 << 20), b''):
+				key.update(chunk)
+	cache_file = os.path.join(cache_dir, key.hexdigest() + '.pkl')
+
+	if os.path.exists(cache_file):
+		try:
+			with open(cache_file, 'rb') as ifp:
+				lef = pickle.load(ifp)
+			logger.info('LEF for\n - %s \nis read from cache %s' % ('\n - '.join(lef_files), cache_file))
+			# mtime of a cached LEF is the last time it is used (see prune_lef_cache)
+			os.utime(cache_file)
+			return lef
+		except Exception as e:
+			logger.warning('cannot read LEF cache %s (%s). read LEF files again' % (cache_file, e))
+
+	lef = LEF(lef_files)
+	try:
+		os.makedirs(cache_dir, exist_ok=True)
+		# write a temporary file and rename it, so that other stages never read a partially written cache
+		fd, temp_file = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+		try:
+			with os.fdopen(fd, 'wb') as ofp:
+				pickle.dump(lef, ofp, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(temp_file, cache_file)
+		except BaseException:
+			os.remove(temp_file)
+			raise
+		logger.info('LEF is cached in %s' % cache_file)
+		prune_lef_cache(cache_dir)
+	except Exception as e:
+		logger.warning('cannot write LEF cache %s (%s)' % (cache_file, e))
+	return lef
+
+def prune_lef_cache(cache_dir: str):
+	"""
+	remove the pickled LEF objects in the LEF cache other than the lef_cache_max_entries most recently used ones
+
+	:param cache_dir: directory which keeps the pickled LEF objects
+	"""
+	entries = []
+	for entry in os.scandir(cache_dir):
+		# temporary files are being written by the other stages
+		if not entry.name.endswith('.pkl'):
+			continue
+		try:
+			entries.append((entry.stat().st_mtime, entry.path))
+		except OSError:
+			continue
+	entries.sort(reverse=True)
+	for mtime, path in entries[lef_cache_max_entries:]:
+		try:
+			os.remove(path)
+			logger.info('old LEF cache %s is removed' % path)
+		except OSError:
+			pass
+
+split_worker_context = None
+'''
+(design, cut layer names, 3D macro name:(tier_num, 2D macro name), row_splitting) inherited by the forked workers of DEFDesign.split_nets_by_cutLayer_in_workers
+'''
+
+def get_split_record_in_worker(net_name: str) -> Dict[str, Any]:
+	"""
+	split a net in a worker process of DEFDesign.split_nets_by_cutLayer_in_workers
+
+	:param net_name: name of the net to split
+	:return: split result from DEFNet.get_split_record
+	"""
+	design, cutLayer_names, macro_map_3d_to_2d, row_splitting = split_worker_context
+	return design.nets[net_name].get_split_record(cutLayer_names, row_splitting, macro_map_3d_to_2d)
+
 def convert_maps_2d_to_3d_TO_maps_3d_to_2d(maps_2d_to_3d: Dict[str, List[Dict[str, str]]]) -> Dict[str, Dict[str, Tuple[int, str]]]:
 	"""
 
@@ -6718,6 +8601,127 @@ def convert_maps_2d_to_3d_TO_maps_3d_to_2d(maps_2d_to_3d: Dict[str, List[Dict[st
 				maps_3d_to_2d[key][name_3d] = (tier_num, name_2d)
 	return maps_3d_to_2d
 
+def get_def_design_differences(design_a: 'DEFDesign', design_b: 'DEFDesign') -> List[str]:
+	"""
+	compare two designs (e.g., read by DEFStreamReader and read by LEFDEF SWIG) and report the differences
+
+	:param design_a: design to compare
+	:param design_b: design to compare
+	:return: list of differences. empty if two designs are identical
+	"""
+	design_a.materialize()
+	design_b.materialize()
+
+	def shape_key(shape: 'Shape'):
+		if shape.rect is not None:
+			pts = [(shape.rect.ll.x, shape.rect.ll.y), (shape.rect.ur.x, shape.rect.ur.y)]
+		else:
+			pts = [(pt.x, pt.y) for pt in shape.polygon]
+		return shape.shape_type, shape.layer.name if shape.layer is not None else None, pts
+
+	def path_key(path: 'DEFPath'):
+		return (path.layer.name if path.layer is not None else None, path.shape, path.isVirtual, [(pt.x, pt.y) for pt in path.pts], path.exts, path.isRect,
+				[(rect.ll.x, rect.ll.y, rect.ur.x, rect.ur.y) for rect, isRect in zip(path.rects, path.isRect) if isRect],
+				[(via.via.name if via.via is not None else None, via.loc.x, via.loc.y) for via in path.vias])
+
+	def net_key(net: 'DEFNet'):
+		return (net.source, net.type, net.routingPattern, net.voltage, net.shape, [pin.name for pin in net.pins],
+				[(comp_pin.comp.name, comp_pin.pin.name) for comp_pin in net.compPins],
+				[(wire.type, [path_key(path) for path in wire.paths]) for wire in net.wires])
+
+	keys = {
+		'header': lambda design: (design.name, design.dbUnits, design.technology, design.histories, shape_key(design.dieArea) if design.dieArea is not None else None,
+								  [(prop.objType, prop.name, prop.dataType, prop.intRange, prop.doubleRange, prop.intValue, prop.doubleValue, prop.strValue) for prop in design.defProps]),
+		'rows': lambda design: {name: (row.site.name if row.site is not None else None, row.origin.x, row.origin.y, row.orientation, row.num.x, row.num.y, row.step.x, row.step.y) for name, row in design.rows.items()},
+		'tracks': lambda design: [(track.direction, track.start, track.numTracks, track.space, [layer.name for layer in track.layers]) for track in design.tracks],
+		'gCellGrids': lambda design: [(gcg.direction, gcg.start, gcg.numColsRows, gcg.space) for gcg in design.gCellGrids],
+		'vias': lambda design: list(design.vias.keys()) + list(design.viarules.keys()),
+		'components': lambda design: {name: (comp.macro.name if comp.macro is not None else None, comp.eeq, comp.source, comp.pStatus, comp.loc.x, comp.loc.y, comp.orientation, comp.weight, sorted((pin_name, net.name) for pin_name, net in comp.pin2net.items())) for name, comp in design.components.items()},
+		'pins': lambda design: {name: (pin.net.name if pin.net is not None else pin.net_name, pin.isSpecial, pin.direction, pin.type, pin.pStatus, pin.loc.x, pin.loc.y, pin.orientation, [shape_key(shape) for shape in pin.shapes]) for name, pin in design.pins.items()},
+		'blockages': lambda design: [(blkg.type, blkg.layer.name if blkg.layer is not None else None, blkg.partial, blkg.component.name if blkg.component is not None else None, [shape_key(shape) for shape in blkg.shapes]) for blkg in design.blockages],
+		'sNets': lambda design: {name: net_key(net) for name, net in design.sNets.items()},
+		'nets': lambda design: {name: net_key(net) for name, net in design.nets.items()},
+	}
+
+	differences = []
+	for section, key in keys.items():
+		value_a = key(design_a)
+		value_b = key(design_b)
+		if isinstance(value_a, dict):
+			if list(value_a.keys()) != list(value_b.keys()):
+				differences.append('%s: names (or their order) are different' % section)
+			for name in value_a:
+				if name in value_b and value_a[name] != value_b[name]:
+					differences.append('%s: %s is different\n - %s\n - %s' % (section, name, value_a[name], value_b[name]))
+		elif value_a != value_b:
+			differences.append('%s is different\n - %s\n - %s' % (section, value_a, value_b))
+	return differences
+
+def write_synthetic_def(def_file: str, lef: 'LEF', design_name: str = 'synthetic', num_components: int = 100000, num_nets: int = 100000, seed: int = 0):
+	"""
+	write a synthetic placed and routed DEF file with standard cells in lef (used to benchmark DEF readers)
+
+	:param def_file: DEF file to write
+	:param lef: LEF which has standard cell macros and routing layers
+	:param design_name: name of the design
+	:param num_components: number of components
+	:param num_nets: number of nets. each net has a driver and 1~3 receivers with a routed path
+	:param seed: random seed
+	"""
+	import random
+	rand = random.Random(seed)
+	db_units = 2000
+	macros = [macro for macro in lef.macros.values() if macro.site is not None and any(pin.direction == 0 for pin in macro.pins.values()) and any(pin.direction == 1 for pin in macro.pins.values())]
+	if len(macros) == 0 or len(lef.routingLayers) < 2:
+		logger.error('LEF should have standard cells with input/output pins and at least two routing layers. synthetic DEF is not written')
+		return
+	site = macros[0].site
+	site_width = int(site.width * db_units)
+	row_height = int(site.height * db_units)
+	num_sites = int((sum(macro.width for macro in macros) / len(macros) * num_components / site.width) ** 0.5) * 2
+	num_rows = num_sites * site_width // row_height
+	layer_h = lef.routingLayers[0].name
+	layer_v = lef.routingLayers[1].name
+	via_names = [via_name for via_name, via in lef.vias.items() if via.botRoutingLayer is not None and via.botRoutingLayer.name == layer_h and via.topRoutingLayer is not None and via.topRoutingLayer.name == layer_v]
+
+	logger.info('writing synthetic DEF %s (%d components, %d nets)' % (def_file, num_components, num_nets))
+	ofp = flow_file_utils.open_wfile(def_file, force=True)
+	ofp.write('VERSION 5.8 ;\nDIVIDERCHAR "/" ;\nBUSBITCHARS "[]" ;\nDESIGN %s ;\nUNITS DISTANCE MICRONS %d ;\n\n' % (design_name, db_units))
+	ofp.write('DIEAREA ( 0 0 ) ( %d %d ) ;\n\n' % (num_sites * site_width, num_rows * row_height))
+	for row_num in range(num_rows):
+		ofp.write('ROW ROW_%d %s 0 %d %s DO %d BY 1 STEP %d 0 ;\n' % (row_num, site.name, row_num * row_height, 'FS' if row_num % 2 else 'N', num_sites, site_width))
+	ofp.write('\nCOMPONENTS %d ;\n' % num_components)
+	comps = []
+	for comp_num in range(num_components):
+		macro = rand.choice(macros)
+		comp_name = 'inst_%d' % comp_num
+		comps.append((comp_name, macro))
+		ofp.write('- %s %s + PLACED ( %d %d ) %s ;\n' % (comp_name, macro.name, rand.randrange(num_sites) * site_width, rand.randrange(num_rows) * row_height, rand.choice(['N', 'FS'])))
+	ofp.write('END COMPONENTS\n\n')
+	ofp.write('PINS 2 ;\n')
+	ofp.write('- clk + NET clk + DIRECTION INPUT + USE CLOCK + LAYER %s ( -70 0 ) ( 70 140 ) + PLACED ( 0 0 ) N ;\n' % layer_v)
+	ofp.write('- out + NET net_0 + DIRECTION OUTPUT + USE SIGNAL + LAYER %s ( -70 0 ) ( 70 140 ) + PLACED ( %d 0 ) N ;\n' % (layer_v, site_width))
+	ofp.write('END PINS\n\n')
+	ofp.write('NETS %d ;\n' % (num_nets + 1))
+	ofp.write('- clk ( PIN clk ) + USE CLOCK ;\n')
+	for net_num in range(num_nets):
+		driver_name, driver_macro = rand.choice(comps)
+		ofp.write('- net_%d ( %s %s )' % (net_num, driver_name, rand.choice([pin_name for pin_name, pin in driver_macro.pins.items() if pin.direction == 1])))
+		if net_num == 0:
+			ofp.write(' ( PIN out )')
+		for receiver_num in range(rand.randint(1, 3)):
+			receiver_name, receiver_macro = rand.choice(comps)
+			ofp.write(' ( %s %s )' % (receiver_name, rand.choice([pin_name for pin_name, pin in receiver_macro.pins.items() if pin.direction == 0])))
+		x = rand.randrange(num_sites) * site_width
+		y = rand.randrange(num_rows) * row_height
+		ofp.write('\n  + ROUTED %s ( %d %d ) ( %d * )' % (layer_h, x, y, x + rand.randrange(1, 20) * site_width))
+		if len(via_names) > 0:
+			ofp.write(' %s' % via_names[0])
+		ofp.write('\n    NEW %s ( %d %d ) ( * %d )\n  + USE SIGNAL ;\n' % (layer_v, x, y, y + rand.randrange(1, 10) * row_height))
+	ofp.write('END NETS\n\nEND DESIGN\n')
+	ofp.close()
+	logger.info('writing %s done' % def_file)
+
 
 
 def example_make_3d_def():
@@ -6820,6 +8824,157 @@ def example_read_verilog():
 	myDEF.designs['mem_test'].write_verilog('/Users/kchang/temp/lefdef_verilog/mem_test.output.v')
 	pass
 
+def example_read_def_native():
+	myLEF = LEF(['/Users/kchang/Lab/dal/tech/NANGATE45/2020_10/pdk/lef/NangateOpenCellLibrary.tlef', '/Users/kchang/Lab/dal/tech/NANGATE45/2020_10/cell/lef/NangateOpenCellLibrary.lef'])
+	nativeDEF = DEF(lef=myLEF)
+	nativeDEF.read_def('/Users/kchang/temp/3d_legalize/part0.def.gz', use_swig=False)
+	swigDEF = DEF(lef=myLEF)
+	swigDEF.read_def('/Users/kchang/temp/3d_legalize/part0.def.gz', use_swig=True)
+	differences = get_def_design_differences(nativeDEF.designs['part0'], swigDEF.designs['part0'])
+	if len(differences) > 0:
+		logger.error('native DEF reader and LEFDEF SWIG read different designs\n%s' % '\n'.join(differences))
+	else:
+		logger.info('native DEF reader and LEFDEF SWIG read identical designs')
+
+def example_benchmark_read_def():
+	import time
+	myLEF = LEF(['/Users/kchang/Lab/dal/tech/NANGATE45/2020_10/pdk/lef/NangateOpenCellLibrary.tlef', '/Users/kchang/Lab/dal/tech/NANGATE45/2020_10/cell/lef/NangateOpenCellLibrary.lef'])
+	write_synthetic_def('/Users/kchang/temp/synthetic.def.gz', myLEF, num_components=1000000, num_nets=1000000)
+	designs = []
+	for use_swig in [True, False]:
+		start_time = time.time()
+		myDEF = DEF(lef=myLEF)
+		myDEF.read_def('/Users/kchang/temp/synthetic.def.gz', use_swig=use_swig)
+		logger.info('%s: %.2f sec' % ('LEFDEF SWIG' if use_swig else 'native DEF reader', time.time() - start_time))
+		designs.append(myDEF.designs['synthetic'])
+	differences = get_def_design_differences(designs[0], designs[1])
+	logger.info('number of differences: %d' % len(differences))
+
+def example_benchmark_spatial_index():
+	import random
+	import time
+	myLEF = LEF(['/Users/kchang/Lab/dal/tech/NANGATE45/2020_10/pdk/lef/NangateOpenCellLibrary.tlef', '/Users/kchang/Lab/dal/tech/NANGATE45/2020_10/cell/lef/NangateOpenCellLibrary.lef'])
+	rand = random.Random(0)
+	for num_components in [10000, 20000, 40000, 80000]:
+		write_synthetic_def('/Users/kchang/temp/synthetic.def.gz', myLEF, num_components=num_components, num_nets=0)
+		myDEF = DEF(lef=myLEF)
+		myDEF.read_def('/Users/kchang/temp/synthetic.def.gz')
+		design = myDEF.designs['synthetic']
+		# blockages like power pin blockages in 3d_partition (one blockage per 100 components)
+		blkg_shapes = []
+		for blkg_num in range(num_components // 100):
+			blkg_shape = Shape(shape_type=0)
+			llx = rand.randrange(design.dieArea.rect.ur.x)
+			lly = rand.randrange(design.dieArea.rect.ur.y)
+			blkg_shape.rect = Rect(llx=llx, lly=lly, urx=llx + 2000, ury=lly + 2000, rect_type=int)
+			blkg_shapes.append(blkg_shape)
+
+		start_time = time.time()
+		brute_force = [[comp_name for comp_name, comp_info in design.components.items() if blkg_shape.is_intersected(comp_info.get_shape())] for blkg_shape in blkg_shapes]
+		brute_force_time = time.time() - start_time
+		start_time = time.time()
+		indexed = [[comp_info.name for comp_info in design.get_spatial_index().query_intersecting(blkg_shape, 'components')] for blkg_shape in blkg_shapes]
+		indexed_time = time.time() - start_time
+		logger.info('%d components, %d blockages: brute force %.2f sec, spatial index %.2f sec (including build), identical: %s' % (num_components, len(blkg_shapes), brute_force_time, indexed_time, brute_force == indexed))
+
+def example_benchmark_is_intersected():
+	import random
+	import time
+	rand = random.Random(0)
+	shape_pairs = []
+	for pair_num in range(1000000):
+		shape_pair = []
+		for shape_num in range(2):
+			shape = Shape(shape_type=0)
+			llx = rand.randrange(10000)
+			lly = rand.randrange(10000)
+			shape.rect = Rect(llx=llx, lly=lly, urx=llx + rand.randrange(1, 1000), ury=lly + rand.randrange(1, 1000), rect_type=int)
+			shape_pair.append(shape)
+		shape_pairs.append(shape_pair)
+
+	start_time = time.time()
+	shapely_results = [shape_a.get_polygon().intersects(shape_b.get_polygon()) for shape_a, shape_b in shape_pairs]
+	shapely_time = time.time() - start_time
+	start_time = time.time()
+	results = [shape_a.is_intersected(shape_b) for shape_a, shape_b in shape_pairs]
+	fast_path_time = time.time() - start_time
+	logger.info('%d rectangle pairs: shapely %.2f sec, is_intersected %.2f sec, identical: %s' % (len(shape_pairs), shapely_time, fast_path_time, shapely_results == results))
+
+def example_benchmark_net_directedgraph():
+	import time
+	myLEF = LEF(['/Users/kchang/Lab/dal/tech/NANGATE45/2020_10/pdk/lef/NangateOpenCellLibrary.tlef', '/Users/kchang/Lab/dal/tech/NANGATE45/2020_10/cell/lef/NangateOpenCellLibrary.lef'])
+	myDEF = DEF(lef=myLEF)
+	myDEF.read_def('/Users/kchang/temp/aes_routed.def.gz')
+	design = myDEF.designs['aes_cipher_top']
+	# nets with the most path segments (e.g., clock nets)
+	nets = sorted(design.nets.values(), key=lambda net: sum(len(wire.paths) for wire in net.wires), reverse=True)[:10]
+	for net in nets:
+		start_time = time.time()
+		DG = net.get_net_directedgraph()
+		logger.info('net %s (%d paths): %d nodes, %d edges, %.2f sec' % (net.name, sum(len(wire.paths) for wire in net.wires), len(DG.nodes), len(DG.edges), time.time() - start_time))
+
+def example_benchmark_copy_memory():
+	import multiprocessing
+	import resource
+
+	def run(queue: multiprocessing.Queue, copy_kwargs: Dict[str, Any]):
+		my3DLEF = LEF(['/Users/kchang/temp/3d_route/aes_128.lef'])
+		my3DDEF = DEF('/Users/kchang/temp/3d_route/aes_128.def.gz', my3DLEF)
+		design = my3DDEF.designs['aes_128']
+		name_maps = flow_file_utils.read_json_file('/Users/kchang/temp/3d_route/aes_128.map.json')
+		maps_3d_to_2d = convert_maps_2d_to_3d_TO_maps_3d_to_2d(name_maps)
+		myLEF = LEF(['/Users/kchang/Lab/dal/tech/NANGATE45/2020_10/pdk/lef/NangateOpenCellLibrary.tlef', '/Users/kchang/Lab/dal/tech/NANGATE45/2020_10/cell/lef/NangateOpenCellLibrary.lef'])
+		rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+		if copy_kwargs is not None:
+			my3DDEF.copy('aes_128', **copy_kwargs)
+		else:
+			partitions = [set(), set()]
+			for comp_name, comp_info in design.components.items():
+				partitions[maps_3d_to_2d['macro'][comp_info.macro.name][0]].add(comp_name)
+			design.partition_by_pin_comp(partitions=partitions)
+			design.split_by_cutLayer(['ILV_T01'], maps_3d_to_2d, myLEF, True, ['part0', 'part1'])
+		queue.put((rss_before, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+	# run in a new process to measure its own peak RSS (ru_maxrss is in KB on Linux, in bytes on macOS)
+	# full copy vs. the copy split_by_cutLayer makes, then partition and split themselves
+	context = multiprocessing.get_context('fork')
+	for name, copy_kwargs in [('full copy', {}), ('copy for split', {'exclude_sNets': True, 'share_LEF': True}), ('partition and split', None)]:
+		queue = context.Queue()
+		process = context.Process(target=run, args=(queue, copy_kwargs))
+		process.start()
+		rss_before, rss_after = queue.get()
+		process.join()
+		logger.info('%s: peak RSS before: %d, after: %d' % (name, rss_before, rss_after))
+
+def example_benchmark_write_verilog():
+	import time
+	myLEF = LEF(['/Users/kchang/Lab/dal/tech/NANGATE45/2020_10/pdk/lef/NangateOpenCellLibrary.tlef', '/Users/kchang/Lab/dal/tech/NANGATE45/2020_10/cell/lef/NangateOpenCellLibrary.lef'])
+	myDEF = DEF(lef=myLEF)
+	myDEF.read_def('/Users/kchang/temp/synthetic.def.gz', exclude_wires=True)
+	for verilog_file in ['/Users/kchang/temp/synthetic.v', '/Users/kchang/temp/synthetic.v.gz']:
+		start_time = time.time()
+		myDEF.designs['synthetic'].write_verilog(verilog_file)
+		logger.info('%s: %.2f sec' % (verilog_file, time.time() - start_time))
+
+def example_benchmark_split_workers():
+	import filecmp
+	import time
+	name_maps = flow_file_utils.read_json_file('/Users/kchang/temp/3d_route/aes_128.map.json')
+	maps_3d_to_2d = convert_maps_2d_to_3d_TO_maps_3d_to_2d(name_maps)
+	myLEF = LEF(['/Users/kchang/Lab/dal/tech/NANGATE45/2020_10/pdk/lef/NangateOpenCellLibrary.tlef', '/Users/kchang/Lab/dal/tech/NANGATE45/2020_10/cell/lef/NangateOpenCellLibrary.lef'])
+	my3DLEF = LEF(['/Users/kchang/temp/3d_route/aes_128.lef'])
+	for workers in [1, 8]:
+		my3DDEF = DEF('/Users/kchang/temp/3d_route/aes_128.def.gz', my3DLEF)
+		start_time = time.time()
+		splitDEF = my3DDEF.designs['aes_128'].split_by_cutLayer(['ILV_T01'], maps_3d_to_2d, myLEF, True, ['part0', 'part1'], workers=workers)
+		logger.info('%d workers: %.2f sec' % (workers, time.time() - start_time))
+		for part_name in ['part0', 'part1']:
+			splitDEF.designs[part_name].write_def('/Users/kchang/temp/3d_route/output/aes_128_split_%s_%d.def' % (part_name, workers))
+	# the split designs must be written byte-identical regardless of the number of workers
+	for part_name in ['part0', 'part1']:
+		identical = filecmp.cmp('/Users/kchang/temp/3d_route/output/aes_128_split_%s_1.def' % part_name, '/Users/kchang/temp/3d_route/output/aes_128_split_%s_8.def' % part_name, shallow=False)
+		logger.info('%s identical: %s' % (part_name, identical))
+
 def merge_def_for_analysis():
 	lef_path = ['/Users/parkjuseong/Desktop/test/sc12mc_tech.lef', \
 				'/Users/parkjuseong/Desktop/test/sc12mc_cln28hpm_base_hvt_c35.lef', \
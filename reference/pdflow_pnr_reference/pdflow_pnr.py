@@ -3,7 +3,6 @@ import os.path
 import re
 
 import pdflow
-import libdb
 
 from flow_utils import *
 import flow_log_utils
@@ -17,10 +16,14 @@ from flow_var_utils import flow_vars as FLOW_VARS
 from flow_config_utils import flow_cfgs as FLOW_CFGS
 from flow_env_utils import flow_envs as FLOW_ENVS
 
-lib_db: libdb.LibDb
+lib_db: 'libdb.LibDb'
 pnr_input_collaterals: List[str]
 pnr_reports: List[str]
 pnr_sessions: List[str]
+stage_rebuild_causes: Dict[str, str] = {}
+'''
+stage: reason why the stage needs to run (filled by get_target_stages)
+'''
 
 
 def is_stage_done(stage: str) -> bool:
@@ -36,6 +39,241 @@ def is_stage_done(stage: str) -> bool:
 		return False
 
 
+def get_stage_manifest_file(stage: str) -> str:
+	'''
+	get the manifest file of the specified stage, which has the hashes of the inputs and outputs of its last successful run
+
+	:param stage: stage
+	:return: path to the manifest file
+	'''
+	return os.path.join(FLOW_ENVS['WORK_AREA'], 'pnr', stage, flow_file_utils.join_filename(stage, 'manifest', 'json'))
+
+
+def get_manifest_key(path: str) -> str:
+	'''
+	get the key of a file in the manifest. files in the workarea are relative to the workarea, so that the manifest is still valid in a cloned workarea
+
+	:param path: path to the file
+	:return: key of the file
+	'''
+	path = os.path.abspath(path)
+	work_area = os.path.abspath(FLOW_ENVS['WORK_AREA'])
+	if path.startswith(work_area + os.sep):
+		return os.path.relpath(path, work_area)
+	else:
+		return path
+
+
+def get_file_hash(path: str, prev_entry: Dict[str, Any] = None) -> Union[Dict[str, Any], None]:
+	'''
+	get the content hash of a file. if the file has the same size, modification time and inode as prev_entry, prev_entry is returned without reading the file
+
+	:param path: path to the file
+	:param prev_entry: entry of the file in the previous manifest
+	:return: {'sha256', 'size', 'mtime_ns', 'inode'}. None if the file does not exist
+	'''
+	import hashlib
+
+	if not os.path.isfile(path):
+		return None
+	st = os.stat(path)
+	if prev_entry is not None and (prev_entry['size'], prev_entry['mtime_ns'], prev_entry['inode']) == (st.st_size, st.st_mtime_ns, st.st_ino):
+		return prev_entry
+	file_hash = hashlib.sha256()
+	with open(path, 'rb') as ifp:
+		for chunk in iter(lambda: ifp.read(1 << 20), b''):
+			file_hash.update(chunk)
+	return {'sha256': file_hash.hexdigest(), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'inode': st.st_ino}
+
+
+def get_stage_script_generators(stage: str) -> Dict[str, str]:
+	'''
+	get the hashes of the sources of the functions and globals in pdflow_pnr.py used by the script generator of the specified stage (e.g., innovus_start_commands, write_mmmc),
+	including the ones used by them. pdflow_pnr.py itself is not an input of the stages, so that an edit of pdflow_pnr.py which does not change the scripts of a stage (e.g., telemetry) does not run the stage again
+
+	:param stage: stage
+	:return: name: sha256 of its source
+	'''
+	import ast
+	import hashlib
+
+	script_dir = os.path.dirname(os.path.abspath(__file__))
+	with open(os.path.join(script_dir, 'pdflow_pnr.py')) as ifp:
+		pnr_source = ifp.read()
+	definitions = {}
+	for node in ast.parse(pnr_source).body:
+		if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+			definitions[node.name] = node
+		elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+			for target in (node.targets if isinstance(node, ast.Assign) else [node.target]):
+				if isinstance(target, ast.Name):
+					definitions[target.id] = node
+
+	with open(os.path.join(script_dir, 'pdflow_pnr_%s.py' % stage)) as ifp:
+		stage_tree = ast.parse(ifp.read())
+	pending = [node.attr for node in ast.walk(stage_tree) if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == 'pdflow_pnr' and node.attr in definitions]
+	used_names = set()
+	while len(pending) > 0:
+		name = pending.pop()
+		if name in used_names:
+			continue
+		used_names.add(name)
+		pending += [node.id for node in ast.walk(definitions[name]) if isinstance(node, ast.Name) and node.id in definitions]
+	return {name: hashlib.sha256(ast.get_source_segment(pnr_source, definitions[name]).encode()).hexdigest() for name in sorted(used_names)}
+
+
+def get_stage_input_files(stage: str, tool: str) -> List[str]:
+	'''
+	get the files which decide the scripts of the specified stage (configs, vars_spec.py, vars_setup.py and the script generator of the stage).
+	results of the previous stage are tracked by its manifest, and the shared helpers in pdflow_pnr.py by get_stage_script_generators
+
+	:param stage: stage
+	:param tool: tool to use for pnr
+	:return: list of input files (including the files which do not exist)
+	'''
+	script_dir = os.path.dirname(os.path.abspath(__file__))
+	return pdflow.get_pdflow_config_files('pnr', tool) + pdflow.get_pdflow_vars_spec_files('pnr') + pdflow.get_pdflow_vars_setup_files('pnr') + \
+		[os.path.join(script_dir, 'pdflow_pnr_%s.py' % stage)]
+
+
+def get_stage_output_files(stage: str) -> List[str]:
+	'''
+	get the files in the results and sessions directories of the specified stage
+
+	:param stage: stage
+	:return: sorted list of output files
+	'''
+	output_files = []
+	for dir_name in ['results', 'sessions']:
+		for root, dirs, files in os.walk(os.path.join(FLOW_ENVS['WORK_AREA'], 'pnr', stage, dir_name)):
+			output_files += [os.path.join(root, f) for f in files if os.path.isfile(os.path.join(root, f))]
+	return sorted(output_files)
+
+
+def get_outputs_digest(outputs: Dict[str, Dict[str, Any]]) -> str:
+	'''
+	:param outputs: output file key: entry from get_file_hash
+	:return: a hash of all the outputs
+	'''
+	import hashlib
+
+	digest = hashlib.sha256()
+	for key in sorted(outputs):
+		digest.update(('%s %s\n' % (key, outputs[key]['sha256'])).encode())
+	return digest.hexdigest()
+
+
+def read_stage_manifest(stage: str) -> Union[Dict[str, Any], None]:
+	'''
+	read the manifest of the specified stage
+
+	:param stage: stage
+	:return: manifest. None if it does not exist or it is broken
+	'''
+	import json
+
+	manifest_file = get_stage_manifest_file(stage)
+	if not os.path.exists(manifest_file):
+		return None
+	try:
+		with open(manifest_file) as ifp:
+			return json.load(ifp)
+	except (OSError, ValueError):
+		return None
+
+
+def write_stage_manifest(stage: str, tool: str):
+	'''
+	write the manifest of the specified stage after it is done successfully
+
+	:param stage: stage
+	:param tool: tool to use for pnr
+	'''
+	import json
+	import tempfile
+	import flow_var_utils
+
+	prev_manifest = read_stage_manifest(stage)
+	prev_outputs = prev_manifest['outputs'] if prev_manifest is not None else {}
+	prev_stage = get_prev_stage(stage)
+	upstream_manifest = read_stage_manifest(prev_stage) if prev_stage is not None else None
+
+	manifest = {
+		'script_generators': get_stage_script_generators(stage),
+		'inputs': {},
+		'cli_vars': list(flow_var_utils.set_vars_from_cli),
+		'upstream': upstream_manifest['outputs_digest'] if upstream_manifest is not None else None,
+		'outputs': {},
+	}
+	for input_file in get_stage_input_files(stage, tool):
+		key = get_manifest_key(input_file)
+		manifest['inputs'][key] = get_file_hash(input_file)
+	for output_file in get_stage_output_files(stage):
+		key = get_manifest_key(output_file)
+		manifest['outputs'][key] = get_file_hash(output_file, prev_outputs.get(key))
+	manifest['outputs_digest'] = get_outputs_digest(manifest['outputs'])
+
+	# write a temporary file and rename it, so that a broken manifest is never left
+	manifest_file = get_stage_manifest_file(stage)
+	fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(manifest_file), suffix='.tmp')
+	with os.fdopen(fd, 'w') as ofp:
+		json.dump(manifest, ofp, indent=2)
+	os.replace(temp_file, manifest_file)
+
+
+def get_stage_rebuild_cause(stage: str, tool: str) -> Union[str, None]:
+	'''
+	check whether the specified stage is up to date by comparing the hashes in its manifest with the current files
+
+	:param stage: stage to check
+	:param tool: tool to use for pnr
+	:return: the reason why the stage needs to run. None if it is up to date
+	'''
+	import flow_var_utils
+
+	if not is_stage_done(stage):
+		return 'stage is not done'
+	manifest = read_stage_manifest(stage)
+	if manifest is None:
+		return 'manifest %s is missing or broken' % get_stage_manifest_file(stage)
+
+	prev_generators = manifest.get('script_generators', {})
+	cur_generators = get_stage_script_generators(stage)
+	for name in sorted(set(prev_generators) | set(cur_generators)):
+		if prev_generators.get(name) != cur_generators.get(name):
+			return 'script generator changed: pdflow_pnr.%s' % name
+	input_files = {get_manifest_key(input_file): input_file for input_file in get_stage_input_files(stage, tool)}
+	for key in sorted(set(input_files) | set(manifest['inputs'])):
+		if key not in manifest['inputs'] or key not in input_files:
+			return 'input list changed: %s' % key
+		prev_entry = manifest['inputs'][key]
+		# inputs are small, so they are always read (a change keeping the modification time is also detected)
+		cur_entry = get_file_hash(input_files[key])
+		if prev_entry is None and cur_entry is not None:
+			return 'input added: %s' % key
+		if prev_entry is not None and cur_entry is None:
+			return 'input removed: %s' % key
+		if cur_entry is not None and cur_entry['sha256'] != prev_entry['sha256']:
+			return 'input changed: %s' % key
+	if manifest['cli_vars'] != list(flow_var_utils.set_vars_from_cli):
+		return 'vars given in command line changed: %s -> %s' % (manifest['cli_vars'], list(flow_var_utils.set_vars_from_cli))
+
+	prev_stage = get_prev_stage(stage)
+	if prev_stage is not None:
+		upstream_manifest = read_stage_manifest(prev_stage)
+		upstream_digest = upstream_manifest['outputs_digest'] if upstream_manifest is not None else None
+		if upstream_digest != manifest['upstream']:
+			return 'results of the previous stage %s changed' % prev_stage
+
+	output_files = {get_manifest_key(output_file): output_file for output_file in get_stage_output_files(stage)}
+	for key, prev_entry in manifest['outputs'].items():
+		if key not in output_files:
+			return 'output removed: %s' % key
+		if get_file_hash(output_files[key], prev_entry)['sha256'] != prev_entry['sha256']:
+			return 'output changed: %s' % key
+	return None
+
+
 def get_prev_stage(stage: str) -> Union[str, None]:
 	'''
 	get the name of the previous stage
@@ -119,6 +357,54 @@ def get_result_dir(stage: str) -> Union[str, None]:
 	return os.path.join(FLOW_ENVS['WORK_AREA'], FLOW_ENVS['FLOW'], stage, 'results')
 
 
+def promote_results(src_dir: str, dest_dir: str, mode: str) -> Dict[str, Any]:
+	'''
+	promote the results of the previous stage (src_dir) to the result directory of the current stage (dest_dir).
+	- copy: copy all the files (same as flow_file_utils.copy_path)
+	- link: reflink the files if the filesystem supports it. otherwise, copy them (see pdflow.link_file).
+	  hard links are never used, since tools and the stages write the results in place, which would corrupt the results of the previous stage
+
+	:param src_dir: result directory of the previous stage
+	:param dest_dir: result directory of the current stage
+	:param mode: 'copy' or 'link'
+	:return: statistics (mode, seconds, and bytes of each method)
+	'''
+	import time
+
+	start_time = time.time()
+	stats = {'mode': mode, 'seconds': 0.0, 'bytes': {'copy': 0, 'reflink': 0}}
+	if mode == 'copy':
+		# results hard-linked by a promotion of an older pdflow are removed first not to copy the files onto themselves
+		for root, dirs, files in os.walk(dest_dir):
+			for file_name in files:
+				src = os.path.join(src_dir, os.path.relpath(os.path.join(root, file_name), dest_dir))
+				if os.path.isfile(src) and os.path.samefile(src, os.path.join(root, file_name)):
+					os.remove(os.path.join(root, file_name))
+		for path in glob.glob(os.path.join(src_dir, '*')):
+			flow_file_utils.copy_path(path, dest_dir)
+			if os.path.isfile(path):
+				stats['bytes']['copy'] += os.path.getsize(path)
+			else:
+				for root, dirs, files in os.walk(path):
+					stats['bytes']['copy'] += sum(os.path.getsize(os.path.join(root, f)) for f in files if os.path.isfile(os.path.join(root, f)))
+	else:
+		for root, dirs, files in os.walk(src_dir):
+			rel_root = os.path.relpath(root, src_dir)
+			flow_file_utils.make_dir(os.path.normpath(os.path.join(dest_dir, rel_root)))
+			for file_name in files:
+				src = os.path.join(root, file_name)
+				dest = os.path.normpath(os.path.join(dest_dir, rel_root, file_name))
+				if os.path.islink(src):
+					if os.path.lexists(dest):
+						os.remove(dest)
+					os.symlink(os.readlink(src), dest)
+					continue
+				method = pdflow.link_file(src, dest, allow_hardlink=False)
+				stats['bytes'][method] += os.path.getsize(dest)
+	stats['seconds'] = time.time() - start_time
+	return stats
+
+
 def innovus_start_commands(tcl: flow_tcl_utils.TclFile, restore_design: bool = True, design_name: str = None):
 	'''
 	put start up commands in innovus tcl script
@@ -323,28 +609,126 @@ def get_wirelength(tcl: flow_tcl_utils.TclFile, sort: str):
 	tcl.write_section_comment('obtain wire-length')
 	tcl.write('reportWire -detail -summary -sort %s wire_report' % (sort))
 
-def get_target_stages(target_stage: str) -> List[str]:
+def read_report(report_file: str) -> str:
 	'''
-	return list of stages need to perform to reach the target_stage
+	read a report file (gzipped if its name ends with .gz)
+
+	:param report_file: report file
+	:return: contents of the report
+	'''
+	import gzip
+
+	if report_file.endswith('.gz'):
+		with gzip.open(report_file, 'rt', errors='replace') as ifp:
+			return ifp.read()
+	with open(report_file, 'r', errors='replace') as ifp:
+		return ifp.read()
+
+
+def extract_innovus_metrics(report_dir: str, run_dir: str, log_files: List[str]) -> Dict[str, float]:
+	'''
+	extract QoR metrics of a stage from innovus reports and logs.
+	- timeDesign/optDesign summaries (*.summary[.gz]): setup_wns, setup_tns, setup_violating_paths, hold_wns, hold_tns, hold_violating_paths, drv_<type> (e.g., drv_max_cap), drvs, density
+	- summaryReport (see innovus_final_result_commands): std_cells, std_cell_area, wirelength
+	- reportWire (see get_wirelength): wirelength
+	- tool logs: tool_cpu_sec (sum), tool_real_sec (max), tool_mem_mb (max)
+	metrics which are not found in the reports are not included
+
+	:param report_dir: report directory of the stage
+	:param run_dir: run directory of the stage
+	:param log_files: innovus log files of the stage (one for each tier in 3d stages)
+	:return: name: value of metrics
+	'''
+	def to_sec(hms: str) -> int:
+		sec = 0
+		for num in hms.split(':'):
+			sec = sec * 60 + int(num)
+		return sec
+
+	metrics = {}
+	# the latest timing summary has the final timing of the stage
+	summary_files = glob.glob(os.path.join(report_dir, '*.summary')) + glob.glob(os.path.join(report_dir, '*.summary.gz'))
+	for summary_file in sorted(summary_files, key=os.path.getmtime):
+		mode = None
+		for line in read_report(summary_file).splitlines():
+			match = re.match(r'\|\s*(Setup|Hold) mode\s*\|', line)
+			if match:
+				mode = match.group(1).lower()
+				continue
+			match = re.match(r'\|\s*(WNS \(ns\)|TNS \(ns\)|Violating Paths):\s*\|\s*(-?[\d.]+)', line)
+			if match and mode is not None:
+				name = {'WNS (ns)': 'wns', 'TNS (ns)': 'tns', 'Violating Paths': 'violating_paths'}[match.group(1)]
+				metrics['%s_%s' % (mode, name)] = float(match.group(2))
+				continue
+			match = re.match(r'\|\s*(max_cap|max_tran|max_fanout|max_length)\s*\|\s*(\d+)', line)
+			if match:
+				metrics['drv_%s' % match.group(1)] = float(match.group(2))
+				continue
+			match = re.match(r'\s*Density:\s*([\d.]+)\s*%', line)
+			if match:
+				metrics['density'] = float(match.group(1))
+	drv_names = [name for name in metrics if name.startswith('drv_')]
+	if len(drv_names) > 0:
+		metrics['drvs'] = sum(metrics[name] for name in drv_names)
+
+	wirelength_pattern = re.compile(r'Total\s+wire\s*length\D*?([\d.]+)', re.IGNORECASE)
+	wire_report_file = os.path.join(run_dir, 'wire_report')
+	if os.path.exists(wire_report_file):
+		match = wirelength_pattern.search(read_report(wire_report_file))
+		if match:
+			metrics['wirelength'] = float(match.group(1))
+	for summary_file in glob.glob(os.path.join(report_dir, '*_summary', '*.main.htm.ascii')):
+		contents = read_report(summary_file)
+		for name, pattern in [('std_cells', r'Total Standard Cell Number\s*\(cells\)\s*:\s*([\d.]+)'), ('std_cell_area', r'Total Standard Cell Area\s*\(\s*um\^2\)\s*:\s*([\d.]+)'), ('wirelength', wirelength_pattern.pattern)]:
+			match = re.search(pattern, contents, re.IGNORECASE)
+			if match:
+				metrics[name] = float(match.group(1))
+
+	# e.g., --- Ending "Innovus" (totcpu=0:05:23, real=0:10:45, mem=1534.5M) ---
+	for log_file in log_files:
+		for match in re.finditer(r'--- Ending "Innovus" \(totcpu=([\d:]+), real=([\d:]+), mem=([\d.]+)M\)', read_report(log_file)):
+			metrics['tool_cpu_sec'] = metrics.get('tool_cpu_sec', 0) + to_sec(match.group(1))
+			metrics['tool_real_sec'] = max(metrics.get('tool_real_sec', 0), to_sec(match.group(2)))
+			metrics['tool_mem_mb'] = max(metrics.get('tool_mem_mb', 0), float(match.group(3)))
+	return metrics
+
+
+def get_target_stages(target_stage: str, tool: str) -> List[str]:
+	'''
+	return list of stages need to perform to reach the target_stage.
+	a stage is up to date if the hashes in its manifest match the current inputs, outputs and results of the previous stage.
+	the reason why the first stage to run needs to run is stored in stage_rebuild_causes
 
 	:param target_stage: stage to run
+	:param tool: tool to use for pnr
 	:return: list of stages need to perform to reach the target_stage
 	'''
 	#TODO: need to check syn as well
+	global stage_rebuild_causes
+	stage_rebuild_causes = {}
+	logger = flow_log_utils.start_logging()
 	prev_stage_done_last_modified = -1
 	start_stage = pdflow.supported_pnr_stages[0]
 	end_stage = target_stage
 	for cur_stage in pdflow.supported_pnr_stages[:pdflow.supported_pnr_stages.index(end_stage)+1]:
 		start_stage = cur_stage
+		cur_stage_done_file = os.path.join(FLOW_ENVS['WORK_AREA'], 'pnr', cur_stage, flow_file_utils.join_filename(cur_stage, 'done'))
 		if not is_stage_done(cur_stage):
-			break
+			cause = 'stage is not done'
+		elif os.path.exists(get_stage_manifest_file(cur_stage)):
+			cause = get_stage_rebuild_cause(cur_stage, tool)
+		elif prev_stage_done_last_modified > os.stat(cur_stage_done_file).st_mtime:
+			# stages done before manifests were introduced are checked by the modification time of done files
+			cause = 'done file is older than the one of the previous stage (no manifest)'
 		else:
-			cur_stage_done_file = os.path.join(FLOW_ENVS['WORK_AREA'], 'pnr', cur_stage, flow_file_utils.join_filename(cur_stage, 'done'))
-			cur_stage_done_last_modified = os.stat(cur_stage_done_file).st_mtime
-			if prev_stage_done_last_modified > cur_stage_done_last_modified:
-				break
-			else:
-				prev_stage_done_last_modified = cur_stage_done_last_modified
+			cause = None
+
+		if cause is not None:
+			stage_rebuild_causes[cur_stage] = cause
+			logger.info('stage %s needs to run: %s' % (cur_stage, cause))
+			break
+		logger.info('stage %s is up to date' % cur_stage)
+		prev_stage_done_last_modified = os.stat(cur_stage_done_file).st_mtime
 	return pdflow.supported_pnr_stages[pdflow.supported_pnr_stages.index(start_stage):pdflow.supported_pnr_stages.index(end_stage)+1]
 
 
@@ -357,6 +741,8 @@ def get_lef_files() -> List[str]:
 	if 'lib_db' in globals():
 		global lib_db
 	else:
+		import libdb
+
 		lib_db = libdb.LibDb()
 
 	logger = flow_log_utils.start_logging()
@@ -399,6 +785,257 @@ def get_lef_files() -> List[str]:
 	return lef_files
 
 
+def read_lef(lef_files: List[str]) -> 'pdflow_lefdef_utils.LEF':
+	'''
+	read LEF files through the LEF cache of the workarea, so that stages reading the same LEF files (e.g., from get_lef_files) do not parse them again
+
+	:param lef_files: LEF files to read
+	:return: LEF object
+	'''
+	import pdflow_lefdef_utils
+	return pdflow_lefdef_utils.read_lef_with_cache(lef_files, os.path.join(FLOW_ENVS['WORK_AREA'], 'pnr', 'lef_cache'))
+
+
+collateral_3d_version = 1
+'''
+version of 3D collaterals in the 3D collateral store. increase it when the way to make 3D collaterals is changed
+'''
+
+
+def get_3d_collateral_key(lef_files: List[str], gds_files: List[str], lefdef2gds_map_files: List[str], lib_files: Dict[str, List[str]]) -> str:
+	'''
+	get the key of 3D collaterals in the 3D collateral store.
+	the key is a hash of the technology, 3D configurations (number of routing layers in each tier, ILV size/spacing, row splitting, memory cells) and the contents of 2D collaterals
+
+	:param lef_files: tech LEF and macro LEF files
+	:param gds_files: cell GDS files (empty if 3D GDS is not needed)
+	:param lefdef2gds_map_files: innovus and starrc lefdef2gds map files (empty if 3D GDS is not needed)
+	:param lib_files: pvt: cell LIB files
+	:return: key of 3D collaterals
+	'''
+	import hashlib
+	import json
+
+	key = hashlib.sha256()
+	configs = [collateral_3d_version, FLOW_ENVS['TECH'], FLOW_ENVS['IMPL_TYPE'], FLOW_VARS['PNR_3D_NUM_ROUTE_LAYERS'], FLOW_VARS['PNR_3D_ILV_SIZE'], FLOW_VARS['PNR_3D_ILV_SPACING'], True,
+			   FLOW_VARS['MEMORY_CELLS'] if pdflow.has_memory() else None]
+	key.update(json.dumps(configs).encode())
+	files = [('lef', lef_files), ('gds', gds_files), ('map', lefdef2gds_map_files)] + [('lib ' + pvt, lib_files[pvt]) for pvt in sorted(lib_files)]
+	for group, group_files in files:
+		key.update(('\n%s %d\n' % (group, len(group_files))).encode())
+		for group_file in group_files:
+			key.update(('%s\n' % os.path.basename(group_file)).encode())
+			with open(group_file, 'rb') as ifp:
+				for chunk in iter(lambda: ifp.read(1 << 20), b''):
+					key.update(chunk)
+	return key.hexdigest()
+
+
+def build_3d_collaterals(collateral_dir: str, lef_files: List[str], gds_files: List[str], lefdef2gds_map_files: List[str], lib_files: Dict[str, List[str]]):
+	'''
+	make 3D LEF, 3D GDS (if gds_files are given) and 3D LIB/DB files and store them in collateral_dir
+
+	:param collateral_dir: directory to store 3D collaterals
+	:param lef_files: tech LEF and macro LEF files
+	:param gds_files: cell GDS files (empty if 3D GDS is not needed)
+	:param lefdef2gds_map_files: innovus and starrc lefdef2gds map files (empty if 3D GDS is not needed)
+	:param lib_files: pvt: cell LIB files
+	'''
+	import gen_db
+	import pdflow_gds_utils
+	import pdflow_grd_utils
+
+	logger = flow_log_utils.start_logging()
+
+	# create 3d LEF and its related mapping files
+	flow_log_utils.write_subsubsection_comment(logger, 'make 3D LEF')
+	iLEF = read_lef(lef_files)
+	i3DLEF, ilv_layers, maps_2d_to_3d = iLEF.make_3d_lef(FLOW_ENVS['IMPL_TYPE'], FLOW_VARS['PNR_3D_NUM_ROUTE_LAYERS'], [FLOW_VARS['PNR_3D_ILV_SIZE']], [FLOW_VARS['PNR_3D_ILV_SPACING']], True)
+	if pdflow.has_memory():
+		lef_site = list(i3DLEF.sites.values())[0]
+		i3d_m_name = []
+		for m_name in FLOW_VARS['MEMORY_CELLS']:
+			i3d_m_name.append(m_name + '_T0')
+			i3d_m_name.append(m_name + '_T1')
+		for macro in i3DLEF.macros.values():
+			if macro.name in i3d_m_name:
+				macro.width = lef_site.width
+				macro.height = lef_site.height
+	i3DLEF.write_lef(os.path.join(collateral_dir, flow_file_utils.join_filename('3d', 'lef')))
+	flow_file_utils.write_json_file(ilv_layers, os.path.join(collateral_dir, flow_file_utils.join_filename('3d', 'ilv_layers', 'json')))
+	flow_file_utils.write_json_file(maps_2d_to_3d, os.path.join(collateral_dir, flow_file_utils.join_filename('3d', 'map', 'json')))
+
+	if len(gds_files) > 0:
+		# create 3d cell GDS and its related maping files. it will be used in ext flow
+		flow_log_utils.write_subsubsection_comment(logger, 'make 3D cell GDS')
+		invs_lefdef2gds_map = pdflow_gds_utils.read_lefdef2gds_map(lefdef2gds_map_files[0])
+		starrc_lefdef2gds_map = pdflow_grd_utils.read_lefdef2gds_map(lefdef2gds_map_files[1])
+		iGDS = pdflow_gds_utils.GDS()
+		iGDS.read_gds(gds_files=gds_files)
+		i3DGDS, invs_3d_lefdef2gds_map, starrc_3d_lefdef2gds_map, starrc_3d_lefdef2grd_map = iGDS.make_3d_gds(invs_lefdef2gds_map, starrc_lefdef2gds_map, maps_2d_to_3d, i3DLEF)
+		i3DGDS.write_gds(gds_file=os.path.join(collateral_dir, flow_file_utils.join_filename('3d', 'gds')))
+		pdflow_gds_utils.write_lefdef2gds_map(os.path.join(collateral_dir, flow_file_utils.join_filename('3d', 'invs_lefdef2gds.map')), invs_3d_lefdef2gds_map)
+		pdflow_grd_utils.write_lefdef2gds_map(os.path.join(collateral_dir, flow_file_utils.join_filename('3d', 'starrc_lefdef2gds.map')), starrc_3d_lefdef2gds_map)
+		pdflow_grd_utils.write_lefdef2grd_map(os.path.join(collateral_dir, flow_file_utils.join_filename('3d', 'starrc_lefdef2grd.map')), starrc_3d_lefdef2grd_map)
+
+	# create 3d LIB and DB files
+	# TODO: need to generate LIB_CCS for EMIR
+	flow_log_utils.write_subsubsection_comment(logger, 'make 3D LIB/DB')
+	jobs = []
+	for pvt, pvt_lib_files in lib_files.items():
+		lib_pvt_dir = os.path.join(collateral_dir, 'lib', pvt)
+		flow_file_utils.make_dir(lib_pvt_dir)
+		for lib_file in pvt_lib_files:
+			basename = os.path.basename(lib_file)
+			lib_3d_file = os.path.join(lib_pvt_dir, basename)
+			db_3d_file = os.path.join(lib_pvt_dir, gen_db.rename_lib_to_db(basename))
+			if os.path.exists(lib_3d_file) and os.path.exists(db_3d_file):
+				# built by an interrupted or concurrent run (LIB/DB files are renamed only after they are completely written)
+				logger.info('3D LIB/DB files already exist. skip creating them: %s' % (lib_3d_file))
+			else:
+				# pvt corners can have LIB files with the same name. each job has its own tcl file, as jobs run in parallel
+				jobs.append((lib_file, lib_3d_file, db_3d_file, maps_2d_to_3d['macro'], os.path.join(FLOW_ENVS['SCRIPT_DIR'], flow_file_utils.join_filename(pvt, basename, 'tcl'))))
+	if len(jobs) == 0:
+		return
+
+	num_workers = get_3d_lib_workers([job[0] for job in jobs])
+	if num_workers > 1:
+		import multiprocessing
+
+		logger.info('make %d 3D LIB/DB files with %d workers' % (len(jobs), num_workers))
+		with multiprocessing.Pool(num_workers) as pool:
+			for lib_3d_file in pool.imap_unordered(make_3d_lib_db, jobs):
+				logger.info('3D LIB/DB files are created: %s' % lib_3d_file)
+	else:
+		for job in jobs:
+			make_3d_lib_db(job)
+			logger.info('3D LIB/DB files are created: %s' % job[1])
+
+
+def get_3d_lib_workers(lib_files: List[str]) -> int:
+	'''
+	get the number of workers to make 3D LIB/DB files.
+	each worker runs lc_shell, which checks out a DB compiler license, so it is 1 unless FLOW_VARS[PNR_3D_LIB_WORKERS] is given.
+	the given number is limited by the number of cores and the available memory (a worker takes about 10x of the LIB file size)
+
+	:param lib_files: LIB files to convert
+	:return: number of workers
+	'''
+	num_workers = get_dict(FLOW_VARS, 'PNR_3D_LIB_WORKERS')
+	if num_workers is None or num_workers <= 1:
+		return 1
+
+	num_workers = min(num_workers, len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1, len(lib_files))
+	try:
+		available_memory = os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+		worker_memory = 10 * max(os.path.getsize(lib_file) for lib_file in lib_files)
+		num_workers = min(num_workers, available_memory // max(worker_memory, 1))
+	except (ValueError, OSError, AttributeError):
+		pass
+	return max(1, num_workers)
+
+
+def make_3d_lib_db(job: Tuple[str, str, str, List[Dict[str, str]], str]) -> str:
+	'''
+	make a 3D LIB file and its DB file (run in a worker of build_3d_collaterals).
+	both files are written with temporary names and renamed when they are complete, so that interrupted runs never leave half-written files
+
+	:param job: (2D LIB file, 3D LIB file, 3D DB file, 2d to 3d mapping of macros, tcl file to generate DB)
+	:return: 3D LIB file
+	'''
+	import gen_db
+	import liberty_nldm
+
+	lib_file, lib_3d_file, db_3d_file, macro_maps_2d_to_3d, db_tcl_file = job
+	temp_lib_3d_file = os.path.join(os.path.dirname(lib_3d_file), '.tmp_%d_%s' % (os.getpid(), os.path.basename(lib_3d_file)))
+	temp_db_3d_file = os.path.join(os.path.dirname(db_3d_file), '.tmp_%d_%s' % (os.getpid(), os.path.basename(db_3d_file)))
+	try:
+		lib = liberty_nldm.LibertyNLDM(lib_file)
+		lib_3d = lib.make_3d_lib(macro_maps_2d_to_3d)
+		lib_3d.write_lib(temp_lib_3d_file)
+		gen_db.gen_db(temp_lib_3d_file, temp_db_3d_file, db_tcl_file)
+		# DB is renamed first. a LIB file without a DB file is built again
+		os.replace(temp_db_3d_file, db_3d_file)
+		os.replace(temp_lib_3d_file, lib_3d_file)
+	finally:
+		for temp_file in [temp_lib_3d_file, temp_db_3d_file]:
+			if os.path.exists(temp_file):
+				os.remove(temp_file)
+	return lib_3d_file
+
+
+def fetch_3d_collaterals(lef_files: List[str], gds_files: List[str], lefdef2gds_map_files: List[str], lib_files: Dict[str, List[str]]) -> str:
+	'''
+	get 3D collaterals from the 3D collateral store of the workarea. if they are not in the store, build and publish them.
+	the store has the following files in <workarea>/library/3d_collaterals/<key> (see get_3d_collateral_key)
+	- 3d.lef, 3d.ilv_layers.json, 3d.map.json
+	- 3d.gds, 3d.invs_lefdef2gds.map, 3d.starrc_lefdef2gds.map, 3d.starrc_lefdef2grd.map (if gds_files are given)
+	- lib/<pvt>/<3D LIB and DB files>
+
+	:param lef_files: tech LEF and macro LEF files
+	:param gds_files: cell GDS files (empty if 3D GDS is not needed)
+	:param lefdef2gds_map_files: innovus and starrc lefdef2gds map files (empty if 3D GDS is not needed)
+	:param lib_files: pvt: cell LIB files
+	:return: directory of 3D collaterals in the store
+	'''
+	import fcntl
+
+	logger = flow_log_utils.start_logging()
+	store_dir = os.path.join(FLOW_ENVS['WORK_AREA'], 'library', '3d_collaterals')
+	collateral_dir = os.path.join(store_dir, get_3d_collateral_key(lef_files, gds_files, lefdef2gds_map_files, lib_files))
+	if os.path.isdir(collateral_dir):
+		logger.info('3D collaterals found in the store: %s' % collateral_dir)
+		return collateral_dir
+
+	# runs building the same collaterals are serialized by a lock on the key, so only one run uses the partial directory at a time.
+	# the others wait for the lock, and use the collaterals it publishes
+	flow_file_utils.make_dir(store_dir)
+	with open(collateral_dir + '.lock', 'w') as lock_fp:
+		fcntl.flock(lock_fp.fileno(), fcntl.LOCK_EX)
+		if os.path.isdir(collateral_dir):
+			logger.info('3D collaterals are published by another run: %s' % collateral_dir)
+			return collateral_dir
+
+		logger.info('3D collaterals not found in the store. build them: %s' % collateral_dir)
+		# build in a partial directory and rename it, so that the store never has partially built collaterals.
+		# the partial directory is kept if the build is interrupted, and LIB/DB files already built in it are reused by the next build
+		partial_dir = collateral_dir + '.partial'
+		flow_file_utils.make_dir(partial_dir)
+		build_3d_collaterals(partial_dir, lef_files, gds_files, lefdef2gds_map_files, lib_files)
+		os.rename(partial_dir, collateral_dir)
+	return collateral_dir
+
+
+def install_3d_collaterals(collateral_dir: str, result_dir: str, lib_dir: str, lib_files: Dict[str, List[str]]) -> Dict[str, List[str]]:
+	'''
+	place 3D collaterals from the store with the names used in pnr stages (e.g., <block>.lef in result_dir).
+	files are reflinked if the filesystem supports it, otherwise copied (see pdflow.link_file). they are never hard-linked,
+	since the stages and tools can rewrite them in place, which would corrupt the store for the later runs
+
+	:param collateral_dir: directory of 3D collaterals in the store (from fetch_3d_collaterals)
+	:param result_dir: directory to place 3D LEF, GDS and mapping files
+	:param lib_dir: directory to place 3D LIB/DB files (lib_dir/<pvt>/)
+	:param lib_files: pvt: cell LIB files used to build the 3D collaterals
+	:return: pvt: 3D LIB files (in the same order as lib_files)
+	'''
+	def install_file(src: str, dest: str):
+		pdflow.link_file(src, dest, allow_hardlink=False)
+
+	for file_name in os.listdir(collateral_dir):
+		if os.path.isfile(os.path.join(collateral_dir, file_name)):
+			# 3d.<ext> -> <block>.<ext>
+			install_file(os.path.join(collateral_dir, file_name), os.path.join(result_dir, flow_file_utils.join_filename(FLOW_ENVS['BLOCK'], file_name.split('.', 1)[1])))
+
+	lib_3d_files = {}
+	for pvt, pvt_lib_files in lib_files.items():
+		lib_pvt_dir = os.path.join(lib_dir, pvt)
+		flow_file_utils.make_dir(lib_pvt_dir)
+		for file_name in os.listdir(os.path.join(collateral_dir, 'lib', pvt)):
+			install_file(os.path.join(collateral_dir, 'lib', pvt, file_name), os.path.join(lib_pvt_dir, file_name))
+		lib_3d_files[pvt] = [os.path.join(lib_pvt_dir, os.path.basename(lib_file)) for lib_file in pvt_lib_files]
+	return lib_3d_files
+
+
 def get_session_designs(stage: str) -> List[str]:
 	'''
 	get a list of design names in the specified stage's session directory
@@ -917,6 +1554,160 @@ def write_interactive(filename: str, interactive_design: str = None) -> int:
 	return ret
 
 
+def get_innovus_opts(stage: str, main_tcl_file: str) -> str:
+	'''
+	get command line options of innovus to run a script in batch mode
+
+	:param stage: pnr stage to run
+	:param main_tcl_file: path to innovus script
+	:return: innovus options
+	'''
+	# set options for the tool
+	lic_waittime = os.getenv('CDS_MAX_WAITTIME')
+	if lic_waittime is None:
+		lic_waittime = '10000'
+	innovus_opts = '-wait %s -no_gui -batch -file %s -overwrite' % (lic_waittime, main_tcl_file)
+	# invsb (Innovus Basic license) cannot handle ccopt_design with 28nm and below. wait for invs (Innovus license) for 28nm and below.
+	if (stage=='cts' or stage=='route' or stage=='postroute_opt' or stage=='3d_route' or stage=='3d_opt') and int(get_dict(FLOW_CFGS, 'TECH_CFG', 'PDK', 'PROCESS')) < 30:
+		innovus_opts += ' -lic_startup invs'
+	return innovus_opts
+
+
+def run_concurrent_jobs(cmds: List[List[str]], log_files: List[str], max_jobs: int, tokens: List[int] = None, max_tokens: int = None, watch_patterns: List[str] = None, fatal_patterns: List[str] = None, tool_telemetry: List[Dict[str, Any]] = None) -> List[int]:
+	'''
+	run commands concurrently. each command writes its stdout/stderr into its own log file.
+	commands are started in the given order while both the number of running commands and the license tokens checked out by them are within the limits.
+	while the commands run, new lines of their log files are matched with the patterns, so that errors are noticed without waiting for the end of the run
+
+	:param cmds: commands to run (list of arguments for each command)
+	:param log_files: log file of each command
+	:param max_jobs: maximum number of commands running at the same time
+	:param tokens: number of license tokens used by each command (if None, each command uses one token)
+	:param max_tokens: maximum number of license tokens used at the same time (if None, it is not limited)
+	:param watch_patterns: regular expressions of log lines to report as soon as they appear
+	:param fatal_patterns: regular expressions of log lines to abort all the commands (process groups of the running commands are killed, and the pending commands are not started)
+	:param tool_telemetry: if given, wall time, cpu time and peak RSS of each command are appended (see pdflow.start_telemetry)
+	:return: exit code of each command (in the same order as cmds). None for the commands not started because of a fatal error
+	'''
+	import signal
+	import subprocess
+	import time
+
+	def reap_job(job_num: int, block: bool) -> bool:
+		# wait4 gives the resource usage of the command (including its children)
+		proc, start_time = running_jobs[job_num][0], running_jobs[job_num][4]
+		if proc.returncode is not None:
+			return True
+		try:
+			pid, status, usage = os.wait4(proc.pid, 0 if block else os.WNOHANG)
+		except ChildProcessError:
+			proc.wait()
+			return True
+		if pid == 0:
+			return False
+		proc.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+		if tool_telemetry is not None:
+			tool_telemetry.append({
+				'cmd': ' '.join(cmds[job_num]),
+				'exit_code': proc.returncode,
+				'wall_sec': round(time.time() - start_time, 3),
+				'cpu_sec': round(usage.ru_utime + usage.ru_stime, 3),
+				'peak_rss_mb': round(pdflow.get_rusage_mb(usage.ru_maxrss), 1),
+			})
+		return True
+
+	def stop_job(job_num: int):
+		# tools (e.g., innovus) spawn child processes. kill the whole process group
+		proc = running_jobs[job_num][0]
+		try:
+			os.killpg(proc.pid, signal.SIGTERM)
+		except OSError:
+			pass
+		deadline = time.time() + 10
+		while not reap_job(job_num, False):
+			if time.time() > deadline:
+				try:
+					os.killpg(proc.pid, signal.SIGKILL)
+				except OSError:
+					pass
+				reap_job(job_num, True)
+				break
+			time.sleep(0.1)
+
+	def watch_log(job_num: int, log_rfp, partial_line: str, finished: bool) -> str:
+		# the last line is checked in the next call when it is completed, or now if the job finished (e.g., the tool was killed in the middle of a line)
+		lines = (partial_line + log_rfp.read()).split('\n')
+		if finished:
+			lines.append('')
+		for line in lines[:-1]:
+			if any(pattern.search(line) for pattern in fatal_regexes):
+				logger.error('job %d/%d: fatal error found in the log. abort: %s' % (job_num + 1, len(cmds), line))
+				if job_num not in aborted_jobs:
+					aborted_jobs.add(job_num)
+					stop_job(job_num)
+				# the stage fails anyway. stop the other jobs and do not start the pending ones
+				for other_job_num in running_jobs:
+					if other_job_num not in aborted_jobs:
+						logger.warning('abort job %d/%d' % (other_job_num + 1, len(cmds)))
+						aborted_jobs.add(other_job_num)
+						stop_job(other_job_num)
+				pending_jobs.clear()
+				break
+			if any(pattern.search(line) for pattern in watch_regexes):
+				logger.info('job %d/%d: %s' % (job_num + 1, len(cmds), line))
+		return lines[-1]
+
+	logger = flow_log_utils.start_logging()
+	if tokens is None:
+		tokens = [1] * len(cmds)
+	watch_regexes = [re.compile(pattern) for pattern in (watch_patterns or [])]
+	fatal_regexes = [re.compile(pattern) for pattern in (fatal_patterns or [])]
+	exit_codes = [None] * len(cmds)
+	pending_jobs = list(range(len(cmds)))
+	running_jobs = {}
+	aborted_jobs = set()
+	used_tokens = 0
+	try:
+		while len(pending_jobs) > 0 or len(running_jobs) > 0:
+			# a job which needs more tokens than max_tokens runs alone
+			while len(pending_jobs) > 0 and len(running_jobs) < max_jobs and (max_tokens is None or used_tokens + tokens[pending_jobs[0]] <= max_tokens or len(running_jobs) == 0):
+				job_num = pending_jobs.pop(0)
+				logger.info('start job %d/%d: %s (log: %s)' % (job_num + 1, len(cmds), ' '.join(cmds[job_num]), log_files[job_num]))
+				log_fp = flow_file_utils.open_wfile(log_files[job_num], force=True)
+				try:
+					proc = subprocess.Popen(cmds[job_num], stdout=log_fp, stderr=subprocess.STDOUT, start_new_session=True)
+					running_jobs[job_num] = [proc, log_fp, open(log_files[job_num], 'r', errors='replace'), '', time.time()]
+					used_tokens += tokens[job_num]
+				except OSError as e:
+					logger.error('cannot start job %d: %s' % (job_num + 1, e))
+					log_fp.close()
+					exit_codes[job_num] = 127
+
+			time.sleep(0.5)
+			for job_num, job in list(running_jobs.items()):
+				proc, log_fp, log_rfp, partial_line, start_time = job
+				finished = reap_job(job_num, False)
+				if len(watch_regexes) > 0 or len(fatal_regexes) > 0:
+					job[3] = watch_log(job_num, log_rfp, partial_line, finished)
+				if finished or job_num in aborted_jobs:
+					log_fp.close()
+					log_rfp.close()
+					exit_codes[job_num] = proc.returncode
+					used_tokens -= tokens[job_num]
+					del running_jobs[job_num]
+					logger.info('job %d/%d finished with exit code %d' % (job_num + 1, len(cmds), proc.returncode))
+	finally:
+		# e.g., KeyboardInterrupt. do not leave orphan tool processes holding licenses
+		for job_num, (proc, log_fp, log_rfp, partial_line, start_time) in running_jobs.items():
+			logger.warning('terminate job %d/%d' % (job_num + 1, len(cmds)))
+			stop_job(job_num)
+			if len(watch_regexes) > 0 or len(fatal_regexes) > 0:
+				watch_log(job_num, log_rfp, partial_line, True)
+			log_fp.close()
+			log_rfp.close()
+	return exit_codes
+
+
 def run_pnr(stage: str, tool: str, tool_version: str, clean_prevrun: bool, run: str, interactive_design: str, log_tracer: flow_log_utils.CustomStreamHandler) -> int:
 	'''
 	perform pnr of designs
@@ -941,6 +1732,8 @@ def run_pnr(stage: str, tool: str, tool_version: str, clean_prevrun: bool, run:
 	ret = 0
 
 	# load libdb
+	import libdb
+
 	global lib_db
 	lib_db = libdb.LibDb()
 	# read FLOW_CFGS, FLOW_VARS
@@ -956,12 +1749,13 @@ def run_pnr(stage: str, tool: str, tool_version: str, clean_prevrun: bool, run:
 		else:
 			stage = pdflow.supported_pnr_2d_stages[-1]
 	if run == 'main':
-		target_stages = get_target_stages(stage)
+		target_stages = get_target_stages(stage, tool)
 	else:
 		target_stages = [stage]
 
 	for cur_stage in target_stages:
 		# RUN START
+		stage_telemetry = pdflow.start_telemetry('pnr', cur_stage, 'stage')
 		# setup logging and print command arguments
 		logger, log_file = pdflow.setup_command_log('pnr', stage=cur_stage, corner=None, extra_file_ext=run)
 		log_tracer.reset()
@@ -975,6 +1769,8 @@ def run_pnr(stage: str, tool: str, tool_version: str, clean_prevrun: bool, run:
 			'interactive_design': interactive_design,
 		}
 		flow_args_utils.print_args(args, logger=logger)
+		if cur_stage in stage_rebuild_causes:
+			logger.info('stage %s runs because %s' % (cur_stage, stage_rebuild_causes[cur_stage]))
 
 		# setup flow envs (it can depend on other FLOW_ENVS or other FLOW_CFGS)
 		pdflow.setup_command_flow_env('pnr', stage=cur_stage, tool=tool, tool_version=tool_version, logger=logger)
@@ -1025,14 +1821,19 @@ def run_pnr(stage: str, tool: str, tool_version: str, clean_prevrun: bool, run:
 			if run == 'setup' or run == 'main':
 				# SETUP: SCRIPT GENERATION
 				flow_log_utils.write_subsection_comment(logger, 'generate scripts')
+				step_telemetry = pdflow.start_telemetry('pnr', cur_stage, 'setup')
 
 				cd(FLOW_ENVS['RUN_DIR'])
 
 				# for 3d stages, copy all the result files from previous stage
 				prev_stage = get_prev_stage(FLOW_ENVS['STAGE'])
 				if prev_stage is not None and not re.match('3d_.*', FLOW_ENVS['STAGE']):
-					for path in glob.glob(os.path.join(get_prev_result_dir(FLOW_ENVS['STAGE']), '*')):
-						flow_file_utils.copy_path(path, FLOW_ENVS['RESULT_DIR'])
+					promotion_mode = get_dict(FLOW_VARS, 'PNR_RESULT_PROMOTION')
+					if promotion_mode not in ['copy', 'link']:
+						promotion_mode = 'copy'
+					promotion = promote_results(get_prev_result_dir(FLOW_ENVS['STAGE']), FLOW_ENVS['RESULT_DIR'], promotion_mode)
+					logger.info('results of %s are promoted (%s): %d bytes copied, %d bytes reflinked in %.2f sec' % (prev_stage, promotion_mode, promotion['bytes']['copy'], promotion['bytes']['reflink'], promotion['seconds']))
+					flow_file_utils.write_json_file(promotion, os.path.join(FLOW_ENVS['SCRIPT_DIR'], flow_file_utils.join_filename('promotion', 'json')))
 
 				# dump FLOW_ENVS, FLOW_CFGS, FLOW_VARS
 				pdflow.dump_flow_envs_cfgs_vars(FLOW_ENVS['SCRIPT_DIR'])
@@ -1118,10 +1919,17 @@ def run_pnr(stage: str, tool: str, tool_version: str, clean_prevrun: bool, run:
 					pdflow.write_file_list(input_collateral_file, pnr_input_collaterals)
 
 					cd(FLOW_ENVS['WORK_AREA'])
+				pdflow.stop_telemetry(step_telemetry)
 
 			if run == 'run' or run == 'main':
 				# RUN: TOOL RUN
 				flow_log_utils.write_subsection_comment(logger, 'run scripts')
+				step_telemetry = pdflow.start_telemetry('pnr', cur_stage, 'run')
+
+				# the stage is not done until this run finishes
+				for stage_file in [os.path.join(FLOW_ENVS['WORK_AREA'], FLOW_ENVS['FLOW'], FLOW_ENVS['STAGE'], flow_file_utils.join_filename(FLOW_ENVS['STAGE'], 'done')), get_stage_manifest_file(FLOW_ENVS['STAGE'])]:
+					if os.path.exists(stage_file):
+						os.remove(stage_file)
 
 				cd(FLOW_ENVS['RUN_DIR'])
 
@@ -1142,24 +1950,45 @@ def run_pnr(stage: str, tool: str, tool_version: str, clean_prevrun: bool, run:
 					return ret
 				pnr_input_collaterals = []
 
-				# for each main_tcl_file, run the tool
-				for main_tcl_file in main_tcl_files:
+				if tool.upper() == 'INNOVUS':
+					# to avoid **ERROR: (IMPOAX-124):    OpenAccess (OA) shared library installation is older than the one that was used to build this Innovus version. For using the OA installation built and tested with this Innovus version, unset the shell variable OA_HOME. For using 'p020' or higher version of OA, reset OA_HOME to point to that installation.
+					if 'OA_HOME' in os.environ:
+						del os.environ['OA_HOME']
+
+				# run the scripts of tiers (e.g., part0.tcl and part1.tcl) concurrently. each job writes its own innovus log.
+				# the scripts are also run as jobs to watch their logs while they run
+				max_tool_jobs = get_dict(FLOW_VARS, 'PNR_MAX_TOOL_JOBS')
+				if max_tool_jobs is None or max_tool_jobs < 1:
+					max_tool_jobs = 1
+				watch_patterns = get_dict(FLOW_VARS, 'PNR_LOG_WATCH_PATTERNS') or []
+				fatal_patterns = []
+				if get_dict(FLOW_VARS, 'PNR_ABORT_ON_FATAL'):
+					fatal_patterns = get_dict(FLOW_VARS, 'PNR_LOG_FATAL_PATTERNS') or []
+				if tool.upper() == 'INNOVUS' and ((len(main_tcl_files) > 1 and max_tool_jobs > 1) or len(watch_patterns) > 0 or len(fatal_patterns) > 0):
+					import shlex
+
+					flow_log_utils.write_subsubsection_comment(logger, 'run %d jobs' % len(main_tcl_files))
+					job_names = [os.path.splitext(os.path.basename(main_tcl_file))[0] for main_tcl_file in main_tcl_files]
+					cmds = [shlex.split('innovus %s -log %s' % (get_innovus_opts(cur_stage, main_tcl_file), job_name)) for main_tcl_file, job_name in zip(main_tcl_files, job_names)]
+					job_log_files = [os.path.join(FLOW_ENVS['RUN_DIR'], flow_file_utils.join_filename(job_name, 'run', 'log')) for job_name in job_names]
+					job_rets = run_concurrent_jobs(cmds, job_log_files, max_tool_jobs, max_tokens=get_dict(FLOW_VARS, 'PNR_MAX_TOOL_LICENSES'), watch_patterns=watch_patterns, fatal_patterns=fatal_patterns, tool_telemetry=step_telemetry['tools'])
+				else:
+					job_names = None
+					job_rets = None
+
+				# for each main_tcl_file, run the tool (or collect the result of the concurrent job in order)
+				for tcl_num, main_tcl_file in enumerate(main_tcl_files):
 					if tool.upper() == 'INNOVUS':
-						# to avoid **ERROR: (IMPOAX-124):    OpenAccess (OA) shared library installation is older than the one that was used to build this Innovus version. For using the OA installation built and tested with this Innovus version, unset the shell variable OA_HOME. For using 'p020' or higher version of OA, reset OA_HOME to point to that installation.
-						if 'OA_HOME' in os.environ:
-							del os.environ['OA_HOME']
-
-						# set options for the tool
-						lic_waittime = os.getenv('CDS_MAX_WAITTIME')
-						if lic_waittime is None:
-							lic_waittime = '10000'
-						innovus_opts = '-wait %s -no_gui -batch -file %s -overwrite' % (lic_waittime, main_tcl_file)
-						# invsb (Innovus Basic license) cannot handle ccopt_design with 28nm and below. wait for invs (Innovus license) for 28nm and below.
-						if (cur_stage=='cts' or cur_stage=='route' or cur_stage=='postroute_opt' or cur_stage=='3d_route' or cur_stage=='3d_opt') and int(get_dict(FLOW_CFGS, 'TECH_CFG', 'PDK', 'PROCESS')) < 30:
-							innovus_opts += ' -lic_startup invs'
-
-						# run the tool
-						innovus_ret = flow_run_utils.run('innovus %s' % (innovus_opts), run_lvls=['%s(%s)' % (FLOW_ENVS['TOOL'].upper(), FLOW_ENVS['STAGE'].upper())])
+						if job_rets is None:
+							# run the tool
+							innovus_ret = flow_run_utils.run('innovus %s' % (get_innovus_opts(cur_stage, main_tcl_file)), run_lvls=['%s(%s)' % (FLOW_ENVS['TOOL'].upper(), FLOW_ENVS['STAGE'].upper())])
+							tool_log_file = os.path.join(FLOW_ENVS['RUN_DIR'], flow_file_utils.join_filename('innovus', 'latest', 'log'))
+						else:
+							innovus_ret = job_rets[tcl_num]
+							tool_log_file = os.path.join(FLOW_ENVS['RUN_DIR'], flow_file_utils.join_filename(job_names[tcl_num], 'log'))
+							if not os.path.exists(tool_log_file):
+								tool_log_file = job_log_files[tcl_num]
+							logger.info('%s: exit code %s (log: %s)' % (main_tcl_file, innovus_ret, tool_log_file))
 
 						# we use "exit 1" for normal exits (see innovus_end_commands)
 						if innovus_ret == 1:
@@ -1167,8 +1996,6 @@ def run_pnr(stage: str, tool: str, tool_version: str, clean_prevrun: bool, run:
 							ret |= 0
 						else:
 							ret |= 1
-
-						tool_log_file = os.path.join(FLOW_ENVS['RUN_DIR'], flow_file_utils.join_filename('innovus', 'latest', 'log'))
 					else:
 						# FOR OTHER TOOLS
 						tool_log_file = None
@@ -1191,10 +2018,12 @@ def run_pnr(stage: str, tool: str, tool_version: str, clean_prevrun: bool, run:
 						return ret
 
 				cd(FLOW_ENVS['WORK_AREA'])
+				pdflow.stop_telemetry(step_telemetry)
 
 			if run == 'run' or run == 'postproc' or run == 'main':
 				# POSTPROC: POST PROCESSING
 				flow_log_utils.write_subsection_comment(logger, 'run post-processing')
+				step_telemetry = pdflow.start_telemetry('pnr', cur_stage, 'postproc')
 
 				cd(FLOW_ENVS['RUN_DIR'])
 
@@ -1210,7 +2039,14 @@ def run_pnr(stage: str, tool: str, tool_version: str, clean_prevrun: bool, run:
 					return ret
 				pnr_reports = []
 
-				# TODO: implement postproc here
+				# extract QoR metrics from the reports and tool logs into the metrics database of the workarea (see pdflow metrics)
+				if tool.upper() == 'INNOVUS':
+					flow_log_utils.write_subsubsection_comment(logger, 'extract metrics')
+					tool_log_files = [os.path.join(FLOW_ENVS['RUN_DIR'], flow_file_utils.join_filename(os.path.splitext(os.path.basename(main_tcl_file))[0], 'log')) for main_tcl_file in main_tcl_files]
+					tool_log_files = [tool_log_file for tool_log_file in tool_log_files if os.path.exists(tool_log_file)]
+					if len(tool_log_files) == 0 and os.path.exists(os.path.join(FLOW_ENVS['RUN_DIR'], flow_file_utils.join_filename('innovus', 'latest', 'log'))):
+						tool_log_files = [os.path.join(FLOW_ENVS['RUN_DIR'], flow_file_utils.join_filename('innovus', 'latest', 'log'))]
+					pdflow.write_metrics('pnr', cur_stage, tool, extract_innovus_metrics(FLOW_ENVS['REPORT_DIR'], FLOW_ENVS['RUN_DIR'], tool_log_files), logger)
 
 				if pdflow.has_errors(log_tracer=log_tracer, status=ret):
 					logger.error('error detected while post-processing. stop running. resolve the errors to proceed.')
@@ -1221,9 +2057,11 @@ def run_pnr(stage: str, tool: str, tool_version: str, clean_prevrun: bool, run:
 					return ret
 
 				cd(FLOW_ENVS['WORK_AREA'])
+				pdflow.stop_telemetry(step_telemetry)
 
 			if run != 'setup':
 				flow_file_utils.open_wfile(os.path.join(FLOW_ENVS['WORK_AREA'], FLOW_ENVS['FLOW'], FLOW_ENVS['STAGE'], flow_file_utils.join_filename(FLOW_ENVS['STAGE'], 'done')), force=True).close()
+				write_stage_manifest(FLOW_ENVS['STAGE'], tool)
 
 		else:
 			# INTERACTIVE: INTERACTIVE SESSION
@@ -1263,8 +2101,28 @@ def run_pnr(stage: str, tool: str, tool_version: str, clean_prevrun: bool, run:
 
 			cd(FLOW_ENVS['WORK_AREA'])
 
+		pdflow.stop_telemetry(stage_telemetry)
 		flow_log_utils.print_summary(logger, log_tracer)
 		flow_log_utils.stop_logging(logger, log_file)
 
 	return ret
 
+
+def example_benchmark_promote_results():
+	import shutil
+	import time
+
+	logger = flow_log_utils.start_logging()
+	src_dir = '/Users/kchang/Lab/pdflow/workarea/aes/pnr/floorplan/results'
+	work_area = '/Users/kchang/temp/promote_results'
+	for mode in ['copy', 'link']:
+		prev_result_dir = src_dir
+		start_time = time.time()
+		for stage in ['place', 'cts', 'postcts_opt', 'route', 'postroute_opt', 'finish']:
+			result_dir = os.path.join(work_area, mode, stage, 'results')
+			shutil.rmtree(result_dir, ignore_errors=True)
+			flow_file_utils.make_dir(result_dir)
+			promotion = promote_results(prev_result_dir, result_dir, mode)
+			logger.info('%s %s: %d bytes copied, %d bytes reflinked in %.2f sec' % (mode, stage, promotion['bytes']['copy'], promotion['bytes']['reflink'], promotion['seconds']))
+			prev_result_dir = result_dir
+		logger.info('%s: %.2f sec' % (mode, time.time() - start_time))
@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 
-import gen_db
 import pdflow
 import pdflow_pnr
 
@@ -9,11 +8,7 @@ import flow_tcl_utils
 import flow_file_utils
 import flow_log_utils
 
-import argparse
 import pdflow_lefdef_utils
-import pdflow_gds_utils
-import pdflow_grd_utils
-import liberty_nldm
 
 from flow_var_utils import flow_vars as FLOW_VARS
 from flow_config_utils import flow_cfgs as FLOW_CFGS
@@ -277,71 +272,16 @@ def main(main_tcl_file: str) -> int:
             return ret
         pdflow_pnr.pnr_input_collaterals = []
 
-        # create 3d LEF and its related mapping files
-        flow_log_utils.write_subsubsection_comment(logger, 'make 3D LEF')
-        iLEF = pdflow_lefdef_utils.LEF(lef_files)
-        i3DLEF, ilv_layers, maps_2d_to_3d = iLEF.make_3d_lef(FLOW_ENVS['IMPL_TYPE'], FLOW_VARS['PNR_3D_NUM_ROUTE_LAYERS'], [FLOW_VARS['PNR_3D_ILV_SIZE']], [FLOW_VARS['PNR_3D_ILV_SPACING']], True)
-
-
-        if pdflow.has_memory():
-            lef_site = list(i3DLEF.sites.values())[0]
-            i3d_m_name = []
-            for m_name in FLOW_VARS['MEMORY_CELLS']:
-                i3d_m_name.append(m_name + '_T0')
-                i3d_m_name.append(m_name + '_T1')
-            for macro in i3DLEF.macros.values():
-                if macro.name in i3d_m_name:
-                    macro.width = lef_site.width
-                    macro.height = lef_site.height
-            i3DLEF.write_lef(os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename(FLOW_ENVS['BLOCK'], 'lef')))
-        else:
-            i3DLEF.write_lef(os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename(FLOW_ENVS['BLOCK'], 'lef')))
-        flow_file_utils.write_json_file(ilv_layers, os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename(FLOW_ENVS['BLOCK'], 'ilv_layers', 'json')))
-        flow_file_utils.write_json_file(maps_2d_to_3d, os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename(FLOW_ENVS['BLOCK'], 'map', 'json')))
-
+        # get 3D LEF, 3D GDS and 3D LIB/DB from the 3D collateral store of the workarea (they are built only if they are not in the store yet)
+        cell_lib_files = {pvt: pdflow_pnr.lib_db.query(class_name='cell', view_list=['lib'], corner_list=[pvt]) for pvt in pdflow_pnr.lib_db.query(all_corners=True)}
         if pdflow.is_compact2D_flow():
-            # create 3d cell GDS and its related maping files. it will be used in ext flow
-            flow_log_utils.write_subsubsection_comment(logger, 'make 3D cell GDS')
-            invs_lefdef2gds_map = pdflow_gds_utils.read_lefdef2gds_map(invs_lefdef2gds_map_file)
-            starrc_lefdef2gds_map = pdflow_grd_utils.read_lefdef2gds_map(starrc_lefdef2gds_map_file)
-            iGDS = pdflow_gds_utils.GDS()
-            iGDS.read_gds(gds_files=gds_files)
-            i3DGDS, invs_3d_lefdef2gds_map, starrc_3d_lefdef2gds_map, starrc_3d_lefdef2grd_map = iGDS.make_3d_gds(invs_lefdef2gds_map, starrc_lefdef2gds_map, maps_2d_to_3d, i3DLEF)
-            i3DGDS.write_gds(gds_file=os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename(FLOW_ENVS['BLOCK'], 'gds')))
-            pdflow_gds_utils.write_lefdef2gds_map(os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename(FLOW_ENVS['BLOCK'], 'invs_lefdef2gds.map')), invs_3d_lefdef2gds_map)
-            pdflow_grd_utils.write_lefdef2gds_map(os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename(FLOW_ENVS['BLOCK'], 'starrc_lefdef2gds.map')), starrc_3d_lefdef2gds_map)
-            pdflow_grd_utils.write_lefdef2grd_map(os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename(FLOW_ENVS['BLOCK'], 'starrc_lefdef2grd.map')), starrc_3d_lefdef2grd_map)
-
-        # create 3d LIB and DB files
-        # TODO: need to generate LIB_CCS for EMIR
-        flow_log_utils.write_subsubsection_comment(logger, 'make 3D LIB/DB')
-        lib_3d_files = {}
-        pvts = pdflow_pnr.lib_db.query(all_corners=True)
-        route_result_dir = os.path.join(FLOW_ENVS['WORK_AREA'], 'pnr', '3d_route', 'results')
-        for pvt in pvts:
-            lib_files = pdflow_pnr.lib_db.query(class_name='cell', view_list=['lib'], corner_list=[pvt])
-            # lib_pvt_dir = os.path.join(FLOW_ENVS['RESULT_DIR'], 'lib', pvt)
-            lib_pvt_dir = os.path.join(route_result_dir, 'lib', pvt)
-            flow_file_utils.make_dir(lib_pvt_dir)
-            lib_3d_files[pvt] = []
-            for lib_file in lib_files:
-                basename = os.path.basename(lib_file)
-                basename_db = gen_db.rename_lib_to_db(basename)
-
-                lib_3d_file = os.path.join(lib_pvt_dir, basename)
-                db_3d_file = os.path.join(lib_pvt_dir, basename_db)
-
-                if os.path.exists(lib_3d_file):
-                    logger.warning('3D LIB file already exists. skip creating it: %s' % (lib_3d_file))
-                else:
-                    lib = liberty_nldm.LibertyNLDM(lib_file)
-                    lib_3d = lib.make_3d_lib(maps_2d_to_3d['macro'])
-                    lib_3d.write_lib(lib_3d_file)
-                lib_3d_files[pvt].append(lib_3d_file)
-                if os.path.exists(db_3d_file):
-                    logger.warning('3D DB file already exists. skip creating it: %s' % (db_3d_file))
-                else:
-                    gen_db.gen_db(lib_3d_file, db_3d_file, os.path.join(FLOW_ENVS['SCRIPT_DIR'], flow_file_utils.join_filename(basename, 'tcl')))
+            collateral_dir = pdflow_pnr.fetch_3d_collaterals(lef_files, gds_files, [invs_lefdef2gds_map_file, starrc_lefdef2gds_map_file], cell_lib_files)
+        else:
+            collateral_dir = pdflow_pnr.fetch_3d_collaterals(lef_files, [], [], cell_lib_files)
+        lib_3d_files = pdflow_pnr.install_3d_collaterals(collateral_dir, FLOW_ENVS['RESULT_DIR'], os.path.join(FLOW_ENVS['WORK_AREA'], 'pnr', '3d_route', 'results', 'lib'), cell_lib_files)
+        iLEF = pdflow_pnr.read_lef(lef_files)
+        i3DLEF = pdflow_pnr.read_lef([os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename(FLOW_ENVS['BLOCK'], 'lef'))])
+        maps_2d_to_3d = flow_file_utils.read_json_file(os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename(FLOW_ENVS['BLOCK'], 'map', 'json')))
 
         # load mmmc file
         route_script_dir = os.path.join(FLOW_ENVS['WORK_AREA'], 'pnr', '3d_route', 'scripts')
@@ -106,6 +106,20 @@ class create_hyper():
 			pass
 
 
+def scale_design(design: pdflow_lefdef_utils.DEFDesign, scale_factor: float):
+	'''
+	scale a design with its components in a columnar store, so that their locations are scaled at once (see DEFDesign.attach_component_store)
+
+	:param design: design to scale
+	:param scale_factor: scale factor (ratio, not percentage)
+	'''
+	try:
+		design.attach_component_store()
+	except ImportError:
+		logger.warning('NumPy is not available. components of design %s are scaled one by one' % design.name)
+	design.scale(scale_factor)
+
+
 def main(main_tcl_files: List[str]) -> int:
 	'''
 	perform design partition
@@ -134,8 +148,8 @@ def main(main_tcl_files: List[str]) -> int:
 
 		# create lef/def objects
 		flow_log_utils.write_subsubsection_comment(logger, 'read lef/def')
-		iLEF = pdflow_lefdef_utils.LEF(lef_files)
-		iDEF = pdflow_lefdef_utils.DEF(def_file, iLEF, exclude_wires=True)
+		iLEF = pdflow_pnr.read_lef(lef_files)
+		iDEF = pdflow_lefdef_utils.DEF(def_file, iLEF, exclude_wires=True, lazy=True)
 
 		flow_log_utils.write_subsubsection_comment(logger, 'handle fixed cells')
 		fixed_objs = {}
@@ -178,10 +192,9 @@ def main(main_tcl_files: List[str]) -> int:
 														rect_type=int
 														)
 				blkg_tier = int(blkg_info[4])
-				for comp_name, comp_info in iDEF.designs[FLOW_ENVS['BLOCK']].components.items():
-					if blkg_shape.is_intersected(comp_info.get_shape()):
-						fixed_objs[comp_name] = 1-blkg_tier
-						num_fixed_cells[1-blkg_tier] += 1
+				for comp_info in iDEF.designs[FLOW_ENVS['BLOCK']].get_spatial_index().query_intersecting(blkg_shape, 'components'):
+					fixed_objs[comp_info.name] = 1-blkg_tier
+					num_fixed_cells[1-blkg_tier] += 1
 			ifp.close()
 			logger.info('total %d, %d cells blocked by power pins are fixed on tier 0 and 1, respectively' % (num_fixed_cells[0], num_fixed_cells[1]))
 
@@ -196,9 +209,9 @@ def main(main_tcl_files: List[str]) -> int:
 
 				macro_blkg_shape = iDEF.designs[FLOW_ENVS['BLOCK']].components[macro_name].get_shape()
 
-				for comp_name, comp_info in iDEF.designs[FLOW_ENVS['BLOCK']].components.items():
-					if macro_blkg_shape.is_intersected(comp_info.get_shape()) and comp_name not in fixed_objs.keys():
-						fixed_objs[comp_name] = 1-part
+				for comp_info in iDEF.designs[FLOW_ENVS['BLOCK']].get_spatial_index().query_intersecting(macro_blkg_shape, 'components'):
+					if comp_info.name not in fixed_objs.keys():
+						fixed_objs[comp_info.name] = 1-part
 			ifp.close()
 
 		ofp = flow_file_utils.open_wfile(os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename(FLOW_ENVS['BLOCK'], 'fixed_objs', 'txt')), force=True)
@@ -247,7 +260,7 @@ def main(main_tcl_files: List[str]) -> int:
 		flow_log_utils.write_subsubsection_comment(logger, 'scale dimension & write outputs')
 		for part_name, part_info in partdef.designs.items():
 			if FLOW_ENVS['IMPL_METHOD'] == 'compact2d':
-				part_info.scale(0.707)
+				scale_design(part_info, 0.707)
 			part_info.write_def(os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename(part_name, 'def')))
 			part_info.write_verilog(os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename(part_name, 'v')))
 		if FLOW_VARS['PNR_PARTITION_METHOD'] == '3DFD':
@@ -265,9 +278,12 @@ def main(main_tcl_files: List[str]) -> int:
 				preserve_wire = True
 			else:
 				preserve_wire = False
-			splitDEF = i3ddef.designs[FLOW_ENVS['BLOCK']].split_by_cutLayer(split_cutLayer_names=ilv_layers, maps_3d_to_2d=maps_3d_to_2d, split_lef=iLEF, row_splitting=True, split_names=['part0', 'part1'], exclude_wires=not preserve_wire)
+			split_workers = get_dict(FLOW_VARS, 'PNR_3D_SPLIT_WORKERS')
+			if split_workers is None or split_workers < 1:
+				split_workers = 1
+			splitDEF = i3ddef.designs[FLOW_ENVS['BLOCK']].split_by_cutLayer(split_cutLayer_names=ilv_layers, maps_3d_to_2d=maps_3d_to_2d, split_lef=iLEF, row_splitting=True, split_names=['part0', 'part1'], exclude_wires=not preserve_wire, workers=split_workers)
 			for name, info in splitDEF.designs.items():
-				info.scale(0.707)
+				scale_design(info, 0.707)
 			splitDEF.designs['part0'].write_verilog(os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename('part0', 'cluster',  'v')))
 			splitDEF.designs['part0'].write_def(os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename('part0', 'cluster',  'def')))
 			splitDEF.designs['part1'].write_verilog(os.path.join(FLOW_ENVS['RESULT_DIR'], flow_file_utils.join_filename('part1', 'cluster', 'v')))
@@ -122,9 +122,9 @@ def main(main_tcl_files: List[str]) -> int:
 
 		# read 3d lef/def
 		flow_log_utils.write_subsubsection_comment(logger, 'read 3d lef/def')
-		i3DLEF = pdflow_lefdef_utils.LEF([lef_3d_file])
+		i3DLEF = pdflow_pnr.read_lef([lef_3d_file])
 		i3DDEF = pdflow_lefdef_utils.DEF(def_3d_file, i3DLEF)
-		iLEF = pdflow_lefdef_utils.LEF(lef_files)
+		iLEF = pdflow_pnr.read_lef(lef_files)
 
 		# split the dsign
 		flow_log_utils.write_subsubsection_comment(logger, 'split design')
@@ -135,7 +135,10 @@ def main(main_tcl_files: List[str]) -> int:
 			preserve_wire = True
 		else:
 			preserve_wire = False
-		splitDEF = i3DDEF.designs[FLOW_ENVS['BLOCK']].split_by_cutLayer(split_cutLayer_names=ilv_layers, maps_3d_to_2d=maps_3d_to_2d, split_lef=iLEF, row_splitting=True, split_names=['part0', 'part1'], exclude_wires=not preserve_wire)
+		split_workers = get_dict(FLOW_VARS, 'PNR_3D_SPLIT_WORKERS')
+		if split_workers is None or split_workers < 1:
+			split_workers = 1
+		splitDEF = i3DDEF.designs[FLOW_ENVS['BLOCK']].split_by_cutLayer(split_cutLayer_names=ilv_layers, maps_3d_to_2d=maps_3d_to_2d, split_lef=iLEF, row_splitting=True, split_names=['part0', 'part1'], exclude_wires=not preserve_wire, workers=split_workers)
 
 		# create top verilog/spef, tier verilog/def
 		flow_log_utils.write_subsubsection_comment(logger, 'write outputs')
@@ -244,7 +244,7 @@ def project_def():
 	partitioning = []
 	# read LEF
 	lef_files = pdflow_pnr.get_lef_files()
-	iLEF = pdflow_lefdef_utils.LEF(lef_files)
+	iLEF = pdflow_pnr.read_lef(lef_files)
 
 	# read DEF
 	work_area = os.path.join(FLOW_ENVS['WORK_AREA'])
@@ -278,12 +278,14 @@ def project_def():
 	# determine the blockages with full or partial when the both part DEF files are projected into single plane
 	full_blkgs = []
 
-	# compute full blockages
+	# compute full blockages (only the memory cells in part1 near each memory cell in part0 are checked)
+	part1_index = part1_DEF.designs[FLOW_ENVS['BLOCK']].get_spatial_index()
 	for macro_0 in macro_0_rect:
-		for macro_1 in macro_1_rect:
-			full_blockage = macro_0.rect.get_intersection(macro_1.rect)
-			if full_blockage is not None:
-				full_blkgs.append(full_blockage)
+		for compo_info in part1_index.query(macro_0.rect, 'components'):
+			if compo_info.macro.name in FLOW_VARS['MEMORY_CELLS']:
+				full_blockage = macro_0.rect.get_intersection(compo_info.get_shape().rect)
+				if full_blockage is not None:
+					full_blkgs.append(full_blockage)
 	'''
 	Partial blockage don't need to be computed. 
 	Overlap blockage in innovus is legal.
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'lefdef: needs LEFDEF SWIG and the flow utilities of the CE environment (select with -m lefdef)')
+
+
+def import_or_skip(module_name: str):
+    '''
+    import a module which is available only in the CE environment (e.g., LEFDEF).
+    tests are skipped if the module is missing, unless PDFLOW_TEST_REQUIRE_LEFDEF=1 (set in CI, where a skip would hide that the tests did not run)
+
+    :param module_name: module to import
+    :return: module
+    '''
+    if os.environ.get('PDFLOW_TEST_REQUIRE_LEFDEF') == '1':
+        return __import__(module_name)
+    return pytest.importorskip(module_name)
+
+
+@pytest.fixture(scope='session')
+def pdflow_pnr():
+    # pdflow_pnr imports the flow utilities of the CE environment (but not LEFDEF)
+    import_or_skip('flow_utils')
+    import_or_skip('flow_tcl_utils')
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pdflow_pnr_reference'))
+    import pdflow_pnr
+    return pdflow_pnr
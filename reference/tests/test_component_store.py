@@ -0,0 +1,57 @@
+import pytest
+
+from conftest import import_or_skip
+
+# pdflow_lefdef_utils needs LEFDEF SWIG and the flow utilities of the CE environment
+pytestmark = pytest.mark.lefdef
+import_or_skip('numpy')
+from test_def_stream_reader import REPRESENTATIVE_DEF, lef, pdflow_lefdef_utils, read_designs, write_defs  # noqa: E402,F401
+
+
+def get_components(design):
+    return [(comp.name, comp.loc.x, comp.loc.y, comp.orientation, comp.pStatus, comp.macro.name) for comp in design.components.values()]
+
+
+def add_component(design, comp_name, x, y):
+    # added after the store is created, so it is not in the store
+    comp = design.components['u0'].copy(design)
+    comp.name = comp_name
+    comp.loc = pdflow_lefdef_utils.Point(x, y, point_type=int)
+    design.components[comp_name] = comp
+
+
+@pytest.mark.parametrize('scale_factor', [0.707, 0.5, 1.3])
+def test_scale_with_component_store(lef, tmp_path, scale_factor):
+    def_files = write_defs(tmp_path, REPRESENTATIVE_DEF)
+    plain_design = read_designs(lef, def_files, False)['top']
+    stored_design = read_designs(lef, def_files, False)['top']
+    stored_design.attach_component_store()
+    assert all(isinstance(comp, pdflow_lefdef_utils.DEFComponentView) for comp in stored_design.components.values())
+    add_component(plain_design, 'u3', 1235, 2805)
+    add_component(stored_design, 'u3', 1235, 2805)
+
+    # vectorized path vs. scaling each component
+    plain_design.scale(scale_factor)
+    stored_design.scale(scale_factor)
+    assert get_components(stored_design) == get_components(plain_design)
+    differences = pdflow_lefdef_utils.get_def_design_differences(stored_design, plain_design)
+    assert differences == [], '\n'.join(differences)
+
+    # the scaled values move back to the components
+    stored_design.detach_component_store()
+    assert all(type(comp) is pdflow_lefdef_utils.DEFComponent for comp in stored_design.components.values())
+    assert get_components(stored_design) == get_components(plain_design)
+
+
+def test_component_view_works_as_component(lef, tmp_path):
+    design = read_designs(lef, write_defs(tmp_path, REPRESENTATIVE_DEF), False)['top']
+    expected = get_components(design)
+    store = design.attach_component_store()
+    assert get_components(design) == expected
+
+    comp = design.components['u2']
+    comp.loc.move(380, 2800)
+    comp.orientation = 0
+    assert (store.loc_x[store.index['u2']], store.loc_y[store.index['u2']], store.orientation[store.index['u2']]) == (1900, 2800, 0)
+    assert store.get_bboxes()[store.index['u2']].tolist() == [1900, 2800, 1900 + 760, 2800 + 2800]
+    assert store.get_names(store.pStatus == 0) == ['u1/sub[0]']
@@ -0,0 +1,132 @@
+import os
+import signal
+import sys
+import time
+
+import pytest
+
+
+# stands in for innovus on PATH: innovus <job name> <seconds to run> <exit code> [<log output>]
+# start/end of each run are appended to $INNOVUS_STUB_EVENTS (a killed run has no end)
+STUB_INNOVUS = '''#!%s
+import os
+import sys
+import time
+
+name, seconds, exit_code = sys.argv[1], float(sys.argv[2]), int(sys.argv[3])
+with open(os.environ['INNOVUS_STUB_EVENTS'], 'a') as fp:
+    fp.write('%%f start %%s\\n' %% (time.time(), name))
+if len(sys.argv) > 4:
+    sys.stdout.write(sys.argv[4])
+    sys.stdout.flush()
+time.sleep(seconds)
+with open(os.environ['INNOVUS_STUB_EVENTS'], 'a') as fp:
+    fp.write('%%f end %%s\\n' %% (time.time(), name))
+sys.exit(exit_code)
+'''
+
+
+@pytest.fixture
+def stub_innovus(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    stub_file = bin_dir / 'innovus'
+    stub_file.write_text(STUB_INNOVUS % sys.executable)
+    stub_file.chmod(0o755)
+    monkeypatch.setenv('PATH', str(bin_dir) + os.pathsep + os.environ.get('PATH', ''))
+    events_file = str(tmp_path / 'events')
+    monkeypatch.setenv('INNOVUS_STUB_EVENTS', events_file)
+    return events_file
+
+
+def read_events(events_file):
+    events = []
+    if os.path.exists(events_file):
+        with open(events_file) as fp:
+            for line in fp:
+                event_time, kind, name = line.split()
+                events.append((float(event_time), kind, name))
+    # an end and a start at the same time: the end comes first
+    return sorted(events)
+
+
+def get_usages(events, tokens):
+    '''
+    :return: (number of running jobs, tokens used by them) after each event
+    '''
+    running = set()
+    usages = []
+    for event_time, kind, name in events:
+        if kind == 'start':
+            running.add(name)
+        else:
+            running.discard(name)
+        usages.append((len(running), sum(tokens[name] for name in running)))
+    return usages
+
+
+def make_jobs(tmp_path, runs):
+    cmds = [['innovus', 'job%d' % job_num] + [str(arg) for arg in run] for job_num, run in enumerate(runs)]
+    log_files = [str(tmp_path / ('job%d.run.log' % job_num)) for job_num in range(len(runs))]
+    return cmds, log_files
+
+
+def test_jobs_run_concurrently(pdflow_pnr, stub_innovus, tmp_path):
+    cmds, log_files = make_jobs(tmp_path, [(1, 1, 'job0 done\n'), (1, 0), (1, 3), (1, 1)])
+    tool_telemetry = []
+    assert pdflow_pnr.run_concurrent_jobs(cmds, log_files, 2, tool_telemetry=tool_telemetry) == [1, 0, 3, 1]
+
+    events = read_events(stub_innovus)
+    starts = [name for event_time, kind, name in events if kind == 'start']
+    # jobs started together may write their start in any order
+    assert set(starts[:2]) == {'job0', 'job1'} and set(starts[2:]) == {'job2', 'job3'}
+    assert len(events) == 8
+    # jobs overlap, but no more than max_jobs run at the same time
+    assert max(num_jobs for num_jobs, used_tokens in get_usages(events, dict.fromkeys(['job0', 'job1', 'job2', 'job3'], 1))) == 2
+    with open(log_files[0]) as fp:
+        assert fp.read() == 'job0 done\n'
+    assert sorted(telemetry['exit_code'] for telemetry in tool_telemetry) == [0, 1, 1, 3]
+
+
+def test_jobs_within_license_tokens(pdflow_pnr, stub_innovus, tmp_path):
+    cmds, log_files = make_jobs(tmp_path, [(0.5, 1), (0.5, 1), (0.5, 1), (0.5, 0), (0.5, 1)])
+    tokens = {'job0': 2, 'job1': 1, 'job2': 1, 'job3': 3, 'job4': 1}
+    assert pdflow_pnr.run_concurrent_jobs(cmds, log_files, 3, tokens=list(tokens.values()), max_tokens=2) == [1, 1, 1, 0, 1]
+
+    events = read_events(stub_innovus)
+    usages = get_usages(events, tokens)
+    # job1 and job2 share the tokens, job3 needs more tokens than max_tokens and runs alone
+    assert max(num_jobs for num_jobs, used_tokens in usages) == 2
+    assert all(used_tokens <= 2 or num_jobs == 1 for num_jobs, used_tokens in usages)
+    starts = [name for event_time, kind, name in events if kind == 'start']
+    assert starts[0] == 'job0' and set(starts[1:3]) == {'job1', 'job2'} and starts[3:] == ['job3', 'job4']
+
+
+def test_job_which_cannot_start(pdflow_pnr, stub_innovus, tmp_path):
+    cmds, log_files = make_jobs(tmp_path, [(0.1, 1), (0.1, 1)])
+    cmds[0][0] = str(tmp_path / 'no_such_tool')
+    assert pdflow_pnr.run_concurrent_jobs(cmds, log_files, 2) == [127, 1]
+
+
+def test_fatal_error_aborts_jobs(pdflow_pnr, stub_innovus, tmp_path):
+    cmds, log_files = make_jobs(tmp_path, [(30, 1, 'Innovus started\n**ERROR: (IMPOAX-124): OpenAccess (OA) shared library installation is older\n'), (30, 1), (0.1, 1)])
+    start_time = time.monotonic()
+    exit_codes = pdflow_pnr.run_concurrent_jobs(cmds, log_files, 2, fatal_patterns=['IMPOAX-124'])
+    # killed as soon as the line appears, not at the end of the run
+    assert time.monotonic() - start_time < 15
+    assert exit_codes == [-signal.SIGTERM, -signal.SIGTERM, None]
+
+    events = read_events(stub_innovus)
+    # the running job is killed as well, and the pending job is not started
+    assert sorted(name for event_time, kind, name in events if kind == 'start') == ['job0', 'job1']
+    assert [name for event_time, kind, name in events if kind == 'end'] == []
+
+
+def test_fatal_error_in_unterminated_last_line(pdflow_pnr, stub_innovus, tmp_path):
+    cmds, log_files = make_jobs(tmp_path, [(0, 1, 'Innovus started\nFailed to check out license'), (30, 1)])
+    start_time = time.monotonic()
+    exit_codes = pdflow_pnr.run_concurrent_jobs(cmds, log_files, 2, fatal_patterns=['Failed to check out'])
+    assert time.monotonic() - start_time < 15
+    # the job exited by itself, the other job is killed because of its last line
+    assert exit_codes == [1, -signal.SIGTERM]
+    assert [name for event_time, kind, name in read_events(stub_innovus) if kind == 'end'] == ['job0']
@@ -0,0 +1,230 @@
+import os
+import sys
+
+import pytest
+
+from conftest import import_or_skip
+
+# pdflow_lefdef_utils needs LEFDEF SWIG and the flow utilities of the CE environment
+pytestmark = pytest.mark.lefdef
+import_or_skip('LEFDEF')
+import_or_skip('flow_utils')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pdflow_lefdef_utils  # noqa: E402
+
+
+LEF_TEXT = '''VERSION 5.8 ;
+BUSBITCHARS "[]" ;
+DIVIDERCHAR "/" ;
+UNITS
+  DATABASE MICRONS 2000 ;
+END UNITS
+MANUFACTURINGGRID 0.005 ;
+SITE core
+  CLASS CORE ;
+  SYMMETRY Y ;
+  SIZE 0.19 BY 1.4 ;
+END core
+LAYER metal1
+  TYPE ROUTING ;
+  DIRECTION HORIZONTAL ;
+  PITCH 0.14 ;
+  WIDTH 0.07 ;
+  SPACING 0.065 ;
+END metal1
+LAYER via1
+  TYPE CUT ;
+  SPACING 0.08 ;
+  WIDTH 0.07 ;
+END via1
+LAYER metal2
+  TYPE ROUTING ;
+  DIRECTION VERTICAL ;
+  PITCH 0.19 ;
+  WIDTH 0.07 ;
+  SPACING 0.07 ;
+END metal2
+VIA via1_0 DEFAULT
+  LAYER metal1 ;
+    RECT -0.065 -0.035 0.065 0.035 ;
+  LAYER via1 ;
+    RECT -0.035 -0.035 0.035 0.035 ;
+  LAYER metal2 ;
+    RECT -0.035 -0.065 0.035 0.065 ;
+END via1_0
+MACRO INV
+  CLASS CORE ;
+  ORIGIN 0 0 ;
+  SIZE 0.38 BY 1.4 ;
+  SYMMETRY X Y ;
+  SITE core ;
+  PIN A
+    DIRECTION INPUT ;
+    USE SIGNAL ;
+    PORT
+      LAYER metal1 ;
+        RECT 0.06 0.525 0.15 0.7 ;
+    END
+  END A
+  PIN ZN
+    DIRECTION OUTPUT ;
+    USE SIGNAL ;
+    PORT
+      LAYER metal1 ;
+        RECT 0.23 0.15 0.32 1.25 ;
+    END
+  END ZN
+END INV
+END LIBRARY
+'''
+
+DEF_HEADER = '''VERSION 5.8 ;
+DIVIDERCHAR "/" ;
+BUSBITCHARS "[]" ;
+DESIGN %s ;
+UNITS DISTANCE MICRONS 2000 ;
+'''
+
+REPRESENTATIVE_DEF = DEF_HEADER % 'top' + '''HISTORY created for the parity test ;
+PROPERTYDEFINITIONS
+  DESIGN FE_CORE_BOX_LL_X REAL 10.0 ;
+  COMPONENT weight INTEGER RANGE 0 10 ;
+  NET note STRING "two words" ;
+END PROPERTYDEFINITIONS
+DIEAREA ( 0 0 ) ( 20000 14000 ) ;
+ROW ROW_0 core 0 0 N DO 50 BY 1 STEP 380 0 ;
+ROW ROW_1 core 0 2800 FS DO 50 BY 1 STEP 380 0 ;
+TRACKS X 190 DO 52 STEP 380 LAYER metal2 ;
+TRACKS Y 140 DO 50 STEP 280 LAYER metal1 ;
+GCELLGRID X 0 DO 11 STEP 2000 ;
+GCELLGRID Y 0 DO 8 STEP 2000 ;
+COMPONENTS 3 ;
+- u0 INV + PLACED ( 0 0 ) N ;
+- "u1/sub[0]" INV + FIXED ( 760 2800 ) FS ;
+- u2 INV + SOURCE TIMING + PLACED ( 1520 0 ) FN + WEIGHT 2 ;
+END COMPONENTS
+PINS 3 ;
+- in + NET in + DIRECTION INPUT + USE SIGNAL
+  + LAYER metal2 ( -70 0 ) ( 70 140 ) + PLACED ( 190 0 ) N ;
+- out + NET out + DIRECTION OUTPUT + USE SIGNAL
+  + PORT + LAYER metal2 ( -70 0 ) ( 70 140 ) + PLACED ( 950 0 ) N
+  + PORT + LAYER metal1 ( 0 -70 ) ( 140 70 ) + PLACED ( 0 1400 ) N ;
+- VDD + NET VDD + SPECIAL + DIRECTION INOUT + USE POWER
+  + LAYER metal1 ( 0 -140 ) ( 20000 140 ) + FIXED ( 0 2800 ) N ;
+END PINS
+BLOCKAGES 2 ;
+- LAYER metal1 RECT ( 0 0 ) ( 400 400 ) ;
+- PLACEMENT COMPONENT u0 PARTIAL 50 RECT ( 1000 1000 ) ( 2000 2000 ) ;
+END BLOCKAGES
+SPECIALNETS 1 ;
+- VDD ( * VDD ) ( PIN VDD )
+  + ROUTED metal1 280 + SHAPE FOLLOWPIN ( 0 2800 ) ( 20000 * )
+  + USE POWER ;
+END SPECIALNETS
+NETS 3 ;
+- in ( PIN in ) ( u0 A )
+  + ROUTED metal2 ( 190 0 ) ( * 700 ) via1_0
+    NEW metal1 ( 190 700 ) ( 120 * ) ;
+- "n/1" ( u0 ZN ) ( "u1/sub[0]" A ) + USE SIGNAL ;
+- out ( PIN out ) ( u2 ZN ) ( "u1/sub[0]" ZN ) ;
+END NETS
+END DESIGN
+'''
+
+EMPTY_PROPERTYDEFINITIONS_DEF = DEF_HEADER % 'top' + '''PROPERTYDEFINITIONS
+END PROPERTYDEFINITIONS
+DIEAREA ( 0 0 ) ( 20000 14000 ) ;
+COMPONENTS 1 ;
+- u0 INV + PLACED ( 0 0 ) N ;
+END COMPONENTS
+END DESIGN
+'''
+
+PART0_DEF = DEF_HEADER % 'top' + '''DIEAREA ( 0 0 ) ( 20000 14000 ) ;
+COMPONENTS 2 ;
+- part0/u0 INV + PLACED ( 0 0 ) N ;
+- part0/u1 INV + PLACED ( 380 0 ) N ;
+END COMPONENTS
+NETS 1 ;
+- n0 ( part0/u0 ZN ) ( part0/u1 A ) ;
+END NETS
+END DESIGN
+'''
+
+PART1_DEF = DEF_HEADER % 'top' + '''DIEAREA ( 0 0 ) ( 20000 14000 ) ;
+COMPONENTS 1 ;
+- part1/u0 INV + PLACED ( 0 2800 ) FS ;
+END COMPONENTS
+NETS 1 ;
+- n0 ( part1/u0 A ) ;
+END NETS
+END DESIGN
+'''
+
+
+@pytest.fixture(scope='module')
+def lef(tmp_path_factory):
+    lef_file = tmp_path_factory.mktemp('lef') / 'test.lef'
+    lef_file.write_text(LEF_TEXT)
+    return pdflow_lefdef_utils.LEF([str(lef_file)])
+
+
+def read_designs(lef, def_files, use_swig, **kwargs):
+    myDEF = pdflow_lefdef_utils.DEF(lef=lef)
+    for def_file in def_files:
+        myDEF.read_def(str(def_file), use_swig=use_swig, **kwargs)
+    return myDEF.designs
+
+
+def write_defs(tmp_path, *def_texts):
+    def_files = []
+    for i, def_text in enumerate(def_texts):
+        def_file = tmp_path / ('test_%d.def' % i)
+        def_file.write_text(def_text)
+        def_files.append(def_file)
+    return def_files
+
+
+def assert_parity(lef, def_files, **kwargs):
+    swig_designs = read_designs(lef, def_files, True, **kwargs)
+    native_designs = read_designs(lef, def_files, False, **kwargs)
+    assert list(native_designs.keys()) == list(swig_designs.keys())
+    for design_name in swig_designs:
+        differences = pdflow_lefdef_utils.get_def_design_differences(native_designs[design_name], swig_designs[design_name])
+        assert differences == [], '\n'.join(differences)
+    return native_designs
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'exclude_wires': True}, {'lazy': True}])
+def test_representative_def(lef, tmp_path, kwargs):
+    designs = assert_parity(lef, write_defs(tmp_path, REPRESENTATIVE_DEF), **kwargs)
+    assert 'u1/sub[0]' in designs['top'].components
+    assert 'n/1' in designs['top'].nets
+
+
+def test_empty_propertydefinitions(lef, tmp_path):
+    designs = assert_parity(lef, write_defs(tmp_path, EMPTY_PROPERTYDEFINITIONS_DEF))
+    assert designs['top'].dieArea.rect.ur.x == 20000
+    assert list(designs['top'].components) == ['u0']
+
+
+def test_repeated_read_of_same_design(lef, tmp_path):
+    designs = assert_parity(lef, write_defs(tmp_path, PART0_DEF, PART1_DEF))
+    assert sorted(designs['top'].components) == ['part0/u0', 'part0/u1', 'part1/u0']
+
+
+def test_written_def_is_read_back_identically(lef, tmp_path):
+    designs = read_designs(lef, write_defs(tmp_path, REPRESENTATIVE_DEF), True)
+    out_file = tmp_path / 'out.def'
+    designs['top'].write_def(str(out_file))
+    assert_parity(lef, [out_file])
+
+
+def test_native_reader_is_the_default(lef, tmp_path):
+    part0_file, part1_file = write_defs(tmp_path, PART0_DEF, PART1_DEF)
+    myDEF = pdflow_lefdef_utils.DEF(str(part0_file), lef)
+    assert myDEF.swigDEF is None
+    # the same design is merged by LEFDEF SWIG
+    myDEF.read_def(str(part1_file))
+    assert myDEF.swigDEF is not None
+    assert sorted(myDEF.designs['top'].components) == ['part0/u0', 'part0/u1', 'part1/u0']
@@ -0,0 +1,239 @@
+import gzip
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pdflow  # noqa: E402
+
+
+# trimmed from optDesign/timeDesign reports (*.summary) of innovus 19.1
+SETUP_SUMMARY = '''------------------------------------------------------------
+     optDesign Final Summary
+------------------------------------------------------------
+
+Setup views included:
+ default_setup_view
+
++--------------------+---------+---------+---------+
+|     Setup mode     |   all   | reg2reg | default |
++--------------------+---------+---------+---------+
+|           WNS (ns):| -0.123  | -0.123  |  0.045  |
+|           TNS (ns):| -1.456  | -1.456  |  0.000  |
+|    Violating Paths:|   27    |   27    |    0    |
+|          All Paths:|  5320   |  4100   |  1780   |
++--------------------+---------+---------+---------+
+
++----------------+-------------------------------+------------------+
+|                |              Real             |       Total      |
+|    DRVs        +------------------+------------+------------------|
+|                |  Nr nets(terms)  | Worst Vio  |  Nr nets(terms)  |
++----------------+------------------+------------+------------------+
+|   max_cap      |      2 (2)       |   -0.012   |      2 (2)       |
+|   max_tran     |      5 (31)      |   -0.105   |      5 (31)      |
+|   max_fanout   |      0 (0)       |     0      |      0 (0)       |
+|   max_length   |      0 (0)       |     0      |      0 (0)       |
++----------------+------------------+------------+------------------+
+
+Density: 68.421%
+Routing Overflow: 0.00% H and 0.01% V
+------------------------------------------------------------
+'''
+
+HOLD_SUMMARY = '''------------------------------------------------------------
+          timeDesign Summary
+------------------------------------------------------------
+
+Hold views included:
+ default_hold_view
+
++--------------------+---------+---------+---------+
+|     Hold mode      |   all   | reg2reg | default |
++--------------------+---------+---------+---------+
+|           WNS (ns):| -0.008  | -0.008  |  0.021  |
+|           TNS (ns):| -0.030  | -0.030  |  0.000  |
+|    Violating Paths:|    6    |    6    |    0    |
+|          All Paths:|  5320   |  4100   |  1780   |
++--------------------+---------+---------+---------+
+
+Density: 68.421%
+------------------------------------------------------------
+'''
+
+# an earlier summary of the same stage (e.g., before the last optimization), overridden by SETUP_SUMMARY
+OLD_SETUP_SUMMARY = SETUP_SUMMARY.replace('-0.123  | -0.123', '-0.456  | -0.456').replace('Density: 68.421%', 'Density: 65.000%')
+
+# trimmed from summaryReport (<design>_summary/<design>.main.htm.ascii)
+MAIN_HTM_ASCII = '''==============================================================
+                    General Design Information
+==============================================================
+Design Status: Routed
+Design Name: aes_128
+# Instances: 10863
+# Hard Macros: 0
+# Std Cells: 10863
+# Pads: 0
+# Net: 11023
+# Special Net: 2
+# IO Pins: 390
+# Unique Modules: 1
+# Pins: 48110
+
+==============================================================
+                  Standard Cells in Netlist
+==============================================================
+Total Standard Cell Number   (cells) : 10863
+Total Standard Cell Area     ( um^2) : 17960.0320
+
+==============================================================
+                       Wire Length Distribution
+==============================================================
+Total metal1 wire length: 1288.5600 um
+Total metal2 wire length: 98412.2300 um
+Total wire length: 232545.5800 um
+Average wire length/net: 21.0964 um
+'''
+
+# trimmed from reportWire -detail -summary (see get_wirelength)
+WIRE_REPORT = '''#################################################################################
+# Design Stage: PostRoute
+# Design Name: aes_128
+#################################################################################
+Total wire length (um):  232545.58
+Total number of nets:    11023
+'''
+
+TOOL_LOG = '''@innovus 1> source scripts/route.tcl
+#% Begin globalDetailRoute (date=06/14 10:21:33, mem=1502.3M)
+#% End globalDetailRoute (date=06/14 10:28:02, total cpu=0:06:11, real=0:06:29, peak res=1534.5M, current mem=1520.1M)
+
+*** Memory Usage v#1 (Current mem = 1520.102M, initial mem = 283.711M) ***
+*** Message Summary: 412 warning(s), 0 error(s)
+
+--- Ending "Innovus" (totcpu=0:07:23, real=0:10:45, mem=1534.5M) ---
+'''
+
+
+def write_file(file_name, contents, mtime=None):
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    if file_name.endswith('.gz'):
+        with gzip.open(file_name, 'wt') as ofp:
+            ofp.write(contents)
+    else:
+        with open(file_name, 'w') as ofp:
+            ofp.write(contents)
+    if mtime is not None:
+        os.utime(file_name, (mtime, mtime))
+    return file_name
+
+
+def test_read_report(pdflow_pnr, tmp_path):
+    plain_file = write_file(str(tmp_path / 'route.summary'), SETUP_SUMMARY)
+    gzipped_file = write_file(str(tmp_path / 'route.summary.gz'), SETUP_SUMMARY)
+    assert pdflow_pnr.read_report(plain_file) == SETUP_SUMMARY
+    assert pdflow_pnr.read_report(gzipped_file) == SETUP_SUMMARY
+
+
+def test_extract_innovus_metrics(pdflow_pnr, tmp_path):
+    report_dir = str(tmp_path / 'reports')
+    run_dir = str(tmp_path / 'run')
+    write_file(os.path.join(report_dir, 'aes_128_preRoute.summary'), OLD_SETUP_SUMMARY, mtime=1000)
+    write_file(os.path.join(report_dir, 'aes_128_postRoute.summary.gz'), SETUP_SUMMARY, mtime=2000)
+    write_file(os.path.join(report_dir, 'aes_128_postRoute_hold.summary.gz'), HOLD_SUMMARY, mtime=3000)
+    write_file(os.path.join(report_dir, 'aes_128_summary', 'aes_128.main.htm.ascii'), MAIN_HTM_ASCII)
+    log_file = write_file(os.path.join(run_dir, 'innovus.log'), TOOL_LOG)
+
+    metrics = pdflow_pnr.extract_innovus_metrics(report_dir, run_dir, [log_file])
+    assert metrics == {
+        'setup_wns': -0.123,
+        'setup_tns': -1.456,
+        'setup_violating_paths': 27,
+        'hold_wns': -0.008,
+        'hold_tns': -0.030,
+        'hold_violating_paths': 6,
+        'drv_max_cap': 2,
+        'drv_max_tran': 5,
+        'drv_max_fanout': 0,
+        'drv_max_length': 0,
+        'drvs': 7,
+        'density': 68.421,
+        'std_cells': 10863,
+        'std_cell_area': 17960.032,
+        'wirelength': 232545.58,
+        'tool_cpu_sec': 443,
+        'tool_real_sec': 645,
+        'tool_mem_mb': 1534.5,
+    }
+
+
+def test_extract_innovus_metrics_of_tiers(pdflow_pnr, tmp_path):
+    run_dir = str(tmp_path / 'run')
+    write_file(os.path.join(run_dir, 'wire_report'), WIRE_REPORT)
+    log_files = [
+        write_file(os.path.join(run_dir, 'part0.log'), TOOL_LOG),
+        write_file(os.path.join(run_dir, 'part1.log'), TOOL_LOG.replace('totcpu=0:07:23, real=0:10:45, mem=1534.5M', 'totcpu=1:02:03, real=0:09:00, mem=2048.0M')),
+    ]
+
+    metrics = pdflow_pnr.extract_innovus_metrics(str(tmp_path / 'reports'), run_dir, log_files)
+    # cpu time of the tiers is summed up, real time and memory are the maximum
+    assert metrics == {'wirelength': 232545.58, 'tool_cpu_sec': 443 + 3723, 'tool_real_sec': 645, 'tool_mem_mb': 2048.0}
+
+
+def test_extract_innovus_metrics_without_reports(pdflow_pnr, tmp_path):
+    assert pdflow_pnr.extract_innovus_metrics(str(tmp_path / 'reports'), str(tmp_path / 'run'), []) == {}
+
+
+def add_run(wa_dir, stage, time, metrics):
+    conn = pdflow.open_metrics_db(wa_dir)
+    with conn:
+        run_id = conn.execute('INSERT INTO runs (flow, stage, tool, time) VALUES (?, ?, ?, ?)', ('pnr', stage, 'innovus', time)).lastrowid
+        conn.executemany('INSERT INTO metrics (run_id, name, value) VALUES (?, ?, ?)', [(run_id, name, value) for name, value in metrics.items()])
+    conn.close()
+
+
+@pytest.fixture
+def wa_dir(tmp_path, monkeypatch):
+    # is_WA_dir reads configs/wa.config of the project environment
+    monkeypatch.setattr(pdflow, 'is_WA_dir', lambda path: True)
+    monkeypatch.chdir(tmp_path)
+    return str(tmp_path)
+
+
+def test_metrics_command(wa_dir, capsys):
+    add_run(wa_dir, 'route', '2026-06-14 10:30:00', {'setup_wns': -0.123, 'drvs': 7, 'wirelength': 232545.58})
+    add_run(wa_dir, 'place', '2026-06-14 10:00:00', {'setup_wns': 0.012, 'std_cells': 10863})
+    add_run(wa_dir, 'route', '2026-06-14 11:30:00', {'setup_wns': -0.05, 'drvs': 0, 'wirelength': 231002.1})
+
+    assert pdflow.metrics('pnr', None, None, 2) == 0
+    lines = capsys.readouterr().out.splitlines()
+    # stages in the flow order, runs of each stage from the oldest
+    assert lines[0].split() == ['metric', 'place#2', 'route#1', 'route#3']
+    rows = {line.split()[0]: line.split()[1:] for line in lines[1:]}
+    assert rows == {
+        'drvs': ['-', '7', '0'],
+        'setup_wns': ['0.012', '-0.123', '-0.05'],
+        'std_cells': ['10863', '-', '-'],
+        'wirelength': ['-', '232545.58', '231002.1'],
+    }
+
+    assert pdflow.metrics('pnr', ['route'], ['setup_wns', 'drvs'], 1) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split() for line in lines] == [['metric', 'route#3'], ['setup_wns', '-0.05'], ['drvs', '0']]
+
+
+def test_metrics_command_without_db(wa_dir, capsys):
+    assert pdflow.metrics('pnr', None, None, 1) == 0
+    assert capsys.readouterr().out.strip() == 'no metrics in the workarea'
+    assert not os.path.exists(os.path.join(wa_dir, 'metrics.db'))
+
+
+def test_metrics_db_is_recreated_on_version_change(wa_dir):
+    add_run(wa_dir, 'route', '2026-06-14 10:30:00', {'setup_wns': -0.123})
+    conn = sqlite3.connect(os.path.join(wa_dir, 'metrics.db'))
+    conn.execute('PRAGMA user_version = %d' % (pdflow.metrics_db_version + 1))
+    conn.close()
+    conn = pdflow.open_metrics_db(wa_dir)
+    assert conn.execute('SELECT COUNT(*) FROM runs').fetchone()[0] == 0
+    conn.close()
@@ -15,3 +15,12 @@ declare_var('PNR_NUM_ROUTE_LAYER', '', flows='pnr', type=int)
 declare_var('PNR_3D_NUM_ROUTE_LAYERS', 'number of routing layers in each tier', flows='pnr', type=list, default=[])
 
 declare_var('USE_EXT_RC', 'use parasitics from ext flow in sta and emir flow', flows='pnr', type=bool, default=False)
+
+declare_var('PNR_MAX_TOOL_JOBS', 'maximum number of tool jobs (e.g., innovus for each tier in 3D stages) running concurrently. 1 runs them one after another', flows='pnr', type=int, default=1)
+declare_var('PNR_MAX_TOOL_LICENSES', 'maximum number of tool licenses used by concurrent tool jobs (if not given, only PNR_MAX_TOOL_JOBS limits them)', flows='pnr', type=int)
+declare_var('PNR_3D_LIB_WORKERS', 'number of workers to make 3D LIB/DB files of pvt corners in parallel. each worker uses a DB compiler license (limited by the number of cores and the available memory)', flows='pnr', type=int, default=1)
+declare_var('PNR_3D_SPLIT_WORKERS', 'number of worker processes to split the 3D design into tiers in 3d_split and 3d_partition (3DFD). the split designs are the same for any number of workers', flows='pnr', type=int, default=1)
+declare_var('PNR_RESULT_PROMOTION', 'how the results of the previous stage are promoted to the current stage. copy: copy the files, link: reflink the files if the filesystem supports it (otherwise, copy them)', flows='pnr', type=str, default='copy')
+declare_var('PNR_LOG_WATCH_PATTERNS', 'regular expressions of tool log lines to report while the tool runs (e.g., ["^\\*\\*ERROR"])', flows='pnr', type=list, default=[])
+declare_var('PNR_LOG_FATAL_PATTERNS', 'regular expressions of tool log lines which make the tool run pointless (e.g., ["IMPOAX-124", "Failed to check out"])', flows='pnr', type=list, default=[])
+declare_var('PNR_ABORT_ON_FATAL', 'kill the tool as soon as a line matching PNR_LOG_FATAL_PATTERNS appears in its log (the other tool jobs of the stage are killed as well)', flows='pnr', type=bool, default=False)